@@ -37,12 +37,73 @@ def init_db():
         ON profile_cache(created_at)
     """)
 
+    # Alias table: variantes de nom d'entreprise / SIREN → profil canonique
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS profile_aliases (
+            alias_key TEXT PRIMARY KEY,
+            cache_key TEXT NOT NULL,
+            alias_type TEXT NOT NULL,
+            alias_value TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_alias_cache_key
+        ON profile_aliases(cache_key)
+    """)
+
+    # Rendement des requêtes Serper par label (QueryPlanner: élagage/réduction automatique)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS query_yield (
+            label TEXT PRIMARY KEY,
+            runs INTEGER DEFAULT 0,
+            skipped INTEGER DEFAULT 0,
+            results INTEGER DEFAULT 0,
+            used INTEGER DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Historique par domaine: validation HEAD, scraping, latences (classement + politique par domaine)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS domain_ledger (
+            domain TEXT PRIMARY KEY,
+            scrape_attempts INTEGER DEFAULT 0,
+            scrape_successes INTEGER DEFAULT 0,
+            total_content_length INTEGER DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    _add_missing_columns(cursor, 'domain_ledger', {
+        'head_attempts': 'INTEGER DEFAULT 0',
+        'head_ok': 'INTEGER DEFAULT 0',
+        'head_blocked': 'INTEGER DEFAULT 0',
+        'head_timeouts': 'INTEGER DEFAULT 0',
+        'head_latencies': "TEXT DEFAULT '[]'",
+        'scrape_short': 'INTEGER DEFAULT 0',
+        'scrape_latencies': "TEXT DEFAULT '[]'",
+        'fallback_attempts': 'INTEGER DEFAULT 0',
+        'fallback_successes': 'INTEGER DEFAULT 0',
+        'measured_at': 'DATETIME',
+    })
+
     conn.commit()
     conn.close()
 
     print(f"[Database] ✓ Initialized at {DB_PATH}")
 
 
+def _add_missing_columns(cursor, table: str, columns: dict):
+    """Migration légère: ajoute les colonnes absentes d'une table existante"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
 def get_db_connection():
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
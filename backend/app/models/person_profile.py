@@ -169,14 +169,16 @@ class FinancialHistoryYear(BaseModel):
     result: Optional[str] = None
     equity: Optional[str] = None
     employees: Optional[int] = None
+    evolution: Optional[str] = None
 
+# Noms de champs du schéma du prompt (company / since / until), lus tels quels par le frontend
 class MandateHistory(BaseModel):
-    company_name: str
+    company: str
     siren: Optional[str] = None
     role: str
-    start_date: Optional[str] = None
-    end_date: Optional[str] = None
-    status: Optional[str] = Field(description="Actif, Radié, etc.")
+    since: Optional[str] = None
+    until: Optional[str] = None
+    status: Optional[str] = Field(description="Actif, Cessé, Radié")
     company_status: Optional[str] = None
 
 class RealEstateAsset(BaseModel):
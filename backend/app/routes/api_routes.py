@@ -1,10 +1,15 @@
 from flask import Blueprint, request, jsonify, Response, stream_with_context
 from app.models.person_profile import PersonInput
 from app.services.profile_service import ProfileService
+from app.utils.http_client import get_http_client
+from app.utils.host_limiter import get_host_limiter
+from app.utils.circuit_breaker import get_breaker_states, STATE_CLOSED
 from pydantic import ValidationError
 import json
 import time
 import os
+import uuid
+import threading
 
 bp = Blueprint('api', __name__, url_prefix='/api/v1')
 profile_service = ProfileService()
@@ -14,9 +19,15 @@ progress_store = {}
 
 @bp.route('/health', methods=['GET'])
 def health_check():
+    # Toujours 200 (healthcheck Docker): un provider dégradé n'est pas une panne du serveur
+    breakers = get_breaker_states()
+    degraded = sorted(provider for provider, state in breakers.items() if state['state'] != STATE_CLOSED)
+
     return jsonify({
-        "status": "healthy",
-        "message": "LumironScraper API is running"
+        "status": "degraded" if degraded else "healthy",
+        "message": "LumironScraper API is running",
+        "degraded_providers": degraded,
+        "circuit_breakers": breakers
     }), 200
 
 @bp.route('/search', methods=['POST'])
@@ -61,6 +72,162 @@ def search_person():
         }), 500
 
 
+@bp.route('/refresh', methods=['POST'])
+def refresh_person():
+    """
+    Refresh incrémental: découverte relancée, seules les nouvelles URLs sont scrapées,
+    analyse LLM sautée si aucun changement matériel.
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "No data provided"
+            }), 400
+
+        person_input = PersonInput(**data)
+
+        result = profile_service.refresh_profile_incremental(
+            person_input.first_name,
+            person_input.last_name,
+            person_input.company
+        )
+
+        if result["success"]:
+            return jsonify(result), 200
+        else:
+            return jsonify(result), 500
+
+    except ValidationError as e:
+        return jsonify({
+            "success": False,
+            "error": "Validation error",
+            "details": e.errors(include_url=False)
+        }), 400
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "message": "An unexpected error occurred"
+        }), 500
+
+
+@bp.route('/reanalyze', methods=['POST'])
+def reanalyze_person():
+    """
+    Régénère profile_data depuis le scraped_data en cache (template + modèle courants).
+    Aucun appel Serper/Pappers/Firecrawl.
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "No data provided"
+            }), 400
+
+        person_input = PersonInput(**data)
+
+        result = profile_service.reanalyze_profile(
+            person_input.first_name,
+            person_input.last_name,
+            person_input.company
+        )
+
+        if result["success"]:
+            return jsonify(result), 200
+        else:
+            return jsonify(result), 404 if result.get("error") == "Profil introuvable en cache" else 500
+
+    except ValidationError as e:
+        return jsonify({
+            "success": False,
+            "error": "Validation error",
+            "details": e.errors(include_url=False)
+        }), 400
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "message": "An unexpected error occurred"
+        }), 500
+
+
+def _run_reanalyze_job(job_id: str, max_concurrent):
+    """Job de ré-analyse bulk (hors requête HTTP): l'état est suivi dans progress_store"""
+    job = progress_store[job_id]
+
+    try:
+        job["result"] = profile_service.reanalyze_all(max_concurrent, job)
+        job["status"] = "completed"
+    except Exception as e:
+        print(f"[Reanalyze] ✗ Job {job_id} failed: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        job["finished_at"] = time.time()
+
+
+@bp.route('/reanalyze/all', methods=['POST'])
+def reanalyze_all():
+    """
+    Lance la ré-analyse de tous les profils en cache en arrière-plan
+    (le batch dépasse le timeout gunicorn). Suivi via GET /reanalyze/all/<job_id>.
+    Body optionnel: {"max_concurrent": 3}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        max_concurrent = data.get('max_concurrent')
+
+        if max_concurrent is not None:
+            try:
+                max_concurrent = int(max_concurrent)
+            except (TypeError, ValueError):
+                max_concurrent = 0
+            if max_concurrent < 1:
+                return jsonify({
+                    "success": False,
+                    "error": "max_concurrent must be a positive integer"
+                }), 400
+
+        job_id = str(uuid.uuid4())
+        progress_store[job_id] = {"status": "running", "started_at": time.time()}
+        threading.Thread(target=_run_reanalyze_job, args=(job_id, max_concurrent), daemon=True).start()
+
+        return jsonify({
+            "success": True,
+            "data": {"job_id": job_id, "status": "running"}
+        }), 202
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@bp.route('/reanalyze/all/<job_id>', methods=['GET'])
+def reanalyze_all_status(job_id):
+    """Avancement d'un job de ré-analyse bulk (total, done, succeeded, failed, puis result)"""
+    job = progress_store.get(job_id)
+
+    if not job:
+        return jsonify({
+            "success": False,
+            "error": "Job introuvable"
+        }), 404
+
+    return jsonify({
+        "success": True,
+        "data": {"job_id": job_id, **job}
+    }), 200
+
+
 @bp.route('/cache/stats', methods=['GET'])
 def cache_stats():
     try:
@@ -76,6 +243,94 @@ def cache_stats():
         }), 500
 
 
+@bp.route('/http/stats', methods=['GET'])
+def http_stats():
+    """Métriques du client HTTP partagé (requêtes, latence, réutilisation des connexions) et limites par host"""
+    try:
+        return jsonify({
+            "success": True,
+            "data": get_http_client().get_metrics(),
+            "host_limits": get_host_limiter().get_metrics()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@bp.route('/queries/yield', methods=['GET'])
+def query_yield_stats():
+    """Rendement des requêtes Serper par label (résultats reçus, éléments utilisés, élagage)"""
+    try:
+        return jsonify({
+            "success": True,
+            "data": profile_service.scraper.query_planner.get_yield_stats()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@bp.route('/domains/ledger', methods=['GET'])
+def domain_ledger_stats():
+    """Historique par domaine (HEAD, succès Firecrawl, latences, contenu utile) et politique appliquée"""
+    try:
+        scraper = profile_service.scraper
+        return jsonify({
+            "success": True,
+            "data": scraper.domain_ledger.get_ledger(
+                fallback_available=bool(scraper.scraperapi_key),
+                default_timeout=scraper.validation_timeout
+            )
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@bp.route('/scraping/tiers', methods=['GET'])
+def scraping_tier_stats():
+    """Taux de succès et latence moyenne par tier de scraping (local, firecrawl, scraperapi) + hedging"""
+    try:
+        return jsonify({
+            "success": True,
+            "data": {
+                **profile_service.scraper.tier_stats.get_metrics(),
+                "hedging": profile_service.scraper.hedger.get_metrics()
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@bp.route('/llm/usage', methods=['GET'])
+def llm_usage_stats():
+    """Tokens OpenAI consommés par type d'appel (dont la part servie par le cache de prompt), routage des modèles, file de la passerelle LLM"""
+    try:
+        return jsonify({
+            "success": True,
+            "data": {
+                **profile_service.llm.usage_stats.get_stats(),
+                "prompt_layout": profile_service.llm.get_prompt_layout(),
+                "routing": profile_service.llm.router.get_stats(),
+                "gateway": profile_service.llm.gateway.get_metrics()
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
 @bp.route('/cache/clear-expired', methods=['POST'])
 def clear_expired_cache():
     try:
@@ -91,6 +346,50 @@ def clear_expired_cache():
         }), 500
 
 
+@bp.route('/cache/aliases', methods=['POST'])
+def add_cache_alias():
+    """
+    Associe une variante de nom d'entreprise (ou un SIREN) à un profil en cache.
+    Body: {first_name, last_name, company, alias}
+    """
+    try:
+        data = request.get_json()
+
+        if not data or not data.get('alias'):
+            return jsonify({
+                "success": False,
+                "error": "Fields 'first_name', 'last_name', 'company' and 'alias' are required"
+            }), 400
+
+        person_input = PersonInput(**data)
+
+        added = profile_service.cache.add_alias(
+            person_input.first_name,
+            person_input.last_name,
+            data['alias'],
+            person_input.company
+        )
+
+        return jsonify({
+            "success": True,
+            "added": added,
+            "message": "Alias added" if added else "Alias already resolves to the same profile"
+        }), 200
+
+    except ValidationError as e:
+        return jsonify({
+            "success": False,
+            "error": "Validation error",
+            "details": e.errors(include_url=False)
+        }), 400
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
 @bp.route('/search-stream', methods=['POST'])
 def search_person_stream():
     """
@@ -139,8 +438,8 @@ def search_person_stream():
                 yield f"data: {json.dumps({'type': 'progress', 'step': 'serper', 'message': 'Recherche Google (235+ URLs)...', 'percent': 12})}\n\n"
                 time.sleep(0.5)
 
-                # URL Validation (~5s = 5%)
-                yield f"data: {json.dumps({'type': 'progress', 'step': 'validation', 'message': 'Validation des URLs (235 URLs)...', 'percent': 15})}\n\n"
+                # URL Validation juste-à-temps (lots classés, seulement les meilleures candidates)
+                yield f"data: {json.dumps({'type': 'progress', 'step': 'validation', 'message': 'Validation des meilleures URLs...', 'percent': 15})}\n\n"
                 time.sleep(0.5)
 
                 # v3.1: Scraping = 50% du temps total (~40-50s = 40%)
@@ -176,7 +475,9 @@ def search_person_stream():
                 # Analyse avec LLM = 35% du temps total (~25-40s)
                 yield f"data: {json.dumps({'type': 'progress', 'step': 'llm', 'message': 'Analyse IA en cours (GPT-4o, 21 sections, ~30-40s)...', 'percent': 65})}\n\n"
 
-                profile_data = profile_service.llm.analyze_profile(
+                # Streaming: chaque section du profil est transmise dès que GPT-4o l'a terminée
+                profile_data = None
+                for event_type, payload in profile_service.llm.analyze_profile_stream(
                     person_input.first_name,
                     person_input.last_name,
                     person_input.company,
@@ -184,7 +485,12 @@ def search_person_stream():
                     scraped_data.get("pappers_data"),
                     scraped_data.get("dvf_data"),
                     scraped_data.get("hatvp_data")
-                )
+                ):
+                    if event_type == 'section':
+                        name, section_data = payload
+                        yield f"data: {json.dumps({'type': 'section', 'name': name, 'data': section_data})}\n\n"
+                    else:
+                        profile_data = payload
 
                 profile_data["sources"] = scraped_data.get("sources", [])
 
@@ -2,19 +2,164 @@ import os
 import json
 import hashlib
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from app.db.database import get_db_connection
+from app.utils.name_normalizer import normalize_person_name, normalize_company_name
+
+# Version du schéma de clé de cache (PRAGMA user_version): à incrémenter à chaque changement
+# de _generate_cache_key pour que migrate_cache_keys re-calcule les clés existantes
+CACHE_KEY_VERSION = 1
 
 
 class CacheService:
     def __init__(self):
         self.ttl_seconds = int(os.getenv('CACHE_TTL_SECONDS', '604800'))
         print(f"[Cache] TTL configured: {self.ttl_seconds}s ({self.ttl_seconds / 86400:.1f} days)")
+        self.migrate_cache_keys()
 
     def _generate_cache_key(self, first_name: str, last_name: str, company: str) -> str:
-        normalized = f"{first_name.lower().strip()}:{last_name.lower().strip()}:{company.lower().strip()}"
+        # Canonicalisation: accents, ponctuation, espaces, formes juridiques (SAS, SARL...)
+        normalized = f"{normalize_person_name(first_name)}:{normalize_person_name(last_name)}:{normalize_company_name(company)}"
         return hashlib.md5(normalized.encode()).hexdigest()
 
+    def migrate_cache_keys(self):
+        """
+        Re-calcule les clés des profils et des alias existants avec le schéma courant
+        (clés brutes d'avant la canonicalisation, formes juridiques retirées en milieu de nom),
+        sinon ces entrées deviennent inaccessibles. Exécuté une fois par version de schéma.
+        Une clé déjà prise par un autre profil n'est pas écrasée (l'ancienne entrée expire au TTL).
+        """
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            # Verrou d'écriture: un seul worker gunicorn migre
+            cursor.execute("BEGIN IMMEDIATE")
+            if cursor.execute("PRAGMA user_version").fetchone()[0] >= CACHE_KEY_VERSION:
+                conn.rollback()
+                conn.close()
+                return
+
+            rekeyed = 0
+            cursor.execute("SELECT cache_key, first_name, last_name, company FROM profile_cache")
+            for row in cursor.fetchall():
+                new_key = self._generate_cache_key(row['first_name'], row['last_name'], row['company'])
+                if new_key == row['cache_key']:
+                    continue
+
+                cursor.execute("SELECT 1 FROM profile_cache WHERE cache_key = ?", (new_key,))
+                if cursor.fetchone():
+                    continue
+
+                cursor.execute("UPDATE profile_cache SET cache_key = ? WHERE cache_key = ?", (new_key, row['cache_key']))
+                cursor.execute("UPDATE profile_aliases SET cache_key = ? WHERE cache_key = ?", (new_key, row['cache_key']))
+                rekeyed += 1
+
+            # Alias: clé recalculée à partir du nom de la personne du profil cible
+            realiased = 0
+            cursor.execute("""
+                SELECT a.alias_key, a.cache_key, a.alias_type, a.alias_value, p.first_name, p.last_name
+                FROM profile_aliases a JOIN profile_cache p ON p.cache_key = a.cache_key
+            """)
+            for row in cursor.fetchall():
+                new_key = self._generate_cache_key(row['first_name'], row['last_name'], row['alias_value'])
+                if new_key == row['alias_key']:
+                    continue
+
+                cursor.execute("DELETE FROM profile_aliases WHERE alias_key = ?", (row['alias_key'],))
+                self._store_aliases(cursor, row['cache_key'], [(new_key, row['alias_type'], row['alias_value'])])
+                realiased += 1
+
+            cursor.execute(f"PRAGMA user_version = {CACHE_KEY_VERSION}")
+            conn.commit()
+            conn.close()
+
+            if rekeyed or realiased:
+                print(f"[Cache] ✓ Cache keys migrated to v{CACHE_KEY_VERSION}: {rekeyed} profile(s), {realiased} alias(es)")
+
+        except Exception as e:
+            print(f"[Cache] ✗ Error migrating cache keys: {e}")
+
+    def _resolve_cache_key(self, cursor, cache_key: str) -> str:
+        """
+        Résout une clé via la table d'alias (variantes de nom, SIREN).
+        Retourne la clé canonique si un alias existe, sinon la clé d'origine.
+        """
+        cursor.execute("SELECT 1 FROM profile_cache WHERE cache_key = ?", (cache_key,))
+        if cursor.fetchone():
+            return cache_key
+
+        cursor.execute("SELECT cache_key FROM profile_aliases WHERE alias_key = ?", (cache_key,))
+        row = cursor.fetchone()
+        if row:
+            print(f"[Cache] ↪ Alias resolved: {cache_key[:8]} → {row['cache_key'][:8]}")
+            return row['cache_key']
+
+        return cache_key
+
+    def add_alias(self, first_name: str, last_name: str, alias_company: str, canonical_company: str, alias_type: str = 'manual') -> bool:
+        """
+        Associe une variante (nom d'entreprise ou SIREN) au profil canonique.
+        Ex: "Société Générale SA" ou "552120222" → profil "Societe Generale"
+        """
+        alias_key = self._generate_cache_key(first_name, last_name, alias_company)
+        canonical_key = self._generate_cache_key(first_name, last_name, canonical_company)
+
+        if alias_key == canonical_key:
+            return False
+
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            canonical_key = self._resolve_cache_key(cursor, canonical_key)
+            self._store_aliases(cursor, canonical_key, [(alias_key, alias_type, alias_company)])
+            conn.commit()
+            conn.close()
+
+            print(f"[Cache] ✓ Alias added: {alias_company} → {canonical_company} ({first_name} {last_name})")
+            return True
+
+        except Exception as e:
+            print(f"[Cache] ✗ Error adding alias: {e}")
+            return False
+
+    def _store_aliases(self, cursor, cache_key: str, aliases: List[tuple]):
+        """Insère/maj des alias (alias_key, alias_type, alias_value) vers cache_key"""
+        for alias_key, alias_type, alias_value in aliases:
+            if alias_key == cache_key:
+                continue
+
+            cursor.execute("""
+                INSERT INTO profile_aliases (alias_key, cache_key, alias_type, alias_value)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(alias_key) DO UPDATE SET
+                    cache_key = excluded.cache_key,
+                    alias_type = excluded.alias_type,
+                    alias_value = excluded.alias_value,
+                    created_at = CURRENT_TIMESTAMP
+            """, (alias_key, cache_key, alias_type, alias_value))
+
+    def _collect_pappers_aliases(self, first_name: str, last_name: str, scraped_data: Dict) -> List[tuple]:
+        """
+        Alias dérivés des données Pappers: SIREN + dénomination officielle
+        des entreprises où la personne a été trouvée parmi les représentants.
+        """
+        pappers_data = (scraped_data or {}).get('pappers_data') or {}
+        aliases = []
+
+        for company in pappers_data.get('companies', []):
+            if not company.get('person_found'):
+                continue
+
+            siren = company.get('siren')
+            if siren:
+                aliases.append((self._generate_cache_key(first_name, last_name, siren), 'siren', siren))
+
+            nom_entreprise = company.get('nom_entreprise')
+            if nom_entreprise:
+                aliases.append((self._generate_cache_key(first_name, last_name, nom_entreprise), 'pappers_name', nom_entreprise))
+
+        return aliases
+
     def get(self, first_name: str, last_name: str, company: str, force_refresh: bool = False) -> Optional[Dict]:
         if force_refresh:
             print(f"[Cache] Force refresh requested, skipping cache")
@@ -25,6 +170,7 @@ class CacheService:
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
+            cache_key = self._resolve_cache_key(cursor, cache_key)
 
             cursor.execute("""
                 SELECT
@@ -78,12 +224,103 @@ class CacheService:
             print(f"[Cache] Error reading cache: {e}")
             return None
 
+    def get_entry(self, first_name: str, last_name: str, company: str) -> Optional[Dict]:
+        """
+        Lit une entrée brute (scraped_data + profile_data) sans vérifier le TTL
+        ni incrémenter le compteur d'accès. Utilisé pour la ré-analyse.
+        """
+        cache_key = self._generate_cache_key(first_name, last_name, company)
+
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cache_key = self._resolve_cache_key(cursor, cache_key)
+
+            cursor.execute("""
+                SELECT first_name, last_name, company, scraped_data, profile_data, created_at
+                FROM profile_cache
+                WHERE cache_key = ?
+            """, (cache_key,))
+
+            row = cursor.fetchone()
+            conn.close()
+
+            if not row:
+                return None
+
+            return {
+                'cache_key': cache_key,
+                'first_name': row['first_name'],
+                'last_name': row['last_name'],
+                'company': row['company'],
+                'scraped_data': json.loads(row['scraped_data']),
+                'profile_data': json.loads(row['profile_data']),
+                'cache_created_at': row['created_at']
+            }
+
+        except Exception as e:
+            print(f"[Cache] ✗ Error reading entry: {e}")
+            return None
+
+    def list_entries(self) -> List[Dict]:
+        """Liste les identités (first_name, last_name, company) de toutes les entrées en cache"""
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT first_name, last_name, company, created_at
+                FROM profile_cache
+                ORDER BY accessed_at DESC
+            """)
+
+            rows = cursor.fetchall()
+            conn.close()
+
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            print(f"[Cache] ✗ Error listing entries: {e}")
+            return []
+
+    def update_profile_data(self, first_name: str, last_name: str, company: str, profile_data: Dict) -> bool:
+        """
+        Remplace uniquement profile_data (ré-analyse LLM).
+        created_at est conservé: le TTL reste lié à la fraîcheur des données scrapées.
+        """
+        cache_key = self._generate_cache_key(first_name, last_name, company)
+
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cache_key = self._resolve_cache_key(cursor, cache_key)
+
+            cursor.execute("""
+                UPDATE profile_cache
+                SET profile_data = ?
+                WHERE cache_key = ?
+            """, (json.dumps(profile_data), cache_key))
+            updated = cursor.rowcount > 0
+
+            conn.commit()
+            conn.close()
+
+            if updated:
+                print(f"[Cache] ✓ Profile re-analyzed: {first_name} {last_name} @ {company}")
+
+            return updated
+
+        except Exception as e:
+            print(f"[Cache] ✗ Error updating profile: {e}")
+            return False
+
     def set(self, first_name: str, last_name: str, company: str, scraped_data: Dict, profile_data: Dict) -> bool:
         cache_key = self._generate_cache_key(first_name, last_name, company)
 
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
+            cache_key = self._resolve_cache_key(cursor, cache_key)
 
             scraped_json = json.dumps(scraped_data)
             profile_json = json.dumps(profile_data)
@@ -100,10 +337,14 @@ class CacheService:
                     access_count = 0
             """, (cache_key, first_name, last_name, company, scraped_json, profile_json))
 
+            # SIREN + dénomination Pappers → même profil canonique
+            aliases = self._collect_pappers_aliases(first_name, last_name, scraped_data)
+            self._store_aliases(cursor, cache_key, aliases)
+
             conn.commit()
             conn.close()
 
-            print(f"[Cache] ✓ Stored: {first_name} {last_name} @ {company}")
+            print(f"[Cache] ✓ Stored: {first_name} {last_name} @ {company}" + (f" (+{len(aliases)} alias)" if aliases else ""))
             return True
 
         except Exception as e:
@@ -116,10 +357,13 @@ class CacheService:
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
+            cache_key = self._resolve_cache_key(cursor, cache_key)
 
             cursor.execute("DELETE FROM profile_cache WHERE cache_key = ?", (cache_key,))
             deleted = cursor.rowcount > 0
 
+            cursor.execute("DELETE FROM profile_aliases WHERE cache_key = ?", (cache_key,))
+
             conn.commit()
             conn.close()
 
@@ -173,6 +417,9 @@ class CacheService:
             """)
 
             row = cursor.fetchone()
+
+            cursor.execute("SELECT COUNT(*) as total_aliases FROM profile_aliases")
+            total_aliases = cursor.fetchone()['total_aliases']
             conn.close()
 
             return {
@@ -180,6 +427,7 @@ class CacheService:
                 'oldest_entry': row['oldest_entry'],
                 'newest_entry': row['newest_entry'],
                 'total_access_count': row['total_access_count'] or 0,
+                'total_aliases': total_aliases,
                 'ttl_seconds': self.ttl_seconds
             }
 
@@ -190,5 +438,6 @@ class CacheService:
                 'oldest_entry': None,
                 'newest_entry': None,
                 'total_access_count': 0,
+                'total_aliases': 0,
                 'ttl_seconds': self.ttl_seconds
             }
\ No newline at end of file
@@ -0,0 +1,291 @@
+"""
+Domain ledger - historique persistant des performances par domaine.
+
+Par domaine: résultats de validation HEAD (ok / bloqué / timeout), taux de succès
+Firecrawl, pages trop courtes, percentiles de latence et longueur moyenne du
+contenu utile. Le scraper le consulte pour:
+- classer les URLs candidates (taux de succès lissé)
+- sauter les domaines hostiles ou morts
+- raccourcir le timeout HEAD des domaines rapides
+- envoyer directement au fallback (ScraperAPI) les domaines qui bloquent Firecrawl
+
+Les résultats sont accumulés en mémoire pendant une collecte puis écrits
+en un seul batch SQLite (flush), pour ne pas multiplier les écritures
+depuis les threads de validation et de scraping.
+
+Un domaine ignoré (skip) ou routé vers ScraperAPI (fallback) n'est plus mesuré
+(ni HEAD ni Firecrawl): sans expiration, une mauvaise passe le bannirait pour
+toujours. L'historique expire donc DOMAIN_LEDGER_TTL_HOURS après la dernière
+mesure HEAD/Firecrawl: le domaine repasse en traitement normal (sonde) et ses
+compteurs repartent de zéro au flush suivant.
+"""
+
+import os
+import json
+import time
+import threading
+from typing import List, Dict, Optional
+from app.db.database import get_db_connection
+from app.utils.url_validator import get_domain
+
+COUNTER_COLUMNS = (
+    'head_attempts', 'head_ok', 'head_blocked', 'head_timeouts',
+    'scrape_attempts', 'scrape_successes', 'scrape_short', 'total_content_length',
+    'fallback_attempts', 'fallback_successes',
+)
+LATENCY_COLUMNS = ('head_latencies', 'scrape_latencies')
+
+# Actions par domaine
+ACTION_NORMAL = 'normal'      # Validation HEAD puis Firecrawl
+ACTION_TRUST = 'trust'        # HEAD toujours bloqué mais Firecrawl OK → pas de validation HEAD
+ACTION_FALLBACK = 'fallback'  # Firecrawl échoue → directement ScraperAPI (sans HEAD)
+ACTION_SKIP = 'skip'          # Domaine mort ou hostile → ignoré
+
+
+def _percentile(values: List[int], percent: float) -> Optional[int]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class DomainLedger:
+    def __init__(self):
+        self.min_samples = int(os.getenv('DOMAIN_LEDGER_MIN_SAMPLES', '5'))
+        self.skip_success_rate = float(os.getenv('DOMAIN_SKIP_SUCCESS_RATE', '0.1'))
+        self.latency_samples = int(os.getenv('DOMAIN_LEDGER_LATENCY_SAMPLES', '50'))
+        self.head_timeout_min = float(os.getenv('DOMAIN_HEAD_TIMEOUT_MIN', '1'))
+        self.ttl_hours = int(os.getenv('DOMAIN_LEDGER_TTL_HOURS', '24'))  # 0 = historique permanent
+
+        self._pending: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _stale_condition(self) -> str:
+        """Condition SQL: dernière mesure HEAD/Firecrawl plus ancienne que le TTL"""
+        if not self.ttl_hours:
+            return "0"
+        return f"COALESCE(measured_at, updated_at) < datetime('now', '-{self.ttl_hours} hours')"
+
+    def _pending_entry(self, url: str) -> Optional[Dict]:
+        """Entrée en attente du domaine (à appeler sous self._lock)"""
+        domain = get_domain(url).lower()
+        if not domain:
+            return None
+
+        if domain not in self._pending:
+            entry = {column: 0 for column in COUNTER_COLUMNS}
+            entry.update({column: [] for column in LATENCY_COLUMNS})
+            self._pending[domain] = entry
+
+        return self._pending[domain]
+
+    def record_head(self, url: str, result: Dict):
+        """Résultat de url_validator.check_url (callback on_result de validate_urls)"""
+        outcome = result.get('outcome')
+        if outcome == 'rejected':
+            # Type de fichier / taille: propre à l'URL, pas au domaine
+            return
+
+        with self._lock:
+            entry = self._pending_entry(url)
+            if entry is None:
+                return
+
+            entry['head_attempts'] += 1
+            if outcome == 'ok':
+                entry['head_ok'] += 1
+                entry['head_latencies'].append(result.get('latency_ms', 0))
+            elif outcome == 'blocked':
+                entry['head_blocked'] += 1
+            elif outcome == 'timeout':
+                entry['head_timeouts'] += 1
+
+    def record_scrape(self, url: str, success: bool, content_length: int = 0, latency_ms: int = None, too_short: bool = False):
+        with self._lock:
+            entry = self._pending_entry(url)
+            if entry is None:
+                return
+
+            entry['scrape_attempts'] += 1
+            if success:
+                entry['scrape_successes'] += 1
+                entry['total_content_length'] += content_length
+            if too_short:
+                entry['scrape_short'] += 1
+            if latency_ms is not None:
+                entry['scrape_latencies'].append(latency_ms)
+
+    def record_fallback(self, url: str, success: bool):
+        with self._lock:
+            entry = self._pending_entry(url)
+            if entry is None:
+                return
+
+            entry['fallback_attempts'] += 1
+            if success:
+                entry['fallback_successes'] += 1
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return
+
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+
+            placeholders = ','.join('?' * len(pending))
+            # Historique expiré: remplacé par les nouvelles mesures
+            cursor.execute(f"""
+                DELETE FROM domain_ledger
+                WHERE domain IN ({placeholders}) AND {self._stale_condition()}
+            """, list(pending))
+            cursor.execute(f"""
+                SELECT domain, head_latencies, scrape_latencies
+                FROM domain_ledger WHERE domain IN ({placeholders})
+            """, list(pending))
+            existing = {row['domain']: row for row in cursor.fetchall()}
+
+            now = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+            rows = []
+            for domain, entry in pending.items():
+                # Latences: fenêtre glissante des N dernières mesures
+                latencies = {}
+                for column in LATENCY_COLUMNS:
+                    previous = json.loads(existing[domain][column] or '[]') if domain in existing else []
+                    latencies[column] = json.dumps((previous + entry[column])[-self.latency_samples:])
+
+                # Horodatage de mesure: HEAD ou Firecrawl (les tentatives ScraperAPI ne rafraîchissent pas le TTL)
+                measured = entry['head_attempts'] or entry['scrape_attempts']
+
+                rows.append(
+                    [domain]
+                    + [entry[column] for column in COUNTER_COLUMNS]
+                    + [latencies[column] for column in LATENCY_COLUMNS]
+                    + [now if measured else None]
+                )
+
+            columns = ('domain',) + COUNTER_COLUMNS + LATENCY_COLUMNS + ('measured_at',)
+            updates = [f"{column} = {column} + excluded.{column}" for column in COUNTER_COLUMNS]
+            updates += [f"{column} = excluded.{column}" for column in LATENCY_COLUMNS]
+            updates.append("measured_at = COALESCE(excluded.measured_at, measured_at)")
+
+            cursor.executemany(f"""
+                INSERT INTO domain_ledger ({', '.join(columns)})
+                VALUES ({', '.join('?' * len(columns))})
+                ON CONFLICT(domain) DO UPDATE SET
+                    {', '.join(updates)},
+                    updated_at = CURRENT_TIMESTAMP
+            """, rows)
+
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"[DomainLedger] ✗ Error recording domain outcomes: {e}")
+
+    def _load_rows(self, domains: Optional[List[str]] = None) -> List[Dict]:
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+
+            columns = f"*, ({self._stale_condition()}) AS stale"
+            if domains is None:
+                cursor.execute(f"SELECT {columns} FROM domain_ledger ORDER BY scrape_attempts + head_attempts DESC")
+            else:
+                domains = list(set(d for d in domains if d))
+                if not domains:
+                    conn.close()
+                    return []
+                placeholders = ','.join('?' * len(domains))
+                cursor.execute(f"SELECT {columns} FROM domain_ledger WHERE domain IN ({placeholders})", domains)
+
+            rows = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return rows
+        except Exception as e:
+            print(f"[DomainLedger] ✗ Error loading domain history: {e}")
+            return []
+
+    def get_usefulness(self, domains: List[str]) -> Dict[str, float]:
+        """
+        Taux de succès lissé (Laplace) par domaine: (succès + 1) / (tentatives + 2).
+        Domaine inconnu → absent du résultat (neutre pour le classement).
+        """
+        return {
+            row['domain']: (row['scrape_successes'] + 1) / (row['scrape_attempts'] + 2)
+            for row in self._load_rows(domains)
+            if row['scrape_attempts']
+        }
+
+    def _decide(self, row: Dict, fallback_available: bool, default_timeout: float) -> Dict:
+        """Action et timeout HEAD pour un domaine, à partir de son historique"""
+        head_latencies = json.loads(row.get('head_latencies') or '[]')
+        head_timeout = default_timeout
+
+        # Domaine rapide: timeout HEAD = 2x p90 observé (borné)
+        if len(head_latencies) >= self.min_samples:
+            p90_seconds = _percentile(head_latencies, 90) / 1000
+            head_timeout = min(default_timeout, max(self.head_timeout_min, p90_seconds * 2))
+
+        enough_head = row['head_attempts'] >= self.min_samples
+        enough_scrape = row['scrape_attempts'] >= self.min_samples
+        success_rate = row['scrape_successes'] / row['scrape_attempts'] if row['scrape_attempts'] else None
+
+        action = ACTION_NORMAL
+        reason = None
+
+        if enough_scrape and success_rate < self.skip_success_rate:
+            fallback_failed = (
+                row['fallback_attempts'] >= self.min_samples
+                and row['fallback_successes'] / row['fallback_attempts'] < self.skip_success_rate
+            )
+            if fallback_available and not fallback_failed:
+                action, reason = ACTION_FALLBACK, f"firecrawl success rate {success_rate:.0%}"
+            else:
+                action, reason = ACTION_SKIP, f"scrape success rate {success_rate:.0%}"
+        elif enough_head and row['head_ok'] == 0 and row['head_timeouts'] > row['head_blocked']:
+            action, reason = ACTION_SKIP, "HEAD always times out"
+        elif enough_head and row['head_ok'] == 0 and row['head_blocked']:
+            # HEAD refusé (anti-bot) mais le scraping peut fonctionner: on saute la validation
+            action, reason = ACTION_TRUST, "HEAD always blocked"
+
+        if action in (ACTION_SKIP, ACTION_FALLBACK) and row.get('stale'):
+            # Historique expiré: sonde (HEAD + Firecrawl) pour détecter un retour à la normale
+            action, reason = ACTION_NORMAL, f"probe ({reason}, no measure in {self.ttl_hours}h)"
+
+        return {'action': action, 'head_timeout': head_timeout, 'reason': reason}
+
+    def get_policies(self, domains: List[str], fallback_available: bool, default_timeout: float) -> Dict[str, Dict]:
+        """Politique par domaine connu: {domain: {action, head_timeout, reason}}"""
+        return {
+            row['domain']: self._decide(row, fallback_available, default_timeout)
+            for row in self._load_rows(domains)
+        }
+
+    def get_ledger(self, fallback_available: bool = False, default_timeout: float = 3) -> List[Dict]:
+        """Vue complète (endpoint admin): compteurs, taux, percentiles et politique courante"""
+        ledger = []
+
+        for row in self._load_rows():
+            head_latencies = json.loads(row.pop('head_latencies') or '[]')
+            scrape_latencies = json.loads(row.pop('scrape_latencies') or '[]')
+            policy = self._decide({**row, 'head_latencies': json.dumps(head_latencies)}, fallback_available, default_timeout)
+
+            row.update({
+                'head_ok_rate': round(row['head_ok'] / row['head_attempts'], 2) if row['head_attempts'] else None,
+                'scrape_success_rate': round(row['scrape_successes'] / row['scrape_attempts'], 2) if row['scrape_attempts'] else None,
+                'avg_content_length': round(row['total_content_length'] / row['scrape_successes']) if row['scrape_successes'] else 0,
+                'head_latency_ms': {'p50': _percentile(head_latencies, 50), 'p90': _percentile(head_latencies, 90)},
+                'scrape_latency_ms': {
+                    'p50': _percentile(scrape_latencies, 50),
+                    'p90': _percentile(scrape_latencies, 90),
+                    'p99': _percentile(scrape_latencies, 99)
+                },
+                'policy': policy
+            })
+            ledger.append(row)
+
+        return ledger
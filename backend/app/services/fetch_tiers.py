@@ -0,0 +1,126 @@
+"""
+Tiered fetching - du moins cher au plus cher.
+
+1. local: GET direct (pool keep-alive partagé) + extraction HTML → texte
+2. firecrawl: rendu JS / anti-bot géré par Firecrawl
+3. scraperapi: dernier recours pour les sites qui bloquent Firecrawl
+
+Chaque page est jugée (longueur utile, pages de challenge anti-bot, coquilles JS)
+avant d'être acceptée; sinon on passe au tier suivant. TierStats agrège le taux
+de succès et la latence par tier (endpoint /scraping/tiers).
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+from app.utils.http_client import get_http_client
+from app.utils.host_limiter import get_host_limiter
+from app.utils.url_validator import get_realistic_headers
+from app.utils.content_cleaner import clean_scraped_html
+
+TIER_LOCAL = 'local'
+TIER_FIRECRAWL = 'firecrawl'
+TIER_SCRAPERAPI = 'scraperapi'
+TIERS = (TIER_LOCAL, TIER_FIRECRAWL, TIER_SCRAPERAPI)
+
+# Pages de challenge / blocage servies avec un statut 200
+CHALLENGE_PATTERNS = re.compile(
+    r'(enable javascript|activer javascript|javascript is (disabled|required)|just a moment|'
+    r'checking your browser|captcha|access denied|accès refusé|are you a robot|verify you are human|'
+    r'cloudflare|datadome|request unsuccessful)',
+    re.IGNORECASE
+)
+
+
+def judge_content(text: str, min_chars: int) -> Tuple[bool, str]:
+    """
+    Juge si un contenu extrait est exploitable pour l'analyse.
+
+    Returns:
+        (acceptable, raison du rejet ou 'ok')
+    """
+    stripped = (text or '').strip()
+
+    if len(stripped) < min_chars:
+        return False, f"too short ({len(stripped)} chars)"
+
+    # Page de challenge: le motif apparaît dans un texte court (pas dans un long article qui en parle)
+    if len(stripped) < 3000 and CHALLENGE_PATTERNS.search(stripped):
+        return False, "anti-bot challenge page"
+
+    # Coquille JS / liste de liens: peu de lignes longues
+    lines = [line for line in stripped.split('\n') if line.strip()]
+    substantive = [line for line in lines if len(line) > 80]
+    if lines and len(substantive) < 3:
+        return False, "no substantive paragraph"
+
+    return True, "ok"
+
+
+class LocalFetcher:
+    """GET direct via le pool keep-alive 'fetcher' + extraction texte (BeautifulSoup)"""
+
+    def __init__(self):
+        self.max_bytes = int(os.getenv('FETCH_LOCAL_MAX_BYTES', '3000000'))
+
+    def fetch(self, url: str) -> Optional[str]:
+        try:
+            # Seul tier qui frappe le site directement: limite par host partagée avec la validation
+            with get_host_limiter().slot(url):
+                response = get_http_client().get(
+                    url,
+                    provider='fetcher',
+                    headers=get_realistic_headers(),
+                    allow_redirects=True
+                )
+
+            if response.status_code != 200:
+                print(f"[Local] ✗ {url} returned {response.status_code}")
+                return None
+
+            content_type = response.headers.get('Content-Type', '').lower()
+            if 'html' not in content_type:
+                print(f"[Local] ✗ {url} - not HTML: {content_type}")
+                return None
+
+            if len(response.content) > self.max_bytes:
+                print(f"[Local] ✗ {url} - too large: {len(response.content) / 1_000_000:.1f}MB")
+                return None
+
+            return clean_scraped_html(response.text, url)
+
+        except Exception as e:
+            print(f"[Local] ✗ {url} error: {str(e)[:50]}")
+            return None
+
+
+class TierStats:
+    """Taux de succès et latence par tier (process)"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict] = {
+            tier: {'attempts': 0, 'hits': 0, 'total_latency': 0.0}
+            for tier in TIERS
+        }
+        self._lock = threading.Lock()
+
+    def record(self, tier: str, hit: bool, latency_ms: int):
+        with self._lock:
+            stats = self._stats[tier]
+            stats['attempts'] += 1
+            stats['total_latency'] += latency_ms / 1000
+            if hit:
+                stats['hits'] += 1
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                tier: {
+                    'attempts': stats['attempts'],
+                    'hits': stats['hits'],
+                    'hit_rate': round(stats['hits'] / stats['attempts'], 3) if stats['attempts'] else 0.0,
+                    'avg_latency_ms': round(stats['total_latency'] / stats['attempts'] * 1000) if stats['attempts'] else 0
+                }
+                for tier, stats in self._stats.items()
+            }
@@ -0,0 +1,214 @@
+"""
+Firecrawl client layer.
+
+- Requests only the markdown format (the HTML was never read downstream)
+- Submits URL batches through the batch scrape API, polls the job and
+  reports each page as soon as it appears (on_result callback)
+- Maps every URL to a result or a typed error, so the caller can decide on
+  the ScraperAPI fallback per URL ('blocked' → fallback, 'rate_limit' → retry later...)
+- Goes through the 'firecrawl' circuit breaker: only provider-side failures (timeouts,
+  rate limits, API errors) count, not pages blocked by the target site
+"""
+
+import os
+import time
+from typing import List, Dict, Optional, Callable, NamedTuple
+from firecrawl import Firecrawl
+from app.utils.url_canonicalizer import url_dedup_key
+from app.utils.circuit_breaker import get_circuit_breaker
+
+# Types d'erreur par URL
+ERROR_BLOCKED = 'blocked'        # 401/403, anti-bot, robots.txt → fallback ScraperAPI
+ERROR_RATE_LIMIT = 'rate_limit'  # 429 Firecrawl
+ERROR_TIMEOUT = 'timeout'        # Page non rendue avant le délai
+ERROR_EMPTY = 'empty'            # Réponse sans markdown
+ERROR_OTHER = 'error'
+ERROR_CIRCUIT_OPEN = 'circuit_open'  # Firecrawl dégradé: appel non tenté
+
+# Erreurs imputables à Firecrawl lui-même (comptées par le circuit breaker)
+PROVIDER_ERROR_TYPES = (ERROR_RATE_LIMIT, ERROR_TIMEOUT, ERROR_OTHER)
+
+
+class FirecrawlResult(NamedTuple):
+    """Résultat Firecrawl pour une URL (markdown ou erreur typée)"""
+    url: str
+    markdown: Optional[str] = None
+    error_type: Optional[str] = None
+    error: Optional[str] = None
+    latency_ms: int = 0
+
+    @property
+    def success(self) -> bool:
+        return self.error_type is None
+
+
+def classify_error(message: str, status_code: Optional[int] = None) -> str:
+    """Type d'erreur à partir du statut HTTP de la page et/ou du message Firecrawl"""
+    message = (message or '').lower()
+
+    if status_code in (401, 403) or '403' in message or 'forbidden' in message or 'blocked' in message or 'robots' in message:
+        return ERROR_BLOCKED
+    if status_code == 429 or 'rate limit' in message or '429' in message:
+        return ERROR_RATE_LIMIT
+    if 'timeout' in message or 'timed out' in message:
+        return ERROR_TIMEOUT
+
+    return ERROR_OTHER
+
+
+class FirecrawlClient:
+    def __init__(self, api_key: str, timeout_seconds: int):
+        self.firecrawl = Firecrawl(api_key=api_key)
+        self.timeout_seconds = timeout_seconds
+        self.poll_interval = float(os.getenv('FIRECRAWL_POLL_INTERVAL_SECONDS', '1'))
+        self.breaker = get_circuit_breaker('firecrawl')
+
+    def _document_result(self, url: str, document, latency_ms: int) -> FirecrawlResult:
+        metadata = getattr(document, 'metadata', None)
+        status_code = getattr(metadata, 'status_code', None)
+        page_error = getattr(metadata, 'error', None)
+
+        if status_code and status_code >= 400:
+            return FirecrawlResult(url, error_type=classify_error(page_error or '', status_code),
+                                   error=page_error or f"HTTP {status_code}", latency_ms=latency_ms)
+
+        if not document.markdown:
+            return FirecrawlResult(url, error_type=ERROR_EMPTY, error="Empty result", latency_ms=latency_ms)
+
+        return FirecrawlResult(url, markdown=document.markdown, latency_ms=latency_ms)
+
+    def scrape(self, url: str) -> FirecrawlResult:
+        if not self.breaker.allow():
+            return FirecrawlResult(url, error_type=ERROR_CIRCUIT_OPEN, error="Firecrawl circuit open")
+
+        start_time = time.time()
+
+        try:
+            document = self.firecrawl.scrape(
+                url,
+                formats=['markdown'],
+                timeout=self.timeout_seconds * 1000  # Firecrawl attend ms
+            )
+            result = self._document_result(url, document, round((time.time() - start_time) * 1000))
+            self.breaker.record(True, time.time() - start_time)
+            return result
+
+        except Exception as e:
+            error_type = classify_error(str(e))
+            self.breaker.record(error_type not in PROVIDER_ERROR_TYPES, time.time() - start_time)
+            return FirecrawlResult(url, error_type=error_type, error=str(e),
+                                   latency_ms=round((time.time() - start_time) * 1000))
+
+    def batch_scrape(self, urls: List[str], on_result: Optional[Callable[[FirecrawlResult], None]] = None,
+                     stop_when: Optional[Callable[[], bool]] = None) -> Dict[str, FirecrawlResult]:
+        """
+        Scrape un lot d'URLs via un seul job batch Firecrawl.
+        on_result est appelé dès qu'une page est disponible (pendant le polling).
+        stop_when (ex: toutes les pages servies par un hedge) interrompt le polling et annule le job.
+        Lève une exception si le job ne peut pas être créé (l'appelant repasse en scraping unitaire),
+        CircuitOpenError si le circuit Firecrawl est ouvert.
+
+        Returns:
+            {url: FirecrawlResult} pour chaque URL soumise
+        """
+        start_time = time.time()
+        results: Dict[str, FirecrawlResult] = {}
+        key_to_url = {url_dedup_key(url): url for url in urls}
+
+        def emit(result: FirecrawlResult):
+            if result.url in results:
+                return
+            results[result.url] = result
+            if on_result:
+                on_result(result)
+
+        self.breaker.check()
+        try:
+            job = self.firecrawl.start_batch_scrape(
+                urls,
+                formats=['markdown'],
+                timeout=self.timeout_seconds * 1000,
+                ignore_invalid_urls=True
+            )
+        except Exception:
+            self.breaker.record(False, time.time() - start_time)
+            raise
+
+        for invalid_url in job.invalid_urls or []:
+            url = key_to_url.get(url_dedup_key(invalid_url), invalid_url)
+            emit(FirecrawlResult(url, error_type=ERROR_OTHER, error="Invalid URL"))
+
+        print(f"[Firecrawl] 🚀 Batch job {job.id}: {len(urls)} URL(s)")
+
+        # Délai global: timeout par page + marge de mise en file
+        deadline = start_time + self.timeout_seconds + 15
+        status = None
+        stopped = False
+
+        while time.time() < deadline:
+            try:
+                status = self.firecrawl.get_batch_scrape_status(job.id)
+            except Exception:
+                self.breaker.record(False, time.time() - start_time)
+                raise
+            latency_ms = round((time.time() - start_time) * 1000)
+
+            for document in status.data or []:
+                metadata = getattr(document, 'metadata', None)
+                source_url = getattr(metadata, 'source_url', None) or getattr(metadata, 'url', None)
+                url = key_to_url.get(url_dedup_key(source_url or ''))
+                if url:
+                    emit(self._document_result(url, document, latency_ms))
+
+            if status.status in ('completed', 'failed', 'cancelled') or len(results) >= len(urls):
+                break
+
+            if stop_when and stop_when():
+                stopped = True
+                break
+
+            time.sleep(self.poll_interval)
+
+        latency_ms = round((time.time() - start_time) * 1000)
+
+        if stopped:
+            try:
+                self.firecrawl.cancel_batch_scrape(job.id)
+            except Exception:
+                pass
+
+            for url in urls:
+                emit(FirecrawlResult(url, error_type=ERROR_OTHER, error="Cancelled (served by another provider)", latency_ms=latency_ms))
+
+        elif len(results) < len(urls):
+            if status is None or status.status not in ('completed', 'failed', 'cancelled'):
+                try:
+                    self.firecrawl.cancel_batch_scrape(job.id)
+                except Exception:
+                    pass
+
+            # Erreurs par URL (403, robots.txt...) pour les pages manquantes
+            try:
+                errors = self.firecrawl.get_batch_scrape_errors(job.id)
+                for blocked_url in errors.robots_blocked:
+                    url = key_to_url.get(url_dedup_key(blocked_url))
+                    if url:
+                        emit(FirecrawlResult(url, error_type=ERROR_BLOCKED, error="Blocked by robots.txt", latency_ms=latency_ms))
+                for error in errors.errors:
+                    url = key_to_url.get(url_dedup_key(error.url))
+                    if url:
+                        emit(FirecrawlResult(url, error_type=classify_error(f"{error.code or ''} {error.error}"), error=error.error, latency_ms=latency_ms))
+            except Exception as e:
+                print(f"[Firecrawl] ⚠ Could not fetch batch errors: {e}")
+
+            for url in urls:
+                emit(FirecrawlResult(url, error_type=ERROR_TIMEOUT, error="No result before batch deadline", latency_ms=latency_ms))
+
+        # Un job compte comme un appel (durée non comparable au seuil par page):
+        # échec s'il n'a rendu aucune page avant le délai
+        succeeded = sum(1 for result in results.values() if result.success)
+        job_ok = stopped or (status is not None and status.status == 'completed') or succeeded > 0
+        self.breaker.record(job_ok, 0)
+        print(f"[Firecrawl] ⚡ Batch job {job.id}: {succeeded}/{len(urls)} OK en {latency_ms / 1000:.1f}s")
+
+        return results
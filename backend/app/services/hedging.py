@@ -0,0 +1,79 @@
+"""
+Hedged requests Firecrawl / ScraperAPI.
+
+Quand Firecrawl dépasse un percentile élevé de sa latence observée (p90 par défaut),
+une requête ScraperAPI est lancée en parallèle: le premier contenu exploitable gagne,
+l'autre requête est abandonnée. Le nombre de requêtes doublées est plafonné à un
+pourcentage des requêtes Firecrawl (budget), pour maîtriser le coût ScraperAPI.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Dict
+
+
+class Hedger:
+    def __init__(self):
+        self.enabled = os.getenv('SCRAPE_HEDGING_ENABLED', 'false').lower() == 'true'
+        self.percentile = float(os.getenv('HEDGE_LATENCY_PERCENTILE', '90'))
+        self.budget_percent = float(os.getenv('HEDGE_BUDGET_PERCENT', '10'))
+        self.min_samples = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+        # Délai avant hedge tant que l'historique de latence est insuffisant
+        self.default_delay = float(os.getenv('HEDGE_DEFAULT_DELAY_SECONDS', '15'))
+
+        self._latencies = deque(maxlen=200)
+        self._requests = 0
+        self._hedged = 0
+        self._wins = 0
+        self._lock = threading.Lock()
+
+        if self.enabled:
+            print(f"[Hedging] Config: hedge after p{self.percentile:.0f} Firecrawl latency, budget {self.budget_percent}% of requests")
+
+    def record_latency(self, latency_ms: int):
+        with self._lock:
+            self._latencies.append(latency_ms)
+
+    def register_request(self, count: int = 1):
+        """Requêtes Firecrawl servant de base au budget"""
+        with self._lock:
+            self._requests += count
+
+    def get_delay(self) -> float:
+        """Délai (s) après lequel une requête Firecrawl encore en cours est doublée"""
+        with self._lock:
+            samples = sorted(self._latencies)
+
+        if len(samples) < self.min_samples:
+            return self.default_delay
+
+        index = min(len(samples) - 1, int(round(self.percentile / 100 * (len(samples) - 1))))
+        return samples[index] / 1000
+
+    def try_acquire(self) -> bool:
+        """Réserve un hedge si le budget (pourcentage des requêtes) le permet"""
+        with self._lock:
+            if self._hedged + 1 > self._requests * self.budget_percent / 100:
+                return False
+            self._hedged += 1
+            return True
+
+    def record_win(self):
+        """Le hedge ScraperAPI a fourni le contenu avant Firecrawl"""
+        with self._lock:
+            self._wins += 1
+
+    def get_metrics(self) -> Dict:
+        delay = self.get_delay()
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'requests': self._requests,
+                'hedged': self._hedged,
+                'hedge_wins': self._wins,
+                'hedge_rate': round(self._hedged / self._requests, 3) if self._requests else 0.0,
+                'budget_percent': self.budget_percent,
+                'current_delay_seconds': round(delay, 2),
+                'latency_samples': len(self._latencies)
+            }
@@ -1,25 +1,54 @@
 import os
+import copy
 import json
-from typing import Dict, List, Optional
+import time
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Iterator, Tuple, Any
 from pathlib import Path
 from jinja2 import Template
-from openai import OpenAI
 
 # v3.1: Import content cleaning utilities
 from app.utils.content_cleaner import (
     clean_scraped_html,
-    parse_linkedin_posts,
-    estimate_token_count
+    parse_linkedin_posts
 )
+from app.utils.token_budget import TokenBudget, PromptBlock, count_tokens
+from app.utils.circuit_breaker import get_circuit_breaker
+from app.utils.json_stream import IncrementalJsonObjectParser
+from app.utils.passage_ranker import PassageRanker, Passage, select_passages, join_passages
+from app.utils.near_duplicates import find_near_duplicates
+from app.utils.llm_usage import get_llm_usage_stats, usage_to_dict, add_usage, format_usage
+from app.utils.llm_gateway import get_llm_gateway
+from app.services.section_groups import (
+    SECTION_GROUPS,
+    CONSOLIDATION_GROUP,
+    SectionGroup,
+    build_group_prompt,
+    get_group_prompt_data,
+    get_schema_order,
+    get_section_group
+)
+from app.services.model_router import ModelRouter
+from app.services.profile_validation import find_invalid_sections, validate_section, format_repair_context
+
+# Templates (analyse, données) relus pour une ré-analyse: propres au contexte appelant,
+# les templates partagés du service ne sont jamais remplacés en cours de route
+_prompt_templates = contextvars.ContextVar('prompt_templates', default=None)
+
 
 class LLMService:
     def __init__(self):
-        self.api_key = os.getenv('OPENAI_API_KEY')
-        self.client = None
-        if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+        # Client OpenAI partagé du process: concurrence, budget TPM, priorités, backoff 429
+        self.gateway = get_llm_gateway()
+        self.client = self.gateway.client
 
-        self.prompt_template = self._load_prompt_template()
+        self.breaker = get_circuit_breaker('openai')
+        self.usage_stats = get_llm_usage_stats()
+        self.router = ModelRouter()
+        self.prompt_template, self.data_template = self._load_prompt_templates()
 
     def _clean_pappers_data(self, pappers_data: Dict) -> Optional[Dict]:
         """
@@ -60,30 +89,28 @@ class LLMService:
                     'procedures_collectives': econ.get('procedures_collectives', []),
                     'date_radiation_rcs': econ.get('date_radiation_rcs'),
 
-                    # Comptes (historique financier 5 ans)
-                    'comptes': econ.get('comptes', [])[:5],  # 5 derniers exercices
-
-                    # BODACC
-                    'annonces_bodacc': econ.get('annonces_bodacc', [])[:10],
+                    # Comptes (historique financier) et BODACC: réduits par _fit_pappers_data selon le budget
+                    'comptes': econ.get('comptes', []),
+                    'annonces_bodacc': econ.get('annonces_bodacc', []),
                 }
 
                 # v3.1: Champs premium (si disponibles)
                 if 'entreprises_dirigees' in econ and econ['entreprises_dirigees']:
-                    company_clean['economic']['entreprises_dirigees'] = list(econ['entreprises_dirigees'])[:10]
+                    company_clean['economic']['entreprises_dirigees'] = list(econ['entreprises_dirigees'])
 
                 if 'observations' in econ and econ['observations']:
-                    company_clean['economic']['observations'] = list(econ['observations'])[:10]
+                    company_clean['economic']['observations'] = list(econ['observations'])
 
                 if 'decisions' in econ and econ['decisions']:
-                    company_clean['economic']['decisions'] = list(econ['decisions'])[:5]  # Décisions de justice
+                    company_clean['economic']['decisions'] = list(econ['decisions'])  # Décisions de justice
 
                 if 'parcelles_detenues' in econ and econ['parcelles_detenues']:
                     parcelles_data = econ['parcelles_detenues']
                     # Pappers retourne {'resultats': [], 'total': N, 'incomplet': bool}
                     if isinstance(parcelles_data, dict) and 'resultats' in parcelles_data:
-                        company_clean['economic']['parcelles_detenues'] = parcelles_data.get('resultats', [])[:10]
+                        company_clean['economic']['parcelles_detenues'] = parcelles_data.get('resultats', [])
                     else:
-                        company_clean['economic']['parcelles_detenues'] = list(parcelles_data)[:10]
+                        company_clean['economic']['parcelles_detenues'] = list(parcelles_data)
 
             cleaned['companies'].append(company_clean)
 
@@ -92,12 +119,40 @@ class LLMService:
             bodacc = pappers_data['bodacc_person']
             cleaned['bodacc_person'] = {
                 'total': bodacc.get('total', 0),
-                'publications': bodacc.get('publications', [])[:10],  # 10 premières
+                'publications': bodacc.get('publications', []),
                 'types': bodacc.get('types', {})
             }
 
         return cleaned
 
+    def _fit_pappers_data(self, pappers_cleaned: Dict, max_tokens: int, model: str) -> str:
+        """
+        Sérialise les données Pappers dans max_tokens: la plus longue liste (comptes, BODACC,
+        observations...) est divisée par deux jusqu'à tenir. Les premiers éléments (les plus
+        récents chez Pappers) sont conservés; le JSON reste valide (pas de troncature brute).
+        """
+        pappers_cleaned = copy.deepcopy(pappers_cleaned)  # Les listes viennent des données Pappers en cache
+
+        def lists(node):
+            if isinstance(node, dict):
+                for value in node.values():
+                    yield from lists(value)
+            elif isinstance(node, list):
+                yield node
+                for value in node:
+                    yield from lists(value)
+
+        while True:
+            formatted = json.dumps(pappers_cleaned, indent=2, ensure_ascii=False)
+            if count_tokens(formatted, model) <= max_tokens:
+                return formatted
+
+            longest = max(lists(pappers_cleaned), key=len, default=None)
+            if not longest or len(longest) <= 1:
+                return formatted
+
+            del longest[(len(longest) + 1) // 2:]
+
     def _clean_dvf_data(self, dvf_data: Dict) -> Optional[Dict]:
         """Nettoie les données DVF (déjà minimal normalement)"""
         if not dvf_data:
@@ -121,6 +176,107 @@ class LLMService:
             'full_name': hatvp_data.get('full_name')
         }
 
+    def _chat_completion(self, usage_kind: str = 'other', **kwargs):
+        """
+        chat.completions.create via la passerelle LLM partagée (file d'attente, circuit breaker,
+        backoff 429). L'usage (dont les tokens servis par le cache de prompt) est cumulé sous
+        usage_kind, y compris en streaming (dernier chunk, stream_options include_usage).
+        """
+        return self.gateway.chat_completion(usage_kind=usage_kind, **kwargs)
+
+    LINKEDIN_SUMMARY_PROMPT = "Tu es un assistant d'analyse de contenu LinkedIn. Résume le post en identifiant les thématiques et signaux d'expertise. Réponds en JSON avec: {\"summary\": \"...\", \"themes\": [...], \"expertise_signals\": \"...\"}. Sois concis (max 2 phrases)."
+
+    LINKEDIN_BATCH_PROMPT = "Tu es un assistant d'analyse de contenu LinkedIn. Pour CHAQUE post numéroté, résume-le en identifiant les thématiques et signaux d'expertise. Sois concis (max 2 phrases par post). Réponds en JSON: {\"posts\": [{\"index\": n, \"summary\": \"...\", \"themes\": [...], \"expertise_signals\": \"...\"}]}"
+
+    # Structured output: un résumé par post, repéré par son index
+    LINKEDIN_BATCH_SCHEMA = {
+        "name": "linkedin_post_summaries",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "posts": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "index": {"type": "integer"},
+                            "summary": {"type": "string"},
+                            "themes": {"type": "array", "items": {"type": "string"}},
+                            "expertise_signals": {"type": "string"}
+                        },
+                        "required": ["index", "summary", "themes", "expertise_signals"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["posts"],
+            "additionalProperties": False
+        }
+    }
+
+    @staticmethod
+    def _post_summary(post: Dict, result: Optional[Dict] = None) -> Dict:
+        """Résumé d'un post (ou post brut tronqué si le résumé a échoué)"""
+        if result is None:
+            return {
+                'content_summary': post['content'][:200],
+                'themes': [],
+                'expertise_signals': '',
+                'date': post.get('date'),
+                'engagement': post.get('engagement')
+            }
+
+        return {
+            'content_summary': result.get('summary', ''),
+            'themes': result.get('themes', []),
+            'expertise_signals': result.get('expertise_signals', ''),
+            'date': post.get('date'),
+            'engagement': post.get('engagement')
+        }
+
+    def _summarize_posts_batch(self, posts: List[Dict]) -> Dict[int, Dict]:
+        """Un seul appel GPT-4o-mini pour tous les posts: {index: résultat}"""
+        numbered = "\n\n".join(
+            f"[Post {index}]\n{post['content'][:1000]}"  # Limit input
+            for index, post in enumerate(posts)
+        )
+
+        response = self._chat_completion(
+            usage_kind='linkedin_summary',
+            model="gpt-4o-mini",  # 16x cheaper than gpt-4o
+            messages=[
+                {"role": "system", "content": self.LINKEDIN_BATCH_PROMPT},
+                {"role": "user", "content": f"Posts LinkedIn:\n\n{numbered}"}
+            ],
+            temperature=0.3,
+            max_tokens=150 * len(posts) + 100,  # Short summaries
+            response_format={"type": "json_schema", "json_schema": self.LINKEDIN_BATCH_SCHEMA}
+        )
+
+        result = json.loads(response.choices[0].message.content)
+        return {
+            item['index']: item
+            for item in result.get('posts', [])
+            if isinstance(item.get('index'), int) and 0 <= item['index'] < len(posts)
+        }
+
+    def _summarize_post(self, post: Dict) -> Dict:
+        """Un appel GPT-4o-mini pour un post"""
+        response = self._chat_completion(
+            usage_kind='linkedin_summary',
+            model="gpt-4o-mini",  # 16x cheaper than gpt-4o
+            messages=[
+                {"role": "system", "content": self.LINKEDIN_SUMMARY_PROMPT},
+                {"role": "user", "content": f"Post LinkedIn:\n{post['content'][:1000]}"}  # Limit input
+            ],
+            temperature=0.3,
+            max_tokens=150,  # Short summary
+            response_format={"type": "json_object"}
+        )
+
+        return json.loads(response.choices[0].message.content)
+
     def _summarize_linkedin_posts(self, posts: List[Dict]) -> List[Dict]:
         """
         Pré-résume les posts LinkedIn avec GPT-4o-mini pour économiser des tokens.
@@ -129,60 +285,56 @@ class LLMService:
         Coût: $0.15/1M tokens (16x moins cher que GPT-4o)
         Réduction: ~80% des tokens
 
+        Mode 'batch' (défaut): un seul appel structuré pour tous les posts. Les posts absents
+        de la réponse (ou tous, si l'appel échoue) sont résumés un par un, en parallèle
+        (pool borné). Un post en échec retombe seul sur son contenu brut.
+
         Args:
             posts: Liste de posts parsés (avec content, date, engagement)
 
         Returns:
-            Liste de posts résumés (avec content_summary, themes, expertise_signals)
+            Liste de posts résumés (avec content_summary, themes, expertise_signals), dans l'ordre d'origine
         """
         if not posts or not self.client:
             return []
 
-        summarized_posts = []
-
-        try:
-            for post in posts[:10]:  # Max 10 posts
-                if not post.get('content') or len(post['content']) < 50:
-                    continue
-
-                # Résumer avec GPT-4o-mini (cheap & fast)
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",  # 16x cheaper than gpt-4o
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "Tu es un assistant d'analyse de contenu LinkedIn. Résume le post en identifiant les thématiques et signaux d'expertise. Réponds en JSON avec: {\"summary\": \"...\", \"themes\": [...], \"expertise_signals\": \"...\"}. Sois concis (max 2 phrases)."
-                        },
-                        {
-                            "role": "user",
-                            "content": f"Post LinkedIn:\n{post['content'][:1000]}"  # Limit input
-                        }
-                    ],
-                    temperature=0.3,
-                    max_tokens=150,  # Short summary
-                    response_format={"type": "json_object"}
-                )
-
-                result = json.loads(response.choices[0].message.content)
-
-                summarized_posts.append({
-                    'content_summary': result.get('summary', ''),
-                    'themes': result.get('themes', []),
-                    'expertise_signals': result.get('expertise_signals', ''),
-                    'date': post.get('date'),
-                    'engagement': post.get('engagement')
-                })
-
-                print(f"[LLM] Post résumé: {len(post['content'])} chars → {len(result.get('summary', ''))} chars")
-
-        except Exception as e:
-            print(f"[LLM] Erreur résumé posts: {e}")
-            # Fallback: retourner posts bruts (sans résumé)
-            return [{'content_summary': p['content'][:200], 'themes': [], 'expertise_signals': ''} for p in posts[:5]]
+        posts = [post for post in posts[:10] if post.get('content') and len(post['content']) >= 50]  # Max 10 posts
+        if not posts:
+            return []
 
+        if self.breaker.is_open():
+            # OpenAI indisponible: posts bruts (sans résumé) plutôt que d'attendre les timeouts
+            print("[LLM] ⚠ OpenAI circuit open, skipping LinkedIn post summaries")
+            return [self._post_summary(post) for post in posts[:5]]
+
+        start_time = time.time()
+        results: Dict[int, Dict] = {}
+
+        if os.getenv('LINKEDIN_SUMMARY_MODE', 'batch').lower() == 'batch':
+            try:
+                results = self._summarize_posts_batch(posts)
+            except Exception as e:
+                print(f"[LLM] ⚠ Résumé batch des posts en échec, repli post par post: {e}")
+
+        missing = [index for index in range(len(posts)) if index not in results]
+        if missing:
+            concurrency = int(os.getenv('LINKEDIN_SUMMARY_CONCURRENCY', '5'))
+            with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(missing)))) as executor:
+                futures = {executor.submit(contextvars.copy_context().run, self._summarize_post, posts[index]): index for index in missing}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        # Isolation: seul ce post reste brut
+                        print(f"[LLM] ✗ Erreur résumé post {index}: {e}")
+
+        summarized_posts = [self._post_summary(post, results.get(index)) for index, post in enumerate(posts)]
+
+        print(f"[LLM] {len(results)}/{len(posts)} posts résumés en {time.time() - start_time:.1f}s ({len(posts) - len(missing)} en batch)")
         return summarized_posts
 
-    def _clean_and_process_scraped_data(self, scraped_data: List[Dict]) -> tuple[str, List[Dict]]:
+    def _clean_and_process_scraped_data(self, scraped_data: List[Dict]) -> tuple[List[Dict], List[Dict]]:
         """
         Nettoie et traite les données scrapées pour réduire les tokens.
 
@@ -197,9 +349,11 @@ class LLMService:
             scraped_data: Données brutes de Firecrawl
 
         Returns:
-            (content_summary: str, linkedin_posts_summarized: List[Dict])
+            (cleaned_items: [{source, url, content}], linkedin_posts_summarized: List[Dict])
+            La longueur du contenu n'est pas limitée ici: le budget de tokens est appliqué au packing.
         """
         cleaned_items = []
+        model = self.get_model_name()
         all_linkedin_posts = []
 
         print(f"[LLM] Nettoyage de {len(scraped_data)} pages scrapées...")
@@ -212,8 +366,8 @@ class LLMService:
             cleaned_content = clean_scraped_html(raw_content, url)
 
             # Estimer réduction
-            tokens_before = estimate_token_count(raw_content)
-            tokens_after = estimate_token_count(cleaned_content)
+            tokens_before = count_tokens(raw_content, model)
+            tokens_after = count_tokens(cleaned_content, model)
             reduction = ((tokens_before - tokens_after) / tokens_before * 100) if tokens_before > 0 else 0
 
             print(f"[LLM] {url[:50]}... : {tokens_before} → {tokens_after} tokens (-{reduction:.0f}%)")
@@ -225,30 +379,22 @@ class LLMService:
                     all_linkedin_posts.extend(posts)
                     print(f"[LLM] {len(posts)} posts LinkedIn extraits de {url}")
 
-            # Limiter contenu nettoyé (max 2000 chars par page)
             cleaned_items.append({
                 'source': item.get('source', 'unknown'),
                 'url': url,
-                'content': cleaned_content[:2000]
+                'content': cleaned_content
             })
 
-        # Assembler résumé du contenu
-        content_summary = "\n\n".join([
-            f"Source: {item['source']}\nURL: {item['url']}\n{item['content']}"
-            for item in cleaned_items
-        ])
-
         # Résumer les posts LinkedIn avec GPT-4o-mini
         linkedin_posts_summarized = []
         if all_linkedin_posts:
             print(f"[LLM] Résumé de {len(all_linkedin_posts)} posts LinkedIn avec GPT-4o-mini...")
             linkedin_posts_summarized = self._summarize_linkedin_posts(all_linkedin_posts)
 
-        return content_summary, linkedin_posts_summarized
+        return cleaned_items, linkedin_posts_summarized
 
-    def _load_prompt_template(self) -> Template:
-        # Utiliser le nouveau prompt Due Diligence
-        template_path = Path(__file__).parent.parent / 'templates' / 'prompts' / 'due_diligence_analysis.txt'
+    def _load_template(self, filename: str) -> Template:
+        template_path = Path(__file__).parent.parent / 'templates' / 'prompts' / filename
 
         if not template_path.exists():
             raise FileNotFoundError(f"Prompt template not found: {template_path}")
@@ -258,44 +404,274 @@ class LLMService:
 
         return Template(template_content)
 
+    def _load_prompt_templates(self) -> Tuple[Template, Template]:
+        """
+        Prompt Due Diligence en deux parties:
+        - due_diligence_analysis.txt: instructions + schéma, identiques d'une analyse à l'autre
+          (préfixe mis en cache par OpenAI)
+        - due_diligence_data.txt: personne analysée et sources, envoyées en dernier
+        """
+        return self._load_template('due_diligence_analysis.txt'), self._load_template('due_diligence_data.txt')
+
+    def load_prompt_templates(self) -> Tuple[Template, Template]:
+        """Relit les templates depuis le disque (ré-analyse après modification du prompt)"""
+        templates = self._load_prompt_templates()
+        print("[LLM] Prompt template reloaded")
+        return templates
+
+    @contextmanager
+    def prompt_templates(self, templates: Optional[Tuple[Template, Template]]):
+        """Templates utilisés par les analyses faites dans ce contexte (à la place de ceux chargés au démarrage)"""
+        token = _prompt_templates.set(templates)
+        try:
+            yield
+        finally:
+            _prompt_templates.reset(token)
+
+    def _get_prompt_templates(self) -> Tuple[Template, Template]:
+        return _prompt_templates.get() or (self.prompt_template, self.data_template)
+
+    def get_model_name(self) -> str:
+        return os.getenv('OPENAI_MODEL', "gpt-4o")
+
+    def get_prompt_layout(self) -> str:
+        """
+        Place du préfixe statique: 'system' (dans le message system, après ANALYSIS_SYSTEM_PROMPT)
+        ou 'user' (en tête du message user). Dans les deux cas il précède les données.
+        """
+        return os.getenv('LLM_PROMPT_LAYOUT', 'system').lower()
+
+    def get_analysis_mode(self) -> str:
+        """'single' (un appel, 21 sections) ou 'parallel' (groupes de sections + consolidation)"""
+        return os.getenv('LLM_ANALYSIS_MODE', 'single').lower()
+
+    def _merge_duplicate_pages(self, content_items: List[Dict], model: str) -> Tuple[List[Dict], Dict]:
+        """
+        Fusionne les pages quasi identiques (communiqués repris, miroirs d'annuaires):
+        la version la plus longue est gardée, les URLs des copies sont citées avec elle ('also_urls').
+        """
+        threshold = float(os.getenv('DEDUP_PAGE_THRESHOLD', '0.8'))
+        order = sorted(range(len(content_items)), key=lambda index: -len(content_items[index]['content']))
+        canonical = find_near_duplicates([content_items[index]['content'] for index in order], threshold)
+
+        also_urls = defaultdict(list)
+        merged = set()
+        tokens_saved = 0
+        for position, index in enumerate(order):
+            keeper = order[canonical[position]]
+            if keeper != index:
+                merged.add(index)
+                also_urls[keeper].append(content_items[index]['url'])
+                tokens_saved += count_tokens(content_items[index]['content'], model)
+
+        kept = [
+            {**item, 'also_urls': also_urls.get(index, [])}
+            for index, item in enumerate(content_items)
+            if index not in merged
+        ]
+        return kept, {'pages_merged': len(merged), 'tokens_saved': tokens_saved}
+
+    def _drop_duplicate_passages(self, ranked_pages: List[List[Passage]], urls: List[str], model: str) -> Tuple[List[List[Passage]], Dict]:
+        """
+        Supprime les passages répétés (entre pages ou dans une même page): le mieux classé est gardé
+        et mentionne les autres pages où il apparaît.
+        """
+        threshold = float(os.getenv('DEDUP_PASSAGE_THRESHOLD', '0.8'))
+        refs = sorted(
+            ((page_index, passage) for page_index, passages in enumerate(ranked_pages) for passage in passages),
+            key=lambda ref: (-ref[1].score, ref[0], ref[1].position)
+        )
+        canonical = find_near_duplicates([passage.text for _, passage in refs], threshold)
+
+        dropped = set()
+        reposted_on = defaultdict(list)
+        tokens_saved = 0
+        for position, (page_index, passage) in enumerate(refs):
+            if canonical[position] == position:
+                continue
+            dropped.add((page_index, passage.position))
+            tokens_saved += count_tokens(passage.text, model)
+
+            keeper_page, keeper = refs[canonical[position]]
+            if keeper_page != page_index and urls[page_index] not in reposted_on[(keeper_page, keeper.position)]:
+                reposted_on[(keeper_page, keeper.position)].append(urls[page_index])
+
+        deduped = []
+        for page_index, passages in enumerate(ranked_pages):
+            page = []
+            for passage in passages:
+                if (page_index, passage.position) in dropped:
+                    continue
+                if reposted_on.get((page_index, passage.position)):
+                    passage = passage._replace(text=f"{passage.text}\n(Repris sur: {', '.join(reposted_on[(page_index, passage.position)])})")
+                page.append(passage)
+            deduped.append(page)
+
+        return deduped, {'passages_dropped': len(dropped), 'tokens_saved': tokens_saved}
+
     # v3.1: Anchor profile logic removed (overkill for current use case)
     # Direct analysis with GPT-4o handles homonyms naturally with context
 
-    def create_analysis_prompt(self, first_name: str, last_name: str, company: str, scraped_data: List[Dict], pappers_data: Dict = None, dvf_data: Dict = None, hatvp_data: Dict = None, linkedin_urls: List[str] = None) -> str:
+    def _prepare_prompt_data(self, first_name: str, last_name: str, company: str, scraped_data: List[Dict], pappers_data: Dict = None, dvf_data: Dict = None, hatvp_data: Dict = None, linkedin_urls: List[str] = None) -> Dict:
+        """
+        Variables du template: données nettoyées et formatées (posts LinkedIn résumés une seule fois),
+        packées par priorité dans le budget de tokens du modèle:
+        Pappers > HATVP > DVF > posts LinkedIn > meilleur passage de chaque page > autres passages
+        pertinents (score BM25 décroissant) > début des pages sans mention de la personne.
+
+        'token_report' contient les tokens exacts envoyés par section du prompt.
+        """
         # v3.1: Nettoyer et traiter les données scrapées (réduction 60-70% tokens)
-        content_summary, linkedin_posts_summarized = self._clean_and_process_scraped_data(scraped_data)
+        content_items, linkedin_posts_summarized = self._clean_and_process_scraped_data(scraped_data)
+        dedup_enabled = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
 
         pappers_cleaned = self._clean_pappers_data(pappers_data)
         dvf_cleaned = self._clean_dvf_data(dvf_data)
         hatvp_cleaned = self._clean_hatvp_data(hatvp_data)
 
-        pappers_formatted = json.dumps(pappers_cleaned, indent=2, ensure_ascii=False) if pappers_cleaned else None
-        dvf_formatted = json.dumps(dvf_cleaned, indent=2, ensure_ascii=False) if dvf_cleaned else None
-        hatvp_formatted = json.dumps(hatvp_cleaned, indent=2, ensure_ascii=False) if hatvp_cleaned else None
-
-        linkedin_posts_formatted = json.dumps(linkedin_posts_summarized, indent=2, ensure_ascii=False) if linkedin_posts_summarized else None
+        model = self.get_model_name()
+        budget = TokenBudget(model)
         linkedin_urls_formatted = json.dumps(linkedin_urls, indent=2, ensure_ascii=False) if linkedin_urls else None
 
-        total_tokens = estimate_token_count(content_summary)
-        if pappers_formatted:
-            total_tokens += estimate_token_count(pappers_formatted)
-        if linkedin_posts_formatted:
-            total_tokens += estimate_token_count(linkedin_posts_formatted)
-
-        print(f"[LLM] Tokens estimés pour l'analyse: ~{total_tokens} tokens")
-
-        prompt = self.prompt_template.render(
-            first_name=first_name,
-            last_name=last_name,
-            company=company,
-            content_summary=content_summary,
-            pappers_data=pappers_formatted,
-            dvf_data=dvf_formatted,
-            hatvp_data=hatvp_formatted,
-            linkedin_posts=linkedin_posts_formatted,
-            linkedin_urls=linkedin_urls_formatted
+        # Overhead: préfixe statique (instructions + schéma) + gabarit des données vide
+        prompt_template, data_template = self._get_prompt_templates()
+        overhead_tokens = count_tokens(prompt_template.render(), model) + count_tokens(data_template.render(
+            first_name=first_name, last_name=last_name, company=company, content_summary='', linkedin_urls=linkedin_urls_formatted
+        ), model)
+        available = budget.available(overhead_tokens)
+        passages_per_page = int(os.getenv('LLM_PASSAGES_PER_PAGE', '4'))
+
+        blocks = []
+        if pappers_cleaned:
+            # Pappers réduit pour laisser au moins la moitié du budget aux autres sources
+            blocks.append(PromptBlock('pappers', self._fit_pappers_data(pappers_cleaned, available // 2, model), 0, truncatable=False))
+        if hatvp_cleaned:
+            blocks.append(PromptBlock('hatvp', json.dumps(hatvp_cleaned, indent=2, ensure_ascii=False), 1, truncatable=False))
+        if dvf_cleaned:
+            blocks.append(PromptBlock('dvf', json.dumps(dvf_cleaned, indent=2, ensure_ascii=False), 2, truncatable=False))
+
+        posts_start = len(blocks)
+        for post in linkedin_posts_summarized:
+            blocks.append(PromptBlock('linkedin_posts', json.dumps(post, indent=2, ensure_ascii=False), 3, truncatable=False))
+
+        # Pages: passages classés par BM25 (nom, entreprise, fonction), le meilleur de chaque page d'abord
+        pages_start = len(blocks)
+        dedup_report = {'pages_merged': 0, 'passages_dropped': 0, 'tokens_saved': 0}
+        if dedup_enabled:
+            content_items, pages_report = self._merge_duplicate_pages(content_items, model)
+            dedup_report.update(pages_report)
+
+        ranked_pages = PassageRanker(first_name, last_name, company).rank_pages([item['content'] for item in content_items])
+        if dedup_enabled:
+            ranked_pages, passages_report = self._drop_duplicate_passages(ranked_pages, [item['url'] for item in content_items], model)
+            dedup_report['passages_dropped'] = passages_report['passages_dropped']
+            dedup_report['tokens_saved'] += passages_report['tokens_saved']
+            print(f"[LLM] Dédoublonnage: {dedup_report['pages_merged']} page(s) fusionnée(s), {dedup_report['passages_dropped']} passage(s) supprimé(s), -{dedup_report['tokens_saved']} tokens")
+
+        headers = [
+            f"Source: {item['source']}\nURL: {item['url']}\n" + (f"Aussi publié sur: {', '.join(item['also_urls'])}\n" if item.get('also_urls') else '')
+            for item in content_items
+        ]
+        page_refs = []   # (page, passage) par bloc de page
+        secondary = []
+
+        for page_index, passages in enumerate(ranked_pages):
+            selected = select_passages(passages, passages_per_page)
+            if selected:
+                blocks.append(PromptBlock('web_content', headers[page_index] + selected[0].text, 4))
+                page_refs.append((page_index, selected[0]))
+                secondary.extend((page_index, passage) for passage in selected[1:])
+            elif passages:
+                # Personne non mentionnée: début de page en dernier recours (contexte)
+                blocks.append(PromptBlock('web_content', headers[page_index] + passages[0].text, 6))
+                page_refs.append((page_index, passages[0]))
+
+        for page_index, passage in sorted(secondary, key=lambda ref: -ref[1].score):
+            blocks.append(PromptBlock('web_content', passage.text, 5))
+            page_refs.append((page_index, passage))
+
+        packed, token_report = budget.pack(blocks, available)
+        packed_by_section = {block.section: text for block, text in zip(blocks, packed) if block.section in ('pappers', 'hatvp', 'dvf')}
+
+        posts_kept = [post for post, text in zip(linkedin_posts_summarized, packed[posts_start:pages_start]) if text]
+
+        # Passages retenus (éventuellement tronqués) regroupés par page, dans l'ordre de la page
+        # (une page n'est transmise que si son bloc principal, avec l'en-tête Source/URL, a été retenu)
+        kept_by_page: Dict[int, List] = {}
+        for (page_index, passage), block, text in zip(page_refs, blocks[pages_start:], packed[pages_start:]):
+            if not text:
+                continue
+            if block.priority == 5:
+                if page_index in kept_by_page:
+                    kept_by_page[page_index].append(passage._replace(text=text))
+                continue
+            kept_by_page[page_index] = [passage._replace(text=text[len(headers[page_index]):])]
+
+        pages = [headers[page_index] + join_passages(passages) for page_index, passages in sorted(kept_by_page.items())]
+
+        prompt_data = {
+            'first_name': first_name,
+            'last_name': last_name,
+            'company': company,
+            'content_summary': "\n\n".join(pages),
+            'pappers_data': packed_by_section.get('pappers') or None,
+            'dvf_data': packed_by_section.get('dvf') or None,
+            'hatvp_data': packed_by_section.get('hatvp') or None,
+            'linkedin_posts': json.dumps(posts_kept, indent=2, ensure_ascii=False) if posts_kept else None,
+            'linkedin_urls': linkedin_urls_formatted
+        }
+
+        total_tokens = count_tokens(self.create_prompt(prompt_data), model)
+        token_report = {
+            'model': model,
+            'budget': available,
+            'template': overhead_tokens,
+            'sections': token_report,
+            'pages': {'scraped': len(content_items) + dedup_report['pages_merged'], 'sent': len(pages)},
+            'dedup': dedup_report,
+            'total': total_tokens
+        }
+        prompt_data['token_report'] = token_report
+
+        sections_summary = ', '.join(
+            f"{name}={stats['tokens']}" + (f" (-{stats['dropped']})" if stats['dropped'] else '')
+            for name, stats in token_report['sections'].items()
         )
-        return prompt
+        print(f"[LLM] Tokens prompt: {total_tokens} (template {overhead_tokens}, {sections_summary}, budget données {available})")
+
+        return prompt_data
+
+    def create_analysis_prompt(self, first_name: str, last_name: str, company: str, scraped_data: List[Dict], pappers_data: Dict = None, dvf_data: Dict = None, hatvp_data: Dict = None, linkedin_urls: List[str] = None) -> str:
+        prompt_data = self._prepare_prompt_data(first_name, last_name, company, scraped_data, pappers_data, dvf_data, hatvp_data, linkedin_urls)
+        return self.create_prompt(prompt_data)
+
+    def create_prompt(self, prompt_data: Dict, static_prompt: Optional[str] = None) -> str:
+        """Prompt complet: préfixe statique puis données"""
+        prompt_template, data_template = self._get_prompt_templates()
+        if static_prompt is None:
+            static_prompt = prompt_template.render()
+        return f"{static_prompt}\n\n{data_template.render(**prompt_data)}"
+
+    def _build_messages(self, static_prompt: str, prompt_data: Dict) -> List[Dict]:
+        """
+        Messages de l'analyse, partie statique en premier: le cache de prompt OpenAI ne
+        s'applique qu'au préfixe commun à deux requêtes, les données (variables) vont à la fin.
+        """
+        data_prompt = self._get_prompt_templates()[1].render(**prompt_data)
+
+        if self.get_prompt_layout() == 'user':
+            return [
+                {"role": "system", "content": self.ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": f"{static_prompt}\n\n{data_prompt}"}
+            ]
+
+        return [
+            {"role": "system", "content": f"{self.ANALYSIS_SYSTEM_PROMPT}\n\n{static_prompt}"},
+            {"role": "user", "content": data_prompt}
+        ]
+
+    def _log_usage(self, label: str, usage: Dict[str, int]):
+        print(f"[LLM] Usage {label}: {format_usage(usage)}")
 
     def _validate_and_fix_profile(self, profile_data: Dict) -> Dict:
         """
@@ -373,34 +749,312 @@ class LLMService:
 
         return profile_data
 
-    def analyze_profile(self, first_name: str, last_name: str, company: str, scraped_data: List[Dict], pappers_data: Dict = None, dvf_data: Dict = None, hatvp_data: Dict = None, linkedin_urls: List[str] = None) -> Dict:
+    ANALYSIS_SYSTEM_PROMPT = "Tu es un expert en intelligence économique et due diligence. Tu analyses les données légales (Pappers), le patrimoine immobilier (DVF), les personnes politiquement exposées (HATVP) et les données web pour évaluer la crédibilité, solvabilité et personnalité d'une personne. Tu rédiges TOUJOURS EN FRANÇAIS et tu réponds en JSON valide."
+
+    def _check_analysis_inputs(self, scraped_data: List[Dict]):
         if not self.client:
             raise ValueError("OpenAI API key not configured")
 
         if not scraped_data or all(not item.get('success') for item in scraped_data):
             raise ValueError("No valid scraped data available for analysis")
 
+    def analyze_profile(self, first_name: str, last_name: str, company: str, scraped_data: List[Dict], pappers_data: Dict = None, dvf_data: Dict = None, hatvp_data: Dict = None, linkedin_urls: List[str] = None) -> Dict:
+        self._check_analysis_inputs(scraped_data)
+
+        if self.get_analysis_mode() == 'parallel':
+            for event_type, payload in self._analyze_parallel_events(first_name, last_name, company, scraped_data, pappers_data, dvf_data, hatvp_data, linkedin_urls):
+                if event_type == 'profile':
+                    return payload
+
         try:
-            prompt = self.create_analysis_prompt(first_name, last_name, company, scraped_data, pappers_data, dvf_data, hatvp_data, linkedin_urls)
-
-            response = self.client.chat.completions.create(
-                model=os.getenv('OPENAI_MODEL', "gpt-4o"),
-                messages=[
-                    {"role": "system", "content": "Tu es un expert en intelligence économique et due diligence. Tu analyses les données légales (Pappers), le patrimoine immobilier (DVF), les personnes politiquement exposées (HATVP) et les données web pour évaluer la crédibilité, solvabilité et personnalité d'une personne. Tu rédiges TOUJOURS EN FRANÇAIS et tu réponds en JSON valide."},
-                    {"role": "user", "content": prompt}
-                ],
+            prompt_data = self._prepare_prompt_data(first_name, last_name, company, scraped_data, pappers_data, dvf_data, hatvp_data, linkedin_urls)
+            static_prompt = self._get_prompt_templates()[0].render()
+            routing = self.router.route(scraped_data, pappers_data, hatvp_data, prompt_data['token_report'])
+            llm_start = time.time()
+
+            response = self._chat_completion(
+                usage_kind='analysis',
+                model=routing.model,
+                messages=self._build_messages(static_prompt, prompt_data),
                 temperature=0.3,
                 response_format={"type": "json_object"}
             )
 
             result = json.loads(response.choices[0].message.content)
+            usage = usage_to_dict(response.usage)
+            self._log_usage('analyse', usage)
 
             # Valider et corriger automatiquement les erreurs communes
             print("[LLM] Validation et correction post-génération...")
             result = self._validate_and_fix_profile(result)
 
+            # Validation PersonProfileV3: seules les sections en échec sont régénérées
+            repaired, validation, repair_usage = self._repair_sections(static_prompt, prompt_data, result, routing.model)
+            result.update(repaired)
+            add_usage(usage, repair_usage)
+            result['analysis_meta'] = {
+                'mode': 'single',
+                'prompt_tokens': prompt_data['token_report'],
+                'usage': usage,
+                'validation': validation,
+                'routing': self.router.record(routing, time.time() - llm_start, usage)
+            }
+
             return result
 
         except Exception as e:
             print(f"OpenAI API error: {e}")
             raise Exception(f"Failed to analyze profile with OpenAI: {str(e)}")
+
+    def analyze_profile_stream(self, first_name: str, last_name: str, company: str, scraped_data: List[Dict], pappers_data: Dict = None, dvf_data: Dict = None, hatvp_data: Dict = None, linkedin_urls: List[str] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Variante streaming de analyze_profile: chaque section top-level du JSON
+        (risk_assessment, business_ecosystem...) est émise dès qu'elle est complète.
+
+        Yields:
+            ('section', (nom, données corrigées)) pour chaque section, puis ('profile', profil complet)
+        """
+        self._check_analysis_inputs(scraped_data)
+
+        if self.get_analysis_mode() == 'parallel':
+            # Les sections arrivent par groupe, dès qu'un groupe est terminé
+            yield from self._analyze_parallel_events(first_name, last_name, company, scraped_data, pappers_data, dvf_data, hatvp_data, linkedin_urls)
+            return
+
+        try:
+            prompt_data = self._prepare_prompt_data(first_name, last_name, company, scraped_data, pappers_data, dvf_data, hatvp_data, linkedin_urls)
+            static_prompt = self._get_prompt_templates()[0].render()
+            routing = self.router.route(scraped_data, pappers_data, hatvp_data, prompt_data['token_report'])
+            llm_start = time.time()
+
+            stream = self._chat_completion(
+                usage_kind='analysis',
+                model=routing.model,
+                messages=self._build_messages(static_prompt, prompt_data),
+                temperature=0.3,
+                response_format={"type": "json_object"},
+                stream=True,
+                stream_options={"include_usage": True}  # Usage dans le dernier chunk (sans choices)
+            )
+
+            parser = IncrementalJsonObjectParser()
+            start_time = time.time()
+            usage = usage_to_dict(None)
+
+            for chunk in stream:
+                if chunk.usage:
+                    usage = usage_to_dict(chunk.usage)
+
+                if not chunk.choices:
+                    continue
+
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+
+                for name, data in parser.feed(delta):
+                    section = self._validate_and_fix_profile({name: data})
+                    print(f"[LLM] ⚡ Section '{name}' streamed after {time.time() - start_time:.1f}s")
+                    yield 'section', (name, section[name])
+
+            result = json.loads(parser.buffer)
+            self._log_usage('analyse', usage)
+
+            print("[LLM] Validation et correction post-génération...")
+            result = self._validate_and_fix_profile(result)
+
+            repaired, validation, repair_usage = self._repair_sections(static_prompt, prompt_data, result, routing.model)
+            for name, data in repaired.items():
+                result[name] = data
+                yield 'section', (name, data)
+            add_usage(usage, repair_usage)
+
+            result['analysis_meta'] = {
+                'mode': 'single',
+                'prompt_tokens': prompt_data['token_report'],
+                'usage': usage,
+                'validation': validation,
+                'routing': self.router.record(routing, time.time() - llm_start, usage)
+            }
+            yield 'profile', result
+
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            raise Exception(f"Failed to analyze profile with OpenAI: {str(e)}")
+
+    def _repair_sections(self, static_prompt: str, prompt_data: Dict, profile: Dict, model: str) -> Tuple[Dict, Dict, Dict[str, int]]:
+        """
+        Valide le profil contre PersonProfileV3 et régénère uniquement les sections en échec:
+        un prompt court par section (son fragment de schéma, ses données, sa sortie invalide et
+        les erreurs), en parallèle. Une section toujours invalide après réparation est gardée telle quelle.
+
+        Returns:
+            (sections réparées, rapport {invalid, repaired, unrepaired}, usage des appels de réparation)
+        """
+        usage = usage_to_dict(None)
+        invalid = find_invalid_sections(profile, get_schema_order(static_prompt))
+        report = {'invalid': list(invalid), 'repaired': [], 'unrepaired': []}
+
+        if not invalid:
+            return {}, report, usage
+
+        print(f"[LLM] ⚠ {len(invalid)} section(s) non conforme(s) au schéma: {', '.join(invalid)}")
+
+        max_sections = int(os.getenv('LLM_REPAIR_MAX_SECTIONS', '6'))
+        if os.getenv('LLM_SCHEMA_REPAIR', 'true').lower() != 'true':
+            max_sections = 0
+
+        to_repair = list(invalid)[:max_sections]
+        report['unrepaired'] = list(invalid)[max_sections:]
+        if not to_repair:
+            return {}, report, usage
+
+        # Sections transverses: réparées à partir des sections valides
+        valid_sections = json.dumps({name: data for name, data in profile.items() if name not in invalid}, indent=2, ensure_ascii=False)
+
+        def repair(name: str) -> Tuple[Dict, Dict[str, int]]:
+            group = get_section_group(name)
+            repair_group = SectionGroup(f"repair:{name}", (name,), group.data)
+            repair_data = get_group_prompt_data(prompt_data, repair_group)
+            repair_data['previous_sections'] = valid_sections if group == CONSOLIDATION_GROUP else None
+            repair_data['repair_context'] = format_repair_context(name, profile.get(name), invalid[name])
+            return self._analyze_group(build_group_prompt(static_prompt, repair_group), repair_data, repair_group, model, usage_kind='section_repair')
+
+        repaired = {}
+        with ThreadPoolExecutor(max_workers=len(to_repair)) as executor:
+            futures = {executor.submit(contextvars.copy_context().run, repair, name): name for name in to_repair}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    sections, call_usage = future.result()
+                except Exception as e:
+                    print(f"[LLM] ✗ Réparation de '{name}' en échec: {e}")
+                    report['unrepaired'].append(name)
+                    continue
+
+                add_usage(usage, call_usage)
+                fixed = self._validate_and_fix_profile(sections)
+                errors = validate_section(name, fixed[name]) if name in fixed else ["section manquante dans la réponse"]
+                if errors:
+                    print(f"[LLM] ✗ '{name}' toujours invalide après réparation: {errors[0]}")
+                    report['unrepaired'].append(name)
+                    continue
+
+                repaired[name] = fixed[name]
+                report['repaired'].append(name)
+
+        print(f"[LLM] ✓ Réparation: {len(repaired)}/{len(invalid)} section(s) régénérée(s)")
+        return repaired, report, usage
+
+    def _analyze_group(self, static_prompt: str, prompt_data: Dict, group: SectionGroup, model: str, usage_kind: str = 'analysis_group') -> Tuple[Dict, Dict[str, int]]:
+        """Un appel LLM pour un groupe de sections: ne garde que les sections du groupe (+ usage de l'appel)"""
+        start_time = time.time()
+
+        response = self._chat_completion(
+            usage_kind=usage_kind,
+            model=model,
+            messages=self._build_messages(static_prompt, prompt_data),
+            temperature=0.3,
+            response_format={"type": "json_object"}
+        )
+
+        result = json.loads(response.choices[0].message.content)
+        sections = {name: result[name] for name in group.sections if name in result}
+        usage = usage_to_dict(response.usage)
+
+        print(f"[LLM] ✓ Groupe '{group.name}': {len(sections)}/{len(group.sections)} sections en {time.time() - start_time:.1f}s ({usage['cached_tokens']}/{usage['prompt_tokens']} tokens en cache)")
+        return sections, usage
+
+    def _analyze_parallel_events(self, first_name: str, last_name: str, company: str, scraped_data: List[Dict], pappers_data: Dict = None, dvf_data: Dict = None, hatvp_data: Dict = None, linkedin_urls: List[str] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Map-reduce sur les sections: groupes indépendants en parallèle (prompt et données réduits),
+        puis consolidation (scores de risque, red flags, cohérence, synthèse) à partir des sections produites.
+        Durée LLM ≈ groupe le plus lent + consolidation.
+
+        Yields:
+            ('section', (nom, données corrigées)) dès qu'un groupe est terminé, puis ('profile', profil complet)
+        """
+        try:
+            prompt_data = self._prepare_prompt_data(first_name, last_name, company, scraped_data, pappers_data, dvf_data, hatvp_data, linkedin_urls)
+            static_prompt = self._get_prompt_templates()[0].render()
+            section_order = get_schema_order(static_prompt)
+            routing = self.router.route(scraped_data, pappers_data, hatvp_data, prompt_data['token_report'])
+
+            def run_group(group: SectionGroup, previous_sections: Optional[str] = None) -> Tuple[Dict, Dict[str, int]]:
+                # Préfixe statique propre au groupe (stable d'une analyse à l'autre), données du groupe ensuite
+                group_data = get_group_prompt_data(prompt_data, group)
+                group_data['previous_sections'] = previous_sections
+                return self._analyze_group(build_group_prompt(static_prompt, group), group_data, group, routing.model)
+
+            start_time = time.time()
+            profile = {}
+            usage = usage_to_dict(None)
+
+            print(f"[LLM] 🚀 Analyse parallèle: {len(SECTION_GROUPS)} groupes de sections")
+            executor = ThreadPoolExecutor(max_workers=len(SECTION_GROUPS))
+            try:
+                futures = {
+                    # Contexte copié: la priorité LLM de l'appelant (interactive / batch) suit les threads
+                    executor.submit(contextvars.copy_context().run, run_group, group): group
+                    for group in SECTION_GROUPS
+                }
+
+                for future in as_completed(futures):
+                    group = futures[future]
+                    try:
+                        group_sections, group_usage = future.result()
+                    except Exception as e:
+                        print(f"[LLM] ✗ Groupe '{group.name}' en échec: {e}")
+                        continue
+
+                    add_usage(usage, group_usage)
+                    for name, data in self._validate_and_fix_profile(group_sections).items():
+                        profile[name] = data
+                        yield 'section', (name, data)
+            finally:
+                executor.shutdown(wait=False)
+
+            if not profile:
+                raise Exception("All section groups failed")
+
+            map_seconds = time.time() - start_time
+
+            # Consolidation: sections transverses à partir des sections produites (sans données web brutes)
+            consolidation_start = time.time()
+            try:
+                context = json.dumps(profile, indent=2, ensure_ascii=False)
+                group_sections, group_usage = run_group(CONSOLIDATION_GROUP, context)
+                add_usage(usage, group_usage)
+                for name, data in self._validate_and_fix_profile(group_sections).items():
+                    profile[name] = data
+                    yield 'section', (name, data)
+            except Exception as e:
+                print(f"[LLM] ⚠ Consolidation en échec, profil sans sections transverses: {e}")
+
+            print(f"[LLM] ⚡ Analyse parallèle: groupes {map_seconds:.1f}s + consolidation {time.time() - consolidation_start:.1f}s")
+
+            # Validation PersonProfileV3 (dont sections d'un groupe en échec): réparation ciblée
+            repaired, validation, repair_usage = self._repair_sections(static_prompt, prompt_data, profile, routing.model)
+            for name, data in repaired.items():
+                profile[name] = data
+                yield 'section', (name, data)
+            add_usage(usage, repair_usage)
+            self._log_usage('analyse parallèle', usage)
+
+            ordered = {name: profile[name] for name in section_order if name in profile}
+            ordered.update({name: data for name, data in profile.items() if name not in ordered})
+
+            print("[LLM] Validation et correction post-génération...")
+            ordered = self._validate_and_fix_profile(ordered)
+            ordered['analysis_meta'] = {
+                'mode': 'parallel',
+                'prompt_tokens': prompt_data['token_report'],
+                'usage': usage,
+                'validation': validation,
+                'routing': self.router.record(routing, time.time() - start_time, usage)
+            }
+            yield 'profile', ordered
+
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            raise Exception(f"Failed to analyze profile with OpenAI: {str(e)}")
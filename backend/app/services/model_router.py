@@ -0,0 +1,181 @@
+"""
+Model routing by profile complexity.
+
+Every profile used to go to OPENAI_MODEL (gpt-4o), including thin ones built from
+a few snippets with no Pappers match. The router scores the richness of the
+inputs (successful scrapes, Pappers companies where the person was found, press
+articles, size of the data sent) on a 0-100 scale:
+- high-risk profiles (PPE, collective proceedings, struck-off or ceased
+  companies) always go to the large model
+- rich profiles (score >= LLM_ROUTING_THRESHOLD) go to the large model
+- the others go to the small model (LLM_ROUTING_SMALL_MODEL)
+
+Each analysis reports the chosen model, its latency and its estimated cost, with
+the deltas against the other tier (average latency observed for that model,
+same token usage priced at the other model).
+"""
+
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from app.services.url_ranker import PRESS_DOMAINS
+from app.utils.url_validator import get_domain
+
+TIER_SMALL = 'small'
+TIER_LARGE = 'large'
+
+# Points par signal et plafond (score de richesse sur 100)
+RICHNESS_WEIGHTS = {
+    'scraped_pages': (4, 30),      # Pages scrapées avec succès
+    'pappers_companies': (12, 25),  # Entreprises Pappers où la personne est trouvée
+    'press_articles': (6, 20),      # Articles de presse scrapés
+    'data_tokens': (1.5, 25),       # Par millier de tokens de données envoyés
+}
+
+# Prix indicatifs ($ / 1M tokens): entrée, entrée en cache, sortie. Le préfixe le plus long gagne
+MODEL_PRICING = {
+    'gpt-4o': (2.50, 1.25, 10.00),
+    'gpt-4o-mini': (0.15, 0.075, 0.60),
+    'gpt-4.1': (2.00, 0.50, 8.00),
+    'gpt-4.1-mini': (0.40, 0.10, 1.60),
+    'gpt-4.1-nano': (0.10, 0.025, 0.40),
+}
+
+
+class RoutingDecision(NamedTuple):
+    model: str
+    tier: str
+    score: float
+    high_risk: bool
+    reasons: List[str]
+    signals: Dict[str, float]
+
+
+def estimate_cost(model: str, usage: Dict[str, int]) -> Optional[float]:
+    """Coût estimé ($) d'un usage {prompt_tokens, cached_tokens, completion_tokens}, None si modèle inconnu"""
+    matches = [prefix for prefix in MODEL_PRICING if model.startswith(prefix)]
+    if not matches:
+        return None
+
+    input_price, cached_price, output_price = MODEL_PRICING[max(matches, key=len)]
+    cached = usage.get('cached_tokens', 0)
+    uncached = usage.get('prompt_tokens', 0) - cached
+    return round((uncached * input_price + cached * cached_price + usage.get('completion_tokens', 0) * output_price) / 1_000_000, 5)
+
+
+def _is_press(url: str) -> bool:
+    domain = get_domain(url).lower()
+    return any(domain == press or domain.endswith('.' + press) for press in PRESS_DOMAINS)
+
+
+class ModelRouter:
+    def __init__(self):
+        self.enabled = os.getenv('LLM_ROUTING_ENABLED', 'true').lower() == 'true'
+        self.small_model = os.getenv('LLM_ROUTING_SMALL_MODEL', 'gpt-4o-mini')
+        self.threshold = float(os.getenv('LLM_ROUTING_THRESHOLD', '40'))
+        self.high_risk_large = os.getenv('LLM_ROUTING_HIGH_RISK_LARGE', 'true').lower() == 'true'
+
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def large_model(self) -> str:
+        return os.getenv('LLM_ROUTING_LARGE_MODEL') or os.getenv('OPENAI_MODEL', 'gpt-4o')
+
+    def _signals(self, scraped_data: List[Dict], pappers_data: Optional[Dict], token_report: Dict) -> Dict[str, float]:
+        pages = [item for item in scraped_data if item.get('success')]
+        companies = (pappers_data or {}).get('companies') or []
+        data_tokens = max(0, token_report.get('total', 0) - token_report.get('template', 0))
+
+        return {
+            'scraped_pages': len(pages),
+            'pappers_companies': sum(1 for company in companies if company.get('person_found')),
+            'press_articles': sum(1 for item in pages if _is_press(item.get('url', ''))),
+            'data_tokens': round(data_tokens / 1000, 1),
+        }
+
+    @staticmethod
+    def _risk_reasons(pappers_data: Optional[Dict], hatvp_data: Optional[Dict]) -> List[str]:
+        reasons = []
+        if (hatvp_data or {}).get('ppe_detected'):
+            reasons.append("personne politiquement exposée")
+
+        for company in (pappers_data or {}).get('companies') or []:
+            economic = company.get('economic_data') or {}
+            name = company.get('nom_entreprise') or company.get('siren')
+            if economic.get('procedures_collectives'):
+                reasons.append(f"procédure collective ({name})")
+            if economic.get('entreprise_cessee') or economic.get('date_radiation_rcs'):
+                reasons.append(f"entreprise cessée ou radiée ({name})")
+
+        return reasons
+
+    def route(self, scraped_data: List[Dict], pappers_data: Optional[Dict], hatvp_data: Optional[Dict], token_report: Dict) -> RoutingDecision:
+        signals = self._signals(scraped_data, pappers_data, token_report)
+        score = round(sum(
+            min(cap, signals[name] * points)
+            for name, (points, cap) in RICHNESS_WEIGHTS.items()
+        ), 1)
+        risk_reasons = self._risk_reasons(pappers_data, hatvp_data)
+
+        if not self.enabled:
+            decision = RoutingDecision(self.large_model, TIER_LARGE, score, bool(risk_reasons), ["routage désactivé"], signals)
+        elif risk_reasons and self.high_risk_large:
+            decision = RoutingDecision(self.large_model, TIER_LARGE, score, True, risk_reasons, signals)
+        elif score >= self.threshold:
+            decision = RoutingDecision(self.large_model, TIER_LARGE, score, bool(risk_reasons), [f"profil riche ({score:.0f} >= {self.threshold:.0f})"], signals)
+        else:
+            decision = RoutingDecision(self.small_model, TIER_SMALL, score, bool(risk_reasons), [f"profil simple ({score:.0f} < {self.threshold:.0f})"], signals)
+
+        print(f"[Router] → {decision.model} ({decision.tier}, richesse {score:.0f}/100: {', '.join(decision.reasons)})")
+        return decision
+
+    def record(self, decision: RoutingDecision, latency_seconds: float, usage: Dict[str, int]) -> Dict:
+        """
+        Enregistre une analyse et retourne le rapport de routage du profil
+        (modèle, latence, coût et écarts par rapport à l'autre tier).
+        """
+        cost = estimate_cost(decision.model, usage)
+        other_model = self.small_model if decision.tier == TIER_LARGE else self.large_model
+        other_cost = estimate_cost(other_model, usage)
+
+        with self._lock:
+            other_stats = self._stats.get(other_model)
+            other_latency = other_stats['latency_seconds'] / other_stats['analyses'] if other_stats else None
+
+            stats = self._stats.setdefault(decision.model, {'analyses': 0, 'latency_seconds': 0.0, 'cost_usd': 0.0})
+            stats['analyses'] += 1
+            stats['latency_seconds'] += latency_seconds
+            stats['cost_usd'] += cost or 0.0
+
+        return {
+            'model': decision.model,
+            'tier': decision.tier,
+            'richness_score': decision.score,
+            'high_risk': decision.high_risk,
+            'reasons': decision.reasons,
+            'signals': decision.signals,
+            'latency_seconds': round(latency_seconds, 1),
+            'cost_usd': cost,
+            'compared_to': other_model,
+            'latency_delta_seconds': round(latency_seconds - other_latency, 1) if other_latency is not None else None,
+            'cost_delta_usd': round(cost - other_cost, 5) if cost is not None and other_cost is not None else None,
+        }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'small_model': self.small_model,
+                'large_model': self.large_model,
+                'threshold': self.threshold,
+                'models': {
+                    model: {
+                        'analyses': stats['analyses'],
+                        'avg_latency_seconds': round(stats['latency_seconds'] / stats['analyses'], 1),
+                        'cost_usd': round(stats['cost_usd'], 4),
+                    }
+                    for model, stats in self._stats.items()
+                }
+            }
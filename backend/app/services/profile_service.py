@@ -1,7 +1,12 @@
-from typing import Dict
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.services.scraper_service import ScraperService
 from app.services.llm_service import LLMService
 from app.services.cache_service import CacheService
+from app.utils.llm_gateway import llm_priority, PRIORITY_BATCH
+from jinja2 import Template
 
 class ProfileService:
     def __init__(self):
@@ -9,6 +14,48 @@ class ProfileService:
         self.llm = LLMService()
         self.cache = CacheService()
 
+        # Ré-analyse bulk: nombre max d'appels LLM simultanés
+        self.reanalyze_max_concurrent = int(os.getenv('REANALYZE_MAX_CONCURRENT', '3'))
+
+    def _analyze_scraped_data(self, first_name: str, last_name: str, company: str, scraped_data: Dict) -> Dict:
+        """
+        Génère profile_data à partir de scraped_data (analyse LLM + sources).
+        Partagé entre la collecte complète et la ré-analyse depuis le cache.
+        """
+        scraped_content_list = [
+            data for data in scraped_data["scraped_content"]
+            if data.get('success')
+        ]
+
+        if not scraped_content_list:
+            raise ValueError("No valid data was scraped. Unable to generate profile.")
+
+        print(f"[ProfileService] Analyzing {len(scraped_content_list)} scraped content(s) with OpenAI")
+        profile_data = self.llm.analyze_profile(
+            first_name,
+            last_name,
+            company,
+            scraped_content_list,
+            scraped_data.get("pappers_data"),
+            scraped_data.get("dvf_data"),
+            scraped_data.get("hatvp_data"),
+            scraped_data.get("linkedin_urls", [])  # v3.1: Pass LinkedIn URLs for traceability
+        )
+
+        # v3.1: Ajouter sources web + URLs LinkedIn analysées
+        sources = list(scraped_data.get("sources", []))
+
+        # Extraire URLs LinkedIn depuis linkedin_activity_analysis
+        if "linkedin_activity_analysis" in profile_data:
+            linkedin_urls = profile_data["linkedin_activity_analysis"].get("linkedin_urls_analyzed", [])
+            if linkedin_urls:
+                # Ajouter URLs LinkedIn aux sources (déduplication)
+                sources.extend([url for url in linkedin_urls if url not in sources])
+
+        profile_data["sources"] = sources
+
+        return profile_data
+
     def get_person_profile(self, first_name: str, last_name: str, company: str, force_refresh: bool = False) -> Dict:
         try:
             print(f"\n[ProfileService] Starting profile collection for {first_name} {last_name}")
@@ -27,37 +74,7 @@ class ProfileService:
             print(f"[ProfileService] Cache miss or force refresh, scraping data...")
             scraped_data = self.scraper.scrape_person_data(first_name, last_name, company)
 
-            scraped_content_list = [
-                data for data in scraped_data["scraped_content"]
-                if data.get('success')
-            ]
-
-            if not scraped_content_list:
-                raise ValueError("No valid data was scraped. Unable to generate profile.")
-
-            print(f"[ProfileService] Analyzing {len(scraped_content_list)} scraped content(s) with OpenAI")
-            profile_data = self.llm.analyze_profile(
-                first_name,
-                last_name,
-                company,
-                scraped_content_list,
-                scraped_data.get("pappers_data"),
-                scraped_data.get("dvf_data"),
-                scraped_data.get("hatvp_data"),
-                scraped_data.get("linkedin_urls", [])  # v3.1: Pass LinkedIn URLs for traceability
-            )
-
-            # v3.1: Ajouter sources web + URLs LinkedIn analysées
-            sources = scraped_data.get("sources", [])
-
-            # Extraire URLs LinkedIn depuis linkedin_activity_analysis
-            if "linkedin_activity_analysis" in profile_data:
-                linkedin_urls = profile_data["linkedin_activity_analysis"].get("linkedin_urls_analyzed", [])
-                if linkedin_urls:
-                    # Ajouter URLs LinkedIn aux sources (déduplication)
-                    sources.extend([url for url in linkedin_urls if url not in sources])
-
-            profile_data["sources"] = sources
+            profile_data = self._analyze_scraped_data(first_name, last_name, company, scraped_data)
 
             self.cache.set(first_name, last_name, company, scraped_data, profile_data)
 
@@ -84,3 +101,182 @@ class ProfileService:
                 "error": "Erreur lors du traitement",
                 "message": str(e)
             }
+
+    def refresh_profile_incremental(self, first_name: str, last_name: str, company: str) -> Dict:
+        """
+        Refresh incrémental: relance la découverte (Serper, recherche Pappers), ne scrape que
+        les URLs nouvelles, et saute l'analyse LLM si rien de matériel n'a changé.
+        Sans entrée en cache, équivaut à un force_refresh.
+        """
+        entry = self.cache.get_entry(first_name, last_name, company)
+
+        if not entry:
+            print(f"[ProfileService] No cached data for incremental refresh, running full collection")
+            return self.get_person_profile(first_name, last_name, company, force_refresh=True)
+
+        try:
+            print(f"\n[ProfileService] Incremental refresh for {first_name} {last_name}")
+            scraped_data = self.scraper.scrape_person_data(
+                first_name, last_name, company,
+                previous_data=entry['scraped_data']
+            )
+
+            delta = scraped_data.get("incremental", {})
+
+            if delta.get("changed"):
+                profile_data = self._analyze_scraped_data(first_name, last_name, company, scraped_data)
+                llm_skipped = False
+            else:
+                print(f"[ProfileService] ✓ No material change, skipping LLM analysis")
+                profile_data = entry['profile_data']
+                llm_skipped = True
+
+            self.cache.set(first_name, last_name, company, scraped_data, profile_data)
+
+            return {
+                "success": True,
+                "data": profile_data,
+                "cached": False,
+                "incremental": delta,
+                "llm_skipped": llm_skipped
+            }
+
+        except ValueError as e:
+            print(f"[ProfileService] ✗ Validation error: {e}")
+            return {
+                "success": False,
+                "error": "Configuration ou données invalides",
+                "message": str(e)
+            }
+
+        except Exception as e:
+            print(f"[ProfileService] ✗ Incremental refresh error: {e}")
+            return {
+                "success": False,
+                "error": "Erreur lors du traitement",
+                "message": str(e)
+            }
+
+    def reanalyze_profile(self, first_name: str, last_name: str, company: str, templates: Optional[Tuple[Template, Template]] = None) -> Dict:
+        """
+        Reconstruit profile_data depuis le scraped_data stocké en cache,
+        avec le template et le modèle courants (aucun appel Serper/Pappers/Firecrawl).
+
+        Args:
+            templates: templates déjà relus (ré-analyse bulk: un seul chargement par job);
+                       par défaut relus depuis le disque pour cette ré-analyse
+        """
+        try:
+            entry = self.cache.get_entry(first_name, last_name, company)
+
+            if not entry:
+                return {
+                    "success": False,
+                    "error": "Profil introuvable en cache",
+                    "message": f"No cached scraped data for {first_name} {last_name} @ {company}"
+                }
+
+            if templates is None:
+                templates = self.llm.load_prompt_templates()
+
+            print(f"\n[ProfileService] Re-analyzing cached profile: {first_name} {last_name} @ {company}")
+            start_time = time.time()
+
+            with self.llm.prompt_templates(templates):
+                profile_data = self._analyze_scraped_data(
+                    entry['first_name'],
+                    entry['last_name'],
+                    entry['company'],
+                    entry['scraped_data']
+                )
+
+            self.cache.update_profile_data(first_name, last_name, company, profile_data)
+
+            duration = time.time() - start_time
+            print(f"[ProfileService] ✓ Profile re-analyzed in {duration:.1f}s")
+
+            return {
+                "success": True,
+                "data": profile_data,
+                "cached": True,
+                "reanalyzed": True,
+                "model": profile_data.get("analysis_meta", {}).get("routing", {}).get("model", self.llm.get_model_name()),
+                "cache_created_at": entry['cache_created_at']
+            }
+
+        except ValueError as e:
+            print(f"[ProfileService] ✗ Validation error: {e}")
+            return {
+                "success": False,
+                "error": "Configuration ou données invalides",
+                "message": str(e)
+            }
+
+        except Exception as e:
+            print(f"[ProfileService] ✗ Re-analysis error: {e}")
+            return {
+                "success": False,
+                "error": "Erreur lors de la ré-analyse",
+                "message": str(e)
+            }
+
+    def _reanalyze_batch_entry(self, first_name: str, last_name: str, company: str, templates: Tuple[Template, Template]) -> Dict:
+        """Ré-analyse d'un profil du batch: appels LLM en priorité basse (les recherches interactives passent avant)"""
+        with llm_priority(PRIORITY_BATCH):
+            return self.reanalyze_profile(first_name, last_name, company, templates)
+
+    def reanalyze_all(self, max_concurrent: int = None, progress: Optional[Dict] = None) -> Dict:
+        """
+        Ré-analyse tous les profils en cache, avec au plus max_concurrent appels LLM simultanés.
+
+        Args:
+            progress: état du job (progress_store), mis à jour à chaque profil terminé
+        """
+        max_concurrent = max(1, max_concurrent or self.reanalyze_max_concurrent)
+        entries = self.cache.list_entries()
+        progress = progress if progress is not None else {}
+        progress.update(total=len(entries), done=0, succeeded=0, failed=0)
+
+        print(f"\n[ProfileService] 🚀 Bulk re-analysis: {len(entries)} profile(s), {max_concurrent} concurrent")
+        start_time = time.time()
+
+        # Templates relus une seule fois pour tout le job
+        templates = self.llm.load_prompt_templates()
+
+        succeeded: List[str] = []
+        failed: List[Dict] = []
+
+        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+            future_to_entry = {
+                executor.submit(
+                    self._reanalyze_batch_entry,
+                    entry['first_name'],
+                    entry['last_name'],
+                    entry['company'],
+                    templates
+                ): entry
+                for entry in entries
+            }
+
+            for future in as_completed(future_to_entry):
+                entry = future_to_entry[future]
+                label = f"{entry['first_name']} {entry['last_name']} @ {entry['company']}"
+                result = future.result()
+
+                if result.get("success"):
+                    succeeded.append(label)
+                else:
+                    failed.append({"profile": label, "error": result.get("message")})
+
+                progress.update(done=len(succeeded) + len(failed), succeeded=len(succeeded), failed=len(failed))
+
+        duration = time.time() - start_time
+        print(f"[ProfileService] ⚡ Bulk re-analysis done in {duration:.1f}s: {len(succeeded)} OK, {len(failed)} failed")
+
+        return {
+            "total": len(entries),
+            "succeeded": len(succeeded),
+            "failed": failed,
+            "model": self.llm.get_model_name(),
+            "duration_seconds": round(duration, 1)
+        }
@@ -0,0 +1,83 @@
+"""
+Validation du profil généré contre le modèle Pydantic PersonProfileV3.
+
+Chaque section top-level est validée séparément (TypeAdapter de son champ, validé
+par pydantic-core): une section mal formée (champ requis absent, score hors
+bornes, type incorrect) ou absente de la réponse est signalée avec ses erreurs,
+sans invalider le reste du profil. L'appelant ne régénère que ces sections
+(prompts de réparation courts) et garde tout le reste de la réponse.
+"""
+
+import json
+from typing import Any, Dict, List
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.models.person_profile import PersonProfileV3
+
+# 'sources' est rempli par ProfileService (URLs scrapées), pas par le LLM
+NOT_GENERATED = ('sources',)
+
+SECTION_ADAPTERS = {
+    name: TypeAdapter(field.annotation)
+    for name, field in PersonProfileV3.model_fields.items()
+    if name not in NOT_GENERATED
+}
+
+# Erreurs conservées par section (contexte du prompt de réparation)
+MAX_ERRORS_PER_SECTION = 8
+
+
+def _format_error(error: Dict[str, Any]) -> str:
+    location = '.'.join(str(part) for part in error['loc']) or '(racine)'
+    return f"{location}: {error['msg']}"
+
+
+def validate_section(name: str, value: Any) -> List[str]:
+    """Erreurs de validation d'une section ([] si valide ou section hors modèle)"""
+    adapter = SECTION_ADAPTERS.get(name)
+    if adapter is None:
+        return []
+
+    try:
+        adapter.validate_python(value)
+    except ValidationError as e:
+        return [_format_error(error) for error in e.errors()[:MAX_ERRORS_PER_SECTION]]
+    return []
+
+
+def find_invalid_sections(profile: Dict, expected_sections: List[str]) -> Dict[str, List[str]]:
+    """
+    Sections à régénérer: {section: erreurs}.
+    Une section attendue (schéma du prompt) mais absente de la réponse est en échec.
+    """
+    invalid = {}
+
+    for name in expected_sections:
+        if name not in SECTION_ADAPTERS:
+            continue
+        if name not in profile:
+            invalid[name] = ["section manquante dans la réponse"]
+            continue
+
+        errors = validate_section(name, profile[name])
+        if errors:
+            invalid[name] = errors
+
+    for name, value in profile.items():
+        if name not in invalid and name not in expected_sections:
+            errors = validate_section(name, value)
+            if errors:
+                invalid[name] = errors
+
+    return invalid
+
+
+def format_repair_context(name: str, value: Any, errors: List[str], max_chars: int = 3000) -> str:
+    """Sortie précédente de la section et erreurs, pour le prompt de réparation"""
+    previous = json.dumps(value, indent=2, ensure_ascii=False) if value is not None else "(absente)"
+    if len(previous) > max_chars:
+        previous = previous[:max_chars] + "\n... [tronqué]"
+
+    error_lines = '\n'.join(f"- {error}" for error in errors)
+    return f"Section \"{name}\" invalide:\n{error_lines}\n\nSortie précédente:\n{previous}"
@@ -0,0 +1,211 @@
+"""
+Query planner - exécution unifiée des requêtes Serper de toutes les sources.
+
+Chaque source déclare ses requêtes (label, query, num_results, endpoint) via
+get_search_queries(). Le planner:
+1. Applique la politique de rendement (labels jamais utiles → élagués ou réduits)
+2. Déduplique les requêtes identiques entre sources
+3. Exécute tout dans un seul batch parallèle borné
+4. Renvoie à chaque source ses résultats par label
+5. Enregistre le rendement par label (résultats reçus vs éléments utilisés) en SQLite
+"""
+
+import os
+import time
+from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.db.database import get_db_connection
+from app.sources.base_source import BaseSource, SearchQuery
+from app.sources.serper_search_source import SerperSearchSource
+
+
+class QueryPlanner:
+    def __init__(self):
+        self.serper = SerperSearchSource()
+        self.max_concurrent = int(os.getenv('QUERY_PLANNER_MAX_CONCURRENT', '10'))
+
+        # Politique de rendement
+        self.auto_prune = os.getenv('QUERY_AUTO_PRUNE', 'true').lower() == 'true'
+        self.prune_min_runs = int(os.getenv('QUERY_PRUNE_MIN_RUNS', '10'))
+        self.prune_probe_every = int(os.getenv('QUERY_PRUNE_PROBE_EVERY', '10'))
+
+        print(f"[QueryPlanner] Config: {self.max_concurrent} concurrent queries, auto-prune={self.auto_prune} (min runs: {self.prune_min_runs})")
+
+    @staticmethod
+    def yield_key(source_name: str, label: str) -> str:
+        return f"{source_name}:{label}"
+
+    @staticmethod
+    def _dedup_key(query: SearchQuery) -> Tuple[str, str]:
+        return query.endpoint, ' '.join(query.query.lower().split())
+
+    def _load_yield_stats(self) -> Dict[str, Dict]:
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT label, runs, skipped, results, used FROM query_yield")
+            rows = cursor.fetchall()
+            conn.close()
+            return {row['label']: dict(row) for row in rows}
+        except Exception as e:
+            print(f"[QueryPlanner] ✗ Error loading yield stats: {e}")
+            return {}
+
+    def _apply_yield_policy(self, query: SearchQuery, stats: Dict) -> Tuple[SearchQuery, str]:
+        """
+        Retourne (requête éventuellement réduite, décision) où décision ∈ {'run', 'downsized', 'probe', 'pruned'}.
+
+        - Élagage: aucun élément utilisé après prune_min_runs exécutions
+          (sondé un plan sur prune_probe_every pour détecter un retour de rendement: 'skipped'
+          compte tous les plans d'un label élagué, sondes comprises)
+        - Réduction: moins d'un élément utilisé par exécution → num_results divisé par 2 (min 10)
+        - Requêtes de conformité (PPE, DVF, justice): jamais élaguées ni réduites, un rendement
+          nul y est le cas normal
+        """
+        if not self.auto_prune or query.compliance or not stats or stats['runs'] < self.prune_min_runs:
+            return query, 'run'
+
+        if stats['used'] == 0:
+            if self.prune_probe_every and (stats['skipped'] + 1) % self.prune_probe_every == 0:
+                return query, 'probe'
+            return query, 'pruned'
+
+        used_per_run = stats['used'] / stats['runs']
+        if used_per_run < 1 and query.num_results > 10:
+            return query._replace(num_results=max(10, query.num_results // 2)), 'downsized'
+
+        return query, 'run'
+
+    def _execute_query(self, query: SearchQuery):
+        if query.endpoint == 'news':
+            return self.serper.search_news(query.query, query.num_results)
+        return self.serper.search_google(query.query, query.num_results)
+
+    @staticmethod
+    def _slice_results(results: Dict, num_results: int) -> Dict:
+        """Adapte un résultat dédupliqué au nombre de résultats demandé par un abonné"""
+        sliced = dict(results)
+        for key in ('organic', 'news'):
+            if key in sliced:
+                sliced[key] = sliced[key][:num_results]
+        return sliced
+
+    def execute(self, sources: List[BaseSource], first_name: str, last_name: str, company: str) -> Tuple[Dict[str, Dict[str, Dict]], Dict[str, int]]:
+        """
+        Exécute les requêtes de toutes les sources en un seul batch.
+
+        Returns:
+            (results_by_source, results_count)
+            - results_by_source: {source_name: {label: résultat Serper}}
+            - results_count: {"source:label": nb de résultats reçus} (pour record_yield)
+        """
+        start_time = time.time()
+        yield_stats = self._load_yield_stats()
+        skipped_keys = []  # Labels élagués, sondes comprises (compteur 'skipped')
+        pruned_count = 0
+
+        # key de dédup → requête exécutée (num max) + abonnés (source, label, num demandé)
+        planned: Dict[Tuple[str, str], Dict] = {}
+
+        for source in sources:
+            source_name = source.get_name()
+            for query in source.get_search_queries(first_name, last_name, company):
+                key = self.yield_key(source_name, query.label)
+                query, decision = self._apply_yield_policy(query, yield_stats.get(key))
+
+                if decision == 'pruned':
+                    skipped_keys.append(key)
+                    pruned_count += 1
+                    print(f"[QueryPlanner] ✂ Pruned {key} (no used result in {yield_stats[key]['runs']} runs)")
+                    continue
+                if decision == 'probe':
+                    skipped_keys.append(key)
+                    print(f"[QueryPlanner] 🔎 Probing pruned {key}")
+                if decision == 'downsized':
+                    print(f"[QueryPlanner] ↓ Downsized {key} to {query.num_results} results")
+
+                dedup_key = self._dedup_key(query)
+                entry = planned.setdefault(dedup_key, {'query': query, 'subscribers': []})
+                if query.num_results > entry['query'].num_results:
+                    entry['query'] = entry['query']._replace(num_results=query.num_results)
+                entry['subscribers'].append((source_name, query.label, query.num_results))
+
+        total_declared = sum(len(entry['subscribers']) for entry in planned.values())
+        print(f"[QueryPlanner] 🚀 {len(planned)} unique queries ({total_declared} declared, {pruned_count} pruned) en parallèle...")
+
+        results_by_source: Dict[str, Dict[str, Dict]] = {source.get_name(): {} for source in sources}
+        results_count: Dict[str, int] = {}
+
+        if planned:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrent, len(planned)))) as executor:
+                future_to_key = {
+                    executor.submit(self._execute_query, entry['query']): dedup_key
+                    for dedup_key, entry in planned.items()
+                }
+
+                for future in as_completed(future_to_key):
+                    entry = planned[future_to_key[future]]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"[QueryPlanner] ✗ {entry['query'].label} error: {e}")
+                        result = None
+
+                    for source_name, label, num_results in entry['subscribers']:
+                        key = self.yield_key(source_name, label)
+                        if result:
+                            sliced = self._slice_results(result, num_results)
+                            results_by_source[source_name][label] = sliced
+                            results_count[key] = len(sliced.get('organic', []) or sliced.get('news', []))
+                        else:
+                            results_count[key] = 0
+
+        self._record_skipped(skipped_keys)
+
+        print(f"[QueryPlanner] ⚡ Batch terminé en {time.time() - start_time:.1f}s")
+        return results_by_source, results_count
+
+    def _record_skipped(self, keys: List[str]):
+        if not keys:
+            return
+
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE query_yield SET skipped = skipped + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE label = ?
+            """, [(key,) for key in keys])
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"[QueryPlanner] ✗ Error recording skipped labels: {e}")
+
+    def record_yield(self, results_count: Dict[str, int], used_by_key: Dict[str, int]):
+        """Enregistre une exécution: résultats reçus et éléments utilisés par label"""
+        if not results_count:
+            return
+
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO query_yield (label, runs, skipped, results, used)
+                VALUES (?, 1, 0, ?, ?)
+                ON CONFLICT(label) DO UPDATE SET
+                    runs = runs + 1,
+                    results = results + excluded.results,
+                    used = used + excluded.used,
+                    updated_at = CURRENT_TIMESTAMP
+            """, [(key, count, used_by_key.get(key, 0)) for key, count in results_count.items()])
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"[QueryPlanner] ✗ Error recording yield: {e}")
+
+    def get_yield_stats(self) -> List[Dict]:
+        stats = []
+        for key, row in sorted(self._load_yield_stats().items()):
+            row['used_per_run'] = round(row['used'] / row['runs'], 2) if row['runs'] else 0
+            stats.append(row)
+        return stats
@@ -1,19 +1,37 @@
 import os
 import time
-import requests
-from typing import List, Dict, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from firecrawl import Firecrawl
+from typing import List, Dict, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from app.sources import get_all_sources
-from app.utils.url_validator import filter_accessible_urls
+from app.sources.base_source import SourceRun
+from app.services.query_planner import QueryPlanner
+from app.services.domain_ledger import DomainLedger, ACTION_SKIP, ACTION_TRUST, ACTION_FALLBACK
+from app.services.url_ranker import UrlRanker
+from app.services.firecrawl_client import FirecrawlClient, FirecrawlResult, ERROR_BLOCKED, ERROR_EMPTY, ERROR_RATE_LIMIT, ERROR_CIRCUIT_OPEN
+from app.services.fetch_tiers import LocalFetcher, TierStats, judge_content, TIER_LOCAL, TIER_FIRECRAWL, TIER_SCRAPERAPI
+from app.services.hedging import Hedger
+from app.utils.url_validator import validate_urls, revalidate_url, get_domain
+from app.utils.http_client import get_http_client
+from app.utils.host_limiter import round_robin_by_host
+from app.utils.url_canonicalizer import canonicalize_url, url_dedup_key
+from app.utils.content_cleaner import clean_scraped_html
+from app.utils.circuit_breaker import CircuitOpenError
 
 class ScraperService:
     def __init__(self):
+        # v3.1: Firecrawl Premium configuration
+        self.max_concurrent_jobs = int(os.getenv('FIRECRAWL_MAX_CONCURRENT_JOBS', 5))
+        self.timeout_seconds = int(os.getenv('FIRECRAWL_TIMEOUT_SECONDS', 45))
+        self.rate_limit_seconds = float(os.getenv('FIRECRAWL_RATE_LIMIT_SECONDS', 0))
+        # API batch Firecrawl (un job par lot d'URLs) au lieu d'un appel scrape par URL
+        self.firecrawl_batch = os.getenv('FIRECRAWL_BATCH_ENABLED', 'true').lower() == 'true'
+
         self.firecrawl_api_key = os.getenv('FIRECRAWL_API_KEY')
         self.firecrawl = None
         if self.firecrawl_api_key:
             try:
-                self.firecrawl = Firecrawl(api_key=self.firecrawl_api_key)
+                self.firecrawl = FirecrawlClient(self.firecrawl_api_key, self.timeout_seconds)
             except Exception as e:
                 print(f"Warning: Firecrawl initialization failed: {e}")
 
@@ -22,23 +40,42 @@ class ScraperService:
         if self.scraperapi_key:
             print(f"[ScraperAPI] ✓ Enabled as fallback for blocked URLs")
 
-        # v3.1: Firecrawl Premium configuration
-        self.max_concurrent_jobs = int(os.getenv('FIRECRAWL_MAX_CONCURRENT_JOBS', 5))
-        self.timeout_seconds = int(os.getenv('FIRECRAWL_TIMEOUT_SECONDS', 45))
-        self.rate_limit_seconds = float(os.getenv('FIRECRAWL_RATE_LIMIT_SECONDS', 0))
+        # Tier local: GET direct + extraction texte, avant Firecrawl (jugé sur FETCH_LOCAL_MIN_CHARS)
+        self.local_fetch_enabled = os.getenv('FETCH_LOCAL_ENABLED', 'true').lower() == 'true'
+        self.local_min_chars = int(os.getenv('FETCH_LOCAL_MIN_CHARS', '500'))
+        self.local_fetcher = LocalFetcher()
+        self.tier_stats = TierStats()
+        # Plafond de stockage par page: la sélection pour le prompt se fait au budget de tokens (LLMService)
+        self.content_max_chars = int(os.getenv('SCRAPED_CONTENT_MAX_CHARS', '20000'))
+
+        # Hedging Firecrawl / ScraperAPI au-delà du p90 de latence Firecrawl (optionnel, budget plafonné)
+        self.hedger = Hedger()
 
-        print(f"[Firecrawl] Config: {self.max_concurrent_jobs} concurrent jobs, {self.timeout_seconds}s timeout, {self.rate_limit_seconds}s rate limit")
+        # Validation juste-à-temps: taille des lots = URLs manquantes x oversample (min: min_batch)
+        self.validation_oversample = int(os.getenv('URL_VALIDATION_OVERSAMPLE', '2'))
+        self.validation_min_batch = int(os.getenv('URL_VALIDATION_MIN_BATCH', '5'))
+        self.validation_timeout = float(os.getenv('URL_VALIDATION_TIMEOUT', '3'))
+
+        print(f"[Firecrawl] Config: {self.max_concurrent_jobs} concurrent jobs, {self.timeout_seconds}s timeout, {self.rate_limit_seconds}s rate limit, batch={self.firecrawl_batch}")
 
         self.sources = get_all_sources()
         print(f"Loaded {len(self.sources)} source modules: {[s.get_name() for s in self.sources]}")
 
-    def collect_urls_from_sources(self, first_name: str, last_name: str, company: str) -> Dict[str, List[str]]:        
+        # Requêtes Serper de toutes les sources: un seul batch dédupliqué
+        self.query_planner = QueryPlanner()
+
+        # Classement des URLs candidates (position, pertinence, historique par domaine)
+        self.domain_ledger = DomainLedger()
+        self.url_ranker = UrlRanker(self.domain_ledger)
+
+    def collect_urls_from_sources(self, first_name: str, last_name: str, company: str, runs: Optional[Dict[str, SourceRun]] = None) -> Dict[str, List[str]]:
         urls_by_source = {}
+        runs = runs or {}
 
         for source in self.sources:
             source_name = source.get_name()
             try:
-                urls = source.get_urls(first_name, last_name, company)
+                urls = source.get_urls(first_name, last_name, company, runs.get(source_name))
                 urls_by_source[source_name] = urls
                 print(f"Source '{source_name}': {len(urls)} URLs generated")
             except Exception as e:
@@ -66,7 +103,7 @@ class ScraperService:
                 'render': 'false',  # false = plus rapide, true = JS rendering
             }
 
-            response = requests.get(api_url, params=params, timeout=30)
+            response = get_http_client().get(api_url, provider='scraperapi', params=params)
 
             if response.status_code == 200:
                 content = response.text
@@ -80,36 +117,139 @@ class ScraperService:
             print(f"[ScraperAPI] ✗ Exception: {str(e)}")
             return None
 
-    def _scrape_single_url(self, url: str, source_name: str) -> Dict:
+    def _firecrawl_available(self) -> bool:
+        """Firecrawl configuré et circuit non ouvert (sinon: GET direct / ScraperAPI / snippets seuls)"""
+        return bool(self.firecrawl) and not self.firecrawl.breaker.is_open()
+
+    def _get_tiers(self, route: str) -> List[str]:
+        """Chaîne de tiers pour une URL, du moins cher au plus cher"""
+        if route == 'fallback':
+            # Domaine connu pour bloquer Firecrawl (DomainLedger) → ScraperAPI directement
+            return [TIER_SCRAPERAPI] if self.scraperapi_key else []
+
+        tiers = []
+        # route='remote': tier local déjà tenté (scraping par lot)
+        if self.local_fetch_enabled and route != 'remote':
+            tiers.append(TIER_LOCAL)
+        if self._firecrawl_available():
+            tiers.append(TIER_FIRECRAWL)
+        if self.scraperapi_key:
+            tiers.append(TIER_SCRAPERAPI)
+        return tiers
+
+    def _fetch_tier(self, tier: str, url: str) -> Tuple[str, bool]:
+        """Récupère le contenu texte d'un tier et le juge: (contenu, acceptable)"""
+        if tier == TIER_LOCAL:
+            content_text = self.local_fetcher.fetch(url) or ""
+            acceptable, reason = judge_content(content_text, self.local_min_chars)
+            if content_text and not acceptable:
+                print(f"[Local] ⚠ {url} rejected: {reason}, escalating")
+            return content_text, acceptable
+
+        if tier == TIER_FIRECRAWL:
+            content = self.scrape_with_firecrawl(url, use_fallback=False)
+            content_text = content.markdown if content and content.markdown is not None else ""
+        else:
+            content_text = clean_scraped_html(self.scrape_with_scraperapi(url) or "", url)
+
+        if content_text and len(content_text.strip()) <= 100:
+            print(f"[{tier}] ⚠ Content too short for {url}, escalating")
+
+        return content_text, len(content_text.strip()) > 100
+
+    def _record_tier(self, tier: str, url: str, content_text: str, acceptable: bool, latency_ms: int):
+        self.tier_stats.record(tier, acceptable, latency_ms)
+
+        if tier == TIER_FIRECRAWL:
+            self.hedger.record_latency(latency_ms)
+            self.domain_ledger.record_scrape(
+                url, acceptable, len(content_text) if acceptable else 0, latency_ms,
+                too_short=bool(content_text) and not acceptable
+            )
+        elif tier == TIER_SCRAPERAPI:
+            self.domain_ledger.record_fallback(url, acceptable)
+
+    def _run_tier(self, tier: str, url: str) -> Tuple[str, bool]:
+        """Exécute un tier et enregistre son résultat (stats par tier, ledger, latences)"""
+        start_time = time.time()
+
+        try:
+            content_text, acceptable = self._fetch_tier(tier, url)
+        except CircuitOpenError as e:
+            # Appel refusé par le circuit (essai half-open déjà pris): rien à imputer au domaine ni aux latences
+            print(f"[{tier}] ⚠ {e}, skipping {url}")
+            return "", False
+        except Exception as e:
+            print(f"[{tier}] ✗ Error scraping {url}: {e}")
+            content_text, acceptable = "", False
+
+        self._record_tier(tier, url, content_text, acceptable, round((time.time() - start_time) * 1000))
+        return content_text, acceptable
+
+    def _fetch_hedged(self, url: str) -> Tuple[str, str, bool, bool]:
         """
-        Scrape une URL unique. Utilisé par scraping parallèle et séquentiel.
-        Retourne dict avec {url, source, content, success}
+        Firecrawl, doublé par ScraperAPI s'il dépasse le percentile de latence (et si le budget le permet).
+        Le premier contenu exploitable gagne, l'autre requête est abandonnée
+        (les requêtes HTTP en vol ne peuvent pas être interrompues: leur résultat est juste ignoré).
+
+        Returns:
+            (tier gagnant, contenu, acceptable, ScraperAPI déjà tenté)
         """
+        self.hedger.register_request()
+        executor = ThreadPoolExecutor(max_workers=2)
+        futures = {executor.submit(self._run_tier, TIER_FIRECRAWL, url): TIER_FIRECRAWL}
+
         try:
-            content = self.scrape_with_firecrawl(url)
-
-            if content:
-                content_text = content.markdown if content.markdown is not None else ""
-
-                # Valider contenu exploitable
-                if len(content_text.strip()) > 100:
-                    return {
-                        "source": source_name,
-                        "url": url,
-                        "content": content_text[:5000],
-                        "success": True
-                    }
-                else:
-                    print(f"[Firecrawl] ⚠ Content too short for {url}, skipping")
-                    return {"url": url, "success": False}
+            done, _ = wait(futures, timeout=self.hedger.get_delay())
+            if not done and self.hedger.try_acquire():
+                print(f"[Hedging] ⚡ Firecrawl slow for {url}, racing ScraperAPI")
+                futures[executor.submit(self._run_tier, TIER_SCRAPERAPI, url)] = TIER_SCRAPERAPI
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    content_text, acceptable = future.result()
+                    if acceptable:
+                        if futures[future] == TIER_SCRAPERAPI:
+                            self.hedger.record_win()
+                        return futures[future], content_text, True, TIER_SCRAPERAPI in futures.values()
+
+            return TIER_FIRECRAWL, "", False, TIER_SCRAPERAPI in futures.values()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _scrape_single_url(self, url: str, source_name: str, route: str = 'firecrawl', tiers: List[str] = None) -> Dict:
+        """
+        Scrape une URL unique via la chaîne de tiers: local (GET + extraction) → Firecrawl → ScraperAPI.
+        On escalade au tier suivant tant que le contenu n'est pas jugé exploitable.
+        Utilisé par scraping parallèle et séquentiel.
+        Retourne dict avec {url, source, content, success, tier}
+        """
+        tiers = tiers or self._get_tiers(route)
+        hedging = self.hedger.enabled and TIER_SCRAPERAPI in tiers
+
+        for tier in tiers:
+            if tier == TIER_FIRECRAWL and hedging:
+                tier, content_text, acceptable, scraperapi_tried = self._fetch_hedged(url)
+                if not acceptable and scraperapi_tried:
+                    # ScraperAPI déjà tenté en parallèle: fin de chaîne
+                    break
             else:
-                return {"url": url, "success": False}
+                content_text, acceptable = self._run_tier(tier, url)
 
-        except Exception as e:
-            print(f"[Firecrawl] ✗ Error scraping {url}: {e}")
-            return {"url": url, "success": False}
+            if acceptable:
+                return {
+                    "source": source_name,
+                    "url": url,
+                    "content": content_text[:self.content_max_chars],
+                    "success": True,
+                    "tier": tier
+                }
+
+        return {"url": url, "success": False}
 
-    def _scrape_parallel(self, urls: List[str], collected_data: Dict, url_to_source: Dict, max_scrapes: int):
+    def _scrape_parallel(self, urls: List[str], collected_data: Dict, url_to_source: Dict, max_scrapes: int, routes: Dict[str, str] = None):
         """
         v3.1: Scraping parallèle avec ThreadPoolExecutor.
         Firecrawl Premium supporte 5 jobs simultanés.
@@ -119,8 +259,8 @@ class ScraperService:
         with ThreadPoolExecutor(max_workers=self.max_concurrent_jobs) as executor:
             # Soumettre tous les jobs
             future_to_url = {
-                executor.submit(self._scrape_single_url, url, url_to_source.get(url, "unknown")): url
-                for url in urls[:max_scrapes]
+                executor.submit(self._scrape_single_url, url, url_to_source.get(url, "unknown"), (routes or {}).get(url, 'firecrawl')): url
+                for url in round_robin_by_host(urls[:max_scrapes])
             }
 
             # Traiter résultats au fur et à mesure
@@ -140,7 +280,7 @@ class ScraperService:
                 else:
                     collected_data["stats"]["failed"] += 1
 
-    def _scrape_sequential(self, urls: List[str], collected_data: Dict, url_to_source: Dict, max_scrapes: int):
+    def _scrape_sequential(self, urls: List[str], collected_data: Dict, url_to_source: Dict, max_scrapes: int, routes: Dict[str, str] = None):
         """
         Scraping séquentiel avec rate limiting (free tier).
         """
@@ -163,7 +303,7 @@ class ScraperService:
             collected_data["stats"]["attempted"] += 1
             source_name = url_to_source.get(url, "unknown")
 
-            result = self._scrape_single_url(url, source_name)
+            result = self._scrape_single_url(url, source_name, (routes or {}).get(url, 'firecrawl'))
 
             if result.get("success"):
                 collected_data["scraped_content"].append(result)
@@ -173,69 +313,443 @@ class ScraperService:
             else:
                 collected_data["stats"]["failed"] += 1
 
-    def scrape_with_firecrawl(self, url: str, use_fallback: bool = True) -> Optional[Dict]:
+    def _scrape_fallback(self, url: str):
+        """ScraperAPI, converti en format compatible Firecrawl (attribut .markdown)"""
+        scraperapi_content = self.scrape_with_scraperapi(url)
+        if scraperapi_content:
+            return type('obj', (object,), {
+                'markdown': scraperapi_content[:10000],  # Limiter à 10k chars
+                'html': None
+            })
+        return None
+
+    def scrape_with_firecrawl(self, url: str, use_fallback: bool = True):
         """
-        Scrape avec Firecrawl, fallback vers ScraperAPI si 403/blocked.
+        Scrape avec Firecrawl (markdown uniquement), fallback vers ScraperAPI si 403/blocked ou vide.
         v3.1: Supporte timeout configurable pour éviter pages lourdes.
         """
         if not self.firecrawl:
             raise ValueError("Firecrawl API key not configured")
 
-        try:
-            print(f"[Firecrawl] Scraping: {url}")
-            result = self.firecrawl.scrape(
-                url,
-                formats=['markdown', 'html'],
-                timeout=self.timeout_seconds * 1000  # Firecrawl attend ms
-            )
+        print(f"[Firecrawl] Scraping: {url}")
+        result = self.firecrawl.scrape(url)
+
+        if result.success:
+            print(f"[Firecrawl] ✓ Success: {len(result.markdown)} chars")
+            return result
+
+        print(f"[Firecrawl] ✗ {result.error_type}: {result.error}")
+
+        # Appel non tenté (circuit ouvert ou essai half-open déjà pris): la chaîne de tiers ne doit
+        # rien enregistrer pour ce domaine
+        if result.error_type == ERROR_CIRCUIT_OPEN and not use_fallback:
+            raise CircuitOpenError('firecrawl', self.firecrawl.breaker.get_state()['retry_in_seconds'] or 0)
+
+        # Rate limit: on ne retry pas ici, on laisse la boucle gérer avec le délai global
+        if result.error_type == ERROR_RATE_LIMIT:
+            print(f"[Firecrawl] ⚠ Rate limit hit, will be handled by rate limiting logic")
+            return None
+
+        # Bloqué (403, anti-bot) ou vide: essayer ScraperAPI
+        if use_fallback and self.scraperapi_key and result.error_type in (ERROR_BLOCKED, ERROR_EMPTY, ERROR_CIRCUIT_OPEN):
+            print(f"[Fallback] Firecrawl {result.error_type}, trying ScraperAPI for {url}")
+            return self._scrape_fallback(url)
+
+        return None
 
-            if result and (result.markdown or result.html):
-                print(f"[Firecrawl] ✓ Success: {len(result.markdown or '')} chars")
-                return result
+    def _add_scraped(self, collected_data: Dict, result: Dict):
+        collected_data["scraped_content"].append(result)
+        collected_data["sources"].append(result["url"])
+        collected_data["stats"]["successful"] += 1
+
+    def _scrape_batch(self, urls: List[str], collected_data: Dict, url_to_source: Dict, max_scrapes: int, routes: Dict[str, str] = None):
+        """
+        Chaîne de tiers appliquée à un lot:
+        1. Tier local (GET direct) en parallèle
+        2. Job batch Firecrawl pour les pages non satisfaites (un seul appel, résultats par polling)
+        3. ScraperAPI pour les échecs Firecrawl et les URLs routées vers le fallback
+        Si le job batch ne peut pas être créé, repli sur le scraping parallèle unitaire.
+        """
+        routes = routes or {}
+        urls = urls[:max_scrapes]
+        fallback_urls = [url for url in urls if routes.get(url) == 'fallback']
+        pending_urls = [url for url in urls if routes.get(url) != 'fallback']
+        successful_scrapes = 0
+
+        # 1. Tier local
+        if self.local_fetch_enabled and pending_urls:
+            with ThreadPoolExecutor(max_workers=self.max_concurrent_jobs) as executor:
+                local_results = list(executor.map(
+                    lambda url: self._scrape_single_url(url, url_to_source.get(url, "unknown"), tiers=[TIER_LOCAL]),
+                    pending_urls
+                ))
+
+            for result in local_results:
+                if result.get("success"):
+                    collected_data["stats"]["attempted"] += 1
+                    self._add_scraped(collected_data, result)
+                    successful_scrapes += 1
+
+            pending_urls = [url for url, result in zip(pending_urls, local_results) if not result.get("success")]
+            print(f"[Local] ⚡ {successful_scrapes}/{len(urls)} page(s) served by direct GET")
+
+        # 2. Tier Firecrawl (batch), doublé par ScraperAPI pour les pages lentes (hedging)
+        firecrawl_done = set()
+        hedge_futures = {}
+        hedge_lock = threading.Lock()
+        hedge_state = {'closed': False}
+        hedge_timer = None
+        hedge_executor = None
+
+        def record(result: FirecrawlResult):
+            acceptable = result.success and len(result.markdown.strip()) > 100
+            # Pages annulées ou refusées par le circuit: pas de requête Firecrawl, rien à enregistrer
+            if result.error_type != ERROR_CIRCUIT_OPEN and (not result.error or not result.error.startswith("Cancelled")):
+                self._record_tier(TIER_FIRECRAWL, result.url, result.markdown or '', acceptable, result.latency_ms)
+            firecrawl_done.add(result.url)
+
+        def launch_hedges():
+            with hedge_lock:
+                if hedge_state['closed']:
+                    return
+                for url in pending_urls:
+                    if url not in firecrawl_done and self.hedger.try_acquire():
+                        print(f"[Hedging] ⚡ Firecrawl slow for {url}, racing ScraperAPI")
+                        hedge_futures[url] = hedge_executor.submit(self._run_tier, TIER_SCRAPERAPI, url)
+
+        def stop_hedges():
+            """Plus de nouveau hedge (les hedges déjà lancés continuent)"""
+            if hedge_timer:
+                hedge_timer.cancel()
+                with hedge_lock:
+                    hedge_state['closed'] = True
+
+        def collect_hedge(url: str) -> bool:
+            """ScraperAPI déjà lancé en hedge: on attend son résultat (pas de second appel)"""
+            content_text, acceptable = hedge_futures[url].result()
+            collected_data["stats"]["attempted"] += 1
+            if not acceptable:
+                collected_data["stats"]["failed"] += 1
+                return False
+
+            self.hedger.record_win()
+            self._add_scraped(collected_data, {
+                "source": url_to_source.get(url, "unknown"),
+                "url": url,
+                "content": content_text[:self.content_max_chars],
+                "success": True,
+                "tier": TIER_SCRAPERAPI
+            })
+            return True
+
+        def served_elsewhere() -> bool:
+            """Toutes les pages encore attendues ont déjà été servies par un hedge"""
+            with hedge_lock:
+                return all(
+                    url in firecrawl_done
+                    or (url in hedge_futures and hedge_futures[url].done() and hedge_futures[url].result()[1])
+                    for url in pending_urls
+                )
+
+        firecrawl_available = self._firecrawl_available()
+        if pending_urls and firecrawl_available and self.hedger.enabled and self.scraperapi_key:
+            self.hedger.register_request(len(pending_urls))
+            hedge_executor = ThreadPoolExecutor(max_workers=self.max_concurrent_jobs)
+            hedge_timer = threading.Timer(self.hedger.get_delay(), launch_hedges)
+            hedge_timer.daemon = True
+            hedge_timer.start()
+
+        if pending_urls and firecrawl_available:
+            try:
+                batch_results = self.firecrawl.batch_scrape(
+                    pending_urls,
+                    on_result=record,
+                    stop_when=served_elsewhere if hedge_executor else None
+                )
+            except Exception as e:
+                print(f"[Firecrawl] ⚠ Batch scrape unavailable ({e}), falling back to per-URL scraping")
+                # Pages déjà doublées par ScraperAPI: résultat du hedge, pas de second appel facturé
+                stop_hedges()
+                with hedge_lock:
+                    hedged_urls = [url for url in pending_urls if url in hedge_futures]
+                successful_scrapes += sum(1 for url in hedged_urls if collect_hedge(url))
+
+                remaining_urls = [url for url in pending_urls if url not in hedged_urls]
+                if remaining_urls and successful_scrapes < max_scrapes:
+                    self._scrape_parallel(
+                        remaining_urls, collected_data, url_to_source, max_scrapes - successful_scrapes,
+                        {url: 'remote' for url in remaining_urls}
+                    )
             else:
-                print(f"[Firecrawl] ✗ Empty result")
-
-                # Fallback vers ScraperAPI si disponible
-                if use_fallback and self.scraperapi_key:
-                    print(f"[Fallback] Trying ScraperAPI for {url}")
-                    scraperapi_content = self.scrape_with_scraperapi(url)
-                    if scraperapi_content:
-                        # Convertir en format compatible Firecrawl
-                        return type('obj', (object,), {
-                            'markdown': scraperapi_content[:10000],  # Limiter à 10k chars
-                            'html': None
+                stop_hedges()
+
+                for url in pending_urls:
+                    result = batch_results[url]
+
+                    if result.success and len(result.markdown.strip()) > 100:
+                        collected_data["stats"]["attempted"] += 1
+                        self._add_scraped(collected_data, {
+                            "source": url_to_source.get(url, "unknown"),
+                            "url": url,
+                            "content": result.markdown[:self.content_max_chars],
+                            "success": True,
+                            "tier": TIER_FIRECRAWL
                         })
+                        successful_scrapes += 1
+                    elif url in hedge_futures:
+                        if collect_hedge(url):
+                            successful_scrapes += 1
+                    elif self.scraperapi_key:
+                        # 3. Escalade vers ScraperAPI (comptée comme une seule tentative)
+                        print(f"[Fallback] Firecrawl {result.error_type or 'short content'} for {url}, escalating to ScraperAPI")
+                        fallback_urls.append(url)
+                    else:
+                        print(f"[Firecrawl] ✗ {url}: {result.error_type or 'content too short'}")
+                        collected_data["stats"]["attempted"] += 1
+                        collected_data["stats"]["failed"] += 1
+        else:
+            # Pas de Firecrawl (ou circuit ouvert): escalade directe
+            fallback_urls.extend(pending_urls)
+
+        if hedge_timer:
+            stop_hedges()
+            hedge_executor.shutdown(wait=False, cancel_futures=True)
+
+        # 3. Tier ScraperAPI
+        if fallback_urls and successful_scrapes < max_scrapes:
+            self._scrape_parallel(
+                fallback_urls, collected_data, url_to_source, max_scrapes - successful_scrapes,
+                {url: 'fallback' for url in fallback_urls}
+            )
 
-                return None
+    def _get_reusable_content(self, previous_data: Optional[Dict]) -> Dict[str, Dict]:
+        """
+        Refresh incrémental: contenu web déjà scrapé avec succès, indexé par URL.
+        Les snippets LinkedIn sont exclus (régénérés à chaque découverte Serper).
+        """
+        if not previous_data:
+            return {}
+
+        # Indexé par clé canonique (anciennes entrées de cache: URLs non canonicalisées)
+        return {
+            url_dedup_key(item['url']): item
+            for item in previous_data.get('scraped_content', [])
+            if item.get('success') and item.get('source') != 'linkedin_snippets' and item.get('url')
+        }
 
-        except Exception as e:
-            error_msg = str(e).lower()
-            print(f"[Firecrawl] ✗ Error: {str(e)}")
+    def _revalidate_reused(self, reused_urls: List[str], reusable_content: Dict[str, Dict]) -> Tuple[Dict[str, Dict], List[str], List[str]]:
+        """
+        Refresh incrémental: HEAD conditionnel (ETag / Last-Modified) sur les pages déjà scrapées.
 
-            # Si rate limit exceeded, extraire le délai et retourner None (sera géré par la boucle)
-            if 'rate limit' in error_msg:
-                # On ne retry pas ici, on laisse la boucle gérer avec le délai global
-                print(f"[Firecrawl] ⚠ Rate limit hit, will be handled by rate limiting logic")
-                return None
+        Returns:
+            (pages réutilisables {url: item avec validateurs à jour}, URLs modifiées à re-scraper,
+             URLs supprimées (404 / 410) à retirer du profil)
+            Une page sans validateur côté serveur est considérée inchangée.
+        """
+        if not reused_urls:
+            return {}, [], []
+
+        def check(url: str) -> Dict:
+            item = reusable_content[url_dedup_key(url)]
+            return revalidate_url(url, item.get('etag'), item.get('last_modified'), item.get('scraped_at'), self.validation_timeout)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrent_jobs, len(reused_urls)))) as executor:
+            results = list(executor.map(check, reused_urls))
+
+        reusable, changed_urls, gone_urls = {}, [], []
+        for url, result in zip(reused_urls, results):
+            if result['gone']:
+                gone_urls.append(url)
+                continue
+            if result['changed']:
+                changed_urls.append(url)
+                continue
+            reusable[url] = {
+                **reusable_content[url_dedup_key(url)],
+                'etag': result['etag'],
+                'last_modified': result['last_modified']
+            }
 
-            # Si erreur 403/blocked, essayer ScraperAPI
-            if use_fallback and self.scraperapi_key and ('403' in error_msg or 'forbidden' in error_msg or 'blocked' in error_msg):
-                print(f"[Fallback] Firecrawl blocked (403), trying ScraperAPI")
-                scraperapi_content = self.scrape_with_scraperapi(url)
-                if scraperapi_content:
-                    return type('obj', (object,), {
-                        'markdown': scraperapi_content[:10000],
-                        'html': None
-                    })
+        print(f"[Incremental] Revalidated {len(reused_urls)} cached page(s): {len(changed_urls)} changed, {len(gone_urls)} gone")
+        return reusable, changed_urls, gone_urls
 
-            return None
+    @staticmethod
+    def _pappers_fingerprint(pappers_data: Optional[Dict]) -> tuple:
+        """Empreinte Pappers: (SIREN, derniere_mise_a_jour) par entreprise + total BODACC personne"""
+        if not pappers_data:
+            return ()
+
+        companies = tuple(sorted(
+            (company.get('siren') or '', (company.get('economic_data') or {}).get('derniere_mise_a_jour') or '')
+            for company in pappers_data.get('companies', [])
+        ))
+        bodacc_total = (pappers_data.get('bodacc_person') or {}).get('total', 0)
+
+        return companies, bodacc_total
+
+    @staticmethod
+    def _snippets_fingerprint(data: Optional[Dict]) -> tuple:
+        """Empreinte des sources à base de snippets (DVF, HATVP, LinkedIn)"""
+        if not data:
+            return ()
+
+        snippets = data.get('snippets')
+        if snippets is not None:
+            return tuple(sorted(item.get('url', '') for item in snippets))
+
+        return tuple(sorted(data.get('urls', [])))
+
+    def _compute_incremental_delta(self, previous_data: Dict, collected_data: Dict) -> Dict:
+        """
+        Compare la nouvelle collecte au cache: URLs découvertes, sources utilisées,
+        mises à jour Pappers et snippets. 'changed' = changement matériel nécessitant une ré-analyse LLM.
+        """
+        # Anciennes entrées de cache: pas de candidate_urls, on retombe sur accessible_urls
+        previous_candidates = previous_data.get('candidate_urls', previous_data.get('accessible_urls', []))
+        # Comparaison sur clés canoniques (anciennes entrées: URLs non canonicalisées)
+        previous_urls = set(url_dedup_key(url) for url in previous_candidates if url.startswith('http'))
+        current_urls = set(url_dedup_key(url) for url in collected_data['candidate_urls'])
+
+        sources_changed = (
+            set(url_dedup_key(url) for url in collected_data['sources'])
+            != set(url_dedup_key(url) for url in previous_data.get('sources', []))
+        )
+        pappers_changed = self._pappers_fingerprint(previous_data.get('pappers_data')) != self._pappers_fingerprint(collected_data['pappers_data'])
+        snippets_changed = any(
+            self._snippets_fingerprint(previous_data.get(key)) != self._snippets_fingerprint(collected_data[key])
+            for key in ('dvf_data', 'hatvp_data', 'linkedin_data')
+        )
+
+        return {
+            'new_urls': len(current_urls - previous_urls),
+            'removed_urls': len(previous_urls - current_urls),
+            'reused_pages': collected_data['stats'].get('reused', 0),
+            'refreshed_pages': collected_data['stats'].get('refreshed', 0),
+            'sources_changed': sources_changed,
+            'pappers_changed': pappers_changed,
+            'snippets_changed': snippets_changed,
+            'changed': sources_changed or pappers_changed or snippets_changed or bool(collected_data['stats'].get('refreshed'))
+        }
+
+    def _scrape_with_lazy_validation(self, candidates: List[str], trusted_urls: set, collected_data: Dict, url_to_source: Dict, max_scrapes: int):
+        """
+        Validation juste-à-temps: les candidats (déjà classés) sont validés par petits lots,
+        dans l'ordre, uniquement tant qu'il manque des URLs valides pour atteindre max_scrapes.
+        Les échecs de scraping déclenchent la validation du lot suivant.
+
+        Le DomainLedger ajuste chaque URL selon l'historique de son domaine:
+        ignorée (skip), sans HEAD (trust), directement vers ScraperAPI (fallback), timeout HEAD raccourci.
+        """
+        policies = self.domain_ledger.get_policies(
+            [get_domain(url).lower() for url in candidates],
+            fallback_available=bool(self.scraperapi_key),
+            default_timeout=self.validation_timeout
+        )
+
+        routes: Dict[str, str] = {}
+        head_timeouts: Dict[str, float] = {}
+        trusted_urls = set(trusted_urls)
+        kept = []
+
+        for url in candidates:
+            policy = policies.get(get_domain(url).lower())
+            if policy and url not in trusted_urls:
+                if policy['action'] == ACTION_SKIP:
+                    collected_data["stats"]["skipped_by_ledger"] += 1
+                    print(f"[DomainLedger] ✗ Skipping {url} ({policy['reason']})")
+                    continue
+                if policy['action'] in (ACTION_TRUST, ACTION_FALLBACK):
+                    trusted_urls.add(url)
+                if policy['action'] == ACTION_FALLBACK:
+                    routes[url] = 'fallback'
+                head_timeouts[url] = policy['head_timeout']
+            kept.append(url)
+
+        candidates = kept
+        validated_queue: List[str] = []
+        position = 0
+
+        while collected_data["stats"]["successful"] < max_scrapes:
+            needed = max_scrapes - collected_data["stats"]["successful"]
+
+            # Compléter la file validée avec le prochain lot classé
+            while len(validated_queue) < needed and position < len(candidates):
+                batch_size = max(needed * self.validation_oversample, self.validation_min_batch)
+                batch = candidates[position:position + batch_size]
+                position += len(batch)
+
+                to_validate = [url for url in batch if url not in trusted_urls]
+                validated = set(validate_urls(
+                    to_validate,
+                    timeout=self.validation_timeout,
+                    timeouts=head_timeouts,
+                    on_result=self.domain_ledger.record_head
+                )) if to_validate else set()
+                collected_data["stats"]["validated"] += len(to_validate)
+
+                # Conserver l'ordre du classement
+                accepted = [url for url in batch if url in validated or url in trusted_urls]
+                validated_queue.extend(accepted)
+                collected_data["accessible_urls"].extend(accepted)
+                collected_data["stats"]["accessible"] += len(accepted)
+
+            if not validated_queue:
+                break
+
+            to_scrape, validated_queue = validated_queue[:needed], validated_queue[needed:]
+
+            # Job batch Firecrawl: un seul appel pour tout le lot
+            if self.firecrawl_batch and self.max_concurrent_jobs > 1:
+                print(f"[Firecrawl] ✓ Batch scraping: {len(to_scrape)} URL(s)")
+                self._scrape_batch(to_scrape, collected_data, url_to_source, needed, routes)
+            # v3.1: Scraping parallèle avec ThreadPoolExecutor (Premium supporte 5 jobs simultanés)
+            elif self.max_concurrent_jobs > 1:
+                print(f"[Firecrawl] ✓ Parallel scraping: {len(to_scrape)} URL(s), {self.max_concurrent_jobs} concurrent jobs")
+                self._scrape_parallel(to_scrape, collected_data, url_to_source, needed, routes)
+            else:
+                print(f"[Firecrawl] Sequential scraping: {len(to_scrape)} URL(s) (rate limit: {self.rate_limit_seconds}s)")
+                self._scrape_sequential(to_scrape, collected_data, url_to_source, needed, routes)
 
-    def scrape_person_data(self, first_name: str, last_name: str, company: str) -> Dict[str, any]:
+        print(f"[URL Validator] ⚡ Lazy validation: {collected_data['stats']['validated']}/{len(candidates)} candidates validated, {collected_data['stats']['accessible']} accessible")
+
+    def _record_query_yield(self, query_counts: Dict[str, int], collected_data: Dict, runs: Dict[str, SourceRun]):
+        """Rendement par label de requête: URLs effectivement scrapées + snippets retenus"""
+        used_urls = set(collected_data["sources"])
+        used_by_key = {}
+
+        for source_name, run in runs.items():
+            for label, used in run.get_label_yield(used_urls).items():
+                used_by_key[QueryPlanner.yield_key(source_name, label)] = used
+
+        self.query_planner.record_yield(query_counts, used_by_key)
+
+    def scrape_person_data(self, first_name: str, last_name: str, company: str, previous_data: Optional[Dict] = None) -> Dict[str, any]:
+        """
+        Collecte complète des données d'une personne.
+
+        Args:
+            previous_data: scraped_data du cache (refresh incrémental). Les URLs nouvelles et les pages
+                           modifiées (HEAD conditionnel ETag / Last-Modified) sont scrapées en premier;
+                           les pages déjà scrapées inchangées complètent le budget sans appel Firecrawl.
+        """
         if not self.firecrawl:
             raise ValueError("Firecrawl API key not configured. Please set FIRECRAWL_API_KEY in .env")
 
         print(f"\n=== Scraping Profile: {first_name} {last_name} @ {company} ===")
-        urls_by_source = self.collect_urls_from_sources(first_name, last_name, company)
+
+        reusable_content = self._get_reusable_content(previous_data)
+        if previous_data:
+            print(f"[Incremental] {len(reusable_content)} previously scraped page(s) available for reuse")
+
+        # Toutes les requêtes Serper (Serper, DVF, HATVP) en un batch parallèle dédupliqué
+        search_results, query_counts = self.query_planner.execute(self.sources, first_name, last_name, company)
+
+        # Contexte par source propre à cette requête (les sources sont partagées entre requêtes)
+        runs = {
+            source.get_name(): SourceRun(search_results.get(source.get_name()), previous_data)
+            for source in self.sources
+        }
+        urls_by_source = self.collect_urls_from_sources(first_name, last_name, company, runs)
 
         # Calculer total URLs générées par toutes les sources
         all_urls = [url for urls in urls_by_source.values() for url in urls]
@@ -243,6 +757,7 @@ class ScraperService:
         # Séparer URLs web normales vs URLs de sources avec API/cache
         web_urls = []
         api_urls = []  # LinkedIn, Pappers, DVF, HATVP (déjà collectées via API)
+        reused_urls = []  # Refresh incrémental: pages déjà scrapées (HEAD conditionnel, pas de re-scraping si inchangées)
         url_to_source = {}
 
         # Sources qui utilisent API/cache (pas besoin de validation URL HTTP)
@@ -250,37 +765,47 @@ class ScraperService:
         # Pappers/DVF/HATVP: URLs fictives "pappers://" avec données en cache
         api_sources = {'linkedin', 'pappers_legal', 'dvf_immobilier', 'hatvp_ppe'}
 
+        # Dédup inter-sources sur la clé canonique: chaque ressource n'est validée/scrapée qu'une fois
+        seen_urls = set()
+
         for source_name, urls in urls_by_source.items():
             for url in urls:
+                url = canonicalize_url(url)
+                key = url_dedup_key(url)
+                if key in seen_urls:
+                    continue
+                seen_urls.add(key)
+
                 url_to_source[url] = source_name
 
                 # v3.1: Ne pas valider URLs de sources API (LinkedIn, Pappers, etc.)
                 # Ces données sont déjà collectées/vérifiées, on veut juste scraper les pages
                 if source_name in api_sources:
                     api_urls.append(url)
+                elif key in reusable_content:
+                    reused_urls.append(url)
                 else:
                     web_urls.append(url)
 
-        print(f"\n=== URL Validation ===")
-        print(f"[URL Validator] URLs à valider: {len(web_urls)} web + {len(api_urls)} API/cached (bypassed)")
-
-        # Valider URLs web (incluant résultats Serper)
-        # v3.1: Augmentation limite à 200 pour tester toutes URLs importantes
-        validated_web_urls = filter_accessible_urls(web_urls, timeout=3, max_concurrent=200) if web_urls else []
-
-        # Combiner URLs validées + URLs API (qui sont déjà vérifiées par les sources)
-        accessible_urls = validated_web_urls + api_urls
+        # Classement: les meilleures candidates sont validées/scrapées en premier
+        url_metadata = {}
+        for run in runs.values():
+            url_metadata.update(run.url_metadata)
+        web_urls = self.url_ranker.rank(web_urls, url_metadata, first_name, last_name, company)
 
-        print(f"[URL Validator] Total accessible: {len(accessible_urls)} ({len(validated_web_urls)} web + {len(api_urls)} API/cached)")
+        # Validation paresseuse: les URLs web ne sont plus toutes validées ici,
+        # mais par lots classés juste avant le scraping (voir _scrape_with_lazy_validation)
+        print(f"\n=== URL Candidates ===")
+        print(f"[Scraper] Candidates: {len(web_urls)} web (lazy validation) + {len(reused_urls)} reused + {len(api_urls)} API/cached (bypassed)")
 
-        if not accessible_urls:
+        if not web_urls and not reused_urls and not api_urls:
             raise Exception(
-                "No accessible URLs found. "
-                "All URLs either timed out or returned errors. "
+                "No candidate URLs found. "
+                "No source returned any URL. "
                 "This could indicate:\n"
                 "1) Network connectivity issues\n"
-                "2) All URLs are invalid/dead\n"
-                "3) Sites are blocking requests"
+                "2) Search APIs are not configured or failing\n"
+                "3) The person has no public footprint"
             )
 
         linkedin_data = None
@@ -313,9 +838,20 @@ class ScraperService:
         if linkedin_data and linkedin_data.get('combined_snippet'):
             print(f"[LinkedIn] ✓ Found {linkedin_data['count']} LinkedIn snippets (Firecrawl doesn't support linkedin.com)")
 
+        # Refresh incrémental: pages en cache revalidées (HEAD conditionnel), les pages modifiées sont re-scrapées
+        # et les pages supprimées (404 / 410) retirées: ni réutilisées, ni re-scrapées
+        reused_pages, changed_urls, gone_urls = self._revalidate_reused(reused_urls, reusable_content)
+        if gone_urls:
+            gone = set(gone_urls)
+            reused_urls = [url for url in reused_urls if url not in gone]
+            for url in gone_urls:
+                reusable_content.pop(url_dedup_key(url), None)
+            print(f"[Incremental] ✗ Dropped {len(gone_urls)} deleted page(s)")
+
         collected_data = {
             "urls_by_source": urls_by_source,
-            "accessible_urls": accessible_urls,
+            "candidate_urls": reused_urls + web_urls,
+            "accessible_urls": reused_urls + list(api_urls),
             "scraped_content": [],
             "sources": [],
             "linkedin_data": linkedin_data,
@@ -324,36 +860,72 @@ class ScraperService:
             "hatvp_data": hatvp_data,
             "stats": {
                 "total_urls_generated": len(all_urls),
-                "accessible": len(accessible_urls),
+                "accessible": len(reused_urls) + len(api_urls),
+                "validated": 0,
+                "skipped_by_ledger": 0,
                 "attempted": 0,
                 "successful": 0,
-                "failed": 0
+                "failed": 0,
+                "reused": 0,
+                "refreshed": 0
             }
         }
 
         max_total_scrapes = int(os.getenv("MAX_TOTAL_SCRAPES", '3'))  # Maximum 3 scrapes
+        scrape_start_time = time.time()
+
+        # Refresh: URLs nouvelles (absentes de la découverte précédente) et pages modifiées d'abord,
+        # les pages en cache inchangées ne complètent que le budget restant
+        previous_keys = set()
+        if previous_data:
+            previous_keys = set(url_dedup_key(url) for url in previous_data.get('candidate_urls', previous_data.get('accessible_urls', [])))
+        new_web_urls = [url for url in web_urls if url_dedup_key(url) not in previous_keys]
+        known_web_urls = [url for url in web_urls if url_dedup_key(url) in previous_keys]
 
         # v3.1: Filtrer URLs fictives (pappers://, dvf://, hatvp://)
         # Ces URLs servent juste de marqueurs pour les données en cache
-        scrapable_urls = [url for url in accessible_urls if url.startswith('http')]
+        trusted_urls = [url for url in api_urls if url.startswith('http')]
+        candidates = changed_urls + new_web_urls + trusted_urls
 
         print(f"\n=== Scraping Queue ===")
-        print(f"[Scraper] Total accessible: {len(accessible_urls)} ({len(scrapable_urls)} HTTP + {len(accessible_urls) - len(scrapable_urls)} cached)")
-        print(f"[Scraper] Will scrape: {min(len(scrapable_urls), max_total_scrapes)} URLs (limit: {max_total_scrapes})")
+        print(f"[Scraper] {len(candidates)} ranked candidates ({len(changed_urls)} changed), {len(reused_pages)} cached, {len(known_web_urls)} known, target: {max_total_scrapes} successful scrapes")
 
-        # v3.1: Scraping parallèle avec ThreadPoolExecutor (Premium supporte 5 jobs simultanés)
-        scrape_start_time = time.time()
+        self._scrape_with_lazy_validation(candidates, set(trusted_urls) | set(changed_urls), collected_data, url_to_source, max_total_scrapes)
 
-        if self.max_concurrent_jobs > 1:
-            print(f"[Firecrawl] ✓ Parallel scraping enabled: {self.max_concurrent_jobs} concurrent jobs")
-            self._scrape_parallel(scrapable_urls[:max_total_scrapes], collected_data, url_to_source, max_total_scrapes)
-        else:
-            print(f"[Firecrawl] Sequential scraping (rate limit: {self.rate_limit_seconds}s)")
-            self._scrape_sequential(scrapable_urls[:max_total_scrapes], collected_data, url_to_source, max_total_scrapes)
+        for url, item in reused_pages.items():
+            if collected_data["stats"]["successful"] >= max_total_scrapes:
+                break
+            collected_data["scraped_content"].append(item)
+            collected_data["sources"].append(url)
+            collected_data["stats"]["successful"] += 1
+            collected_data["stats"]["reused"] += 1
+
+        if collected_data["stats"]["reused"]:
+            print(f"[Incremental] ↺ Reused {collected_data['stats']['reused']} unchanged page(s)")
+
+        if known_web_urls and collected_data["stats"]["successful"] < max_total_scrapes:
+            self._scrape_with_lazy_validation(known_web_urls, set(), collected_data, url_to_source, max_total_scrapes)
+
+        # Date de scraping (If-Modified-Since du prochain refresh), pages réutilisées exclues
+        reused_items = set(id(item) for item in reused_pages.values())
+        for item in collected_data["scraped_content"]:
+            if id(item) not in reused_items:
+                item["scraped_at"] = int(time.time())
+
+        scraped_keys = set(url_dedup_key(url) for url in collected_data["sources"])
+        collected_data["stats"]["refreshed"] = sum(1 for url in changed_urls if url_dedup_key(url) in scraped_keys)
 
         scrape_duration = time.time() - scrape_start_time
         avg_time_per_url = scrape_duration / max(collected_data["stats"]["attempted"], 1)
 
+        # Pages servies par tier (local / firecrawl / scraperapi) pour cette collecte
+        tier_counts: Dict[str, int] = {}
+        for item in collected_data["scraped_content"]:
+            if item.get("tier"):
+                tier_counts[item["tier"]] = tier_counts.get(item["tier"], 0) + 1
+        collected_data["stats"]["tiers"] = tier_counts
+        print(f"[Performance] Pages by tier: {tier_counts}")
+
         print(f"\n[Performance] Scraping completed in {scrape_duration:.1f}s")
         print(f"[Performance] Average: {avg_time_per_url:.1f}s per URL")
         print(f"[Performance] Mode: {'Parallel (' + str(self.max_concurrent_jobs) + ' jobs)' if self.max_concurrent_jobs > 1 else 'Sequential'}")
@@ -363,7 +935,7 @@ class ScraperService:
             collected_data["scraped_content"].append({
                 "source": "linkedin_snippets",
                 "url": ", ".join(linkedin_data.get('urls', [])[:5]),
-                "content": linkedin_data['combined_snippet'][:5000],  # Limiter à 5000 chars
+                "content": linkedin_data['combined_snippet'][:self.content_max_chars],
                 "success": True
             })
             collected_data["stats"]["successful"] += 1
@@ -371,11 +943,18 @@ class ScraperService:
             collected_data["linkedin_urls"] = linkedin_data.get('urls', [])
             print(f"[LinkedIn] ✓ Added {linkedin_data['count']} LinkedIn snippets to analysis")
 
+        self._record_query_yield(query_counts, collected_data, runs)
+        self.domain_ledger.flush()
+
         print(f"\n=== Scraping Stats ===")
         print(f"Attempted: {collected_data['stats']['attempted']}")
         print(f"Successful: {collected_data['stats']['successful']}")
         print(f"Failed: {collected_data['stats']['failed']}")
 
+        if previous_data:
+            collected_data["incremental"] = self._compute_incremental_delta(previous_data, collected_data)
+            print(f"[Incremental] Delta: {collected_data['incremental']}")
+
         if collected_data["stats"]["successful"] == 0:
             raise Exception(
                 "Failed to scrape any valid data. "
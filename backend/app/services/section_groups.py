@@ -0,0 +1,144 @@
+"""
+Analyse parallèle par groupes de sections (map-reduce sur le schéma du profil).
+
+Un seul appel GPT-4o génère les 21 sections l'une après l'autre: la latence est
+dominée par les tokens de sortie. En mode parallèle, le schéma JSON du template
+est découpé en groupes indépendants (identité/business, finances, médias,
+réseau/psychologie). Chaque groupe reçoit un prompt réduit: son fragment de
+schéma et seulement les données utiles. Les groupes tournent en parallèle, puis
+une passe de consolidation légère calcule les sections transverses (scores de
+risque, red flags, cohérence, synthèse) à partir des sections produites.
+
+Le template statique reste l'unique source du schéma et des instructions: le
+préfixe de chaque groupe en est dérivé et ne contient aucune donnée, il est donc
+identique d'une analyse à l'autre (mis en cache par OpenAI). Les données du groupe
+et, pour la consolidation, les sections déjà produites passent par le template
+des données.
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+# Bloc du schéma (ancré sur son premier champ: les exemples du prompt peuvent contenir du JSON)
+SCHEMA_BLOCK = re.compile(r'```json\n(\{\n  "full_name".*?\n\})\n```', re.DOTALL)
+TOP_LEVEL_KEY = re.compile(r'^  "(\w+)":', re.MULTILINE)
+
+# Données transmises à un groupe
+DATA_CONTENT = 'content'
+DATA_PAPPERS = 'pappers'
+DATA_DVF = 'dvf'
+DATA_HATVP = 'hatvp'
+DATA_LINKEDIN = 'linkedin'
+
+
+class SectionGroup(NamedTuple):
+    name: str
+    sections: Tuple[str, ...]
+    data: Tuple[str, ...]
+
+
+SECTION_GROUPS = (
+    SectionGroup(
+        'identity_business',
+        ('full_name', 'current_position', 'company', 'business_ecosystem', 'professional_experience', 'career_timeline'),
+        (DATA_CONTENT, DATA_PAPPERS, DATA_DVF, DATA_HATVP)
+    ),
+    SectionGroup(
+        'financial_legal',
+        ('financial_intelligence', 'pappers_deep_analysis', 'official_records'),
+        (DATA_CONTENT, DATA_PAPPERS, DATA_DVF)
+    ),
+    SectionGroup(
+        'media',
+        ('media_presence', 'publications_and_visibility', 'linkedin_activity_analysis', 'public_contact', 'linkedin_url'),
+        (DATA_CONTENT, DATA_LINKEDIN)
+    ),
+    SectionGroup(
+        'network_psychology',
+        ('psychology_and_approach', 'network_and_influence', 'competitive_intelligence', 'skills'),
+        (DATA_CONTENT, DATA_PAPPERS, DATA_LINKEDIN)
+    ),
+)
+
+# Passe de consolidation: sections transverses calculées à partir des groupes (sans données web brutes)
+CONSOLIDATION_GROUP = SectionGroup(
+    'consolidation',
+    ('risk_assessment', 'red_flags', 'coherence_analysis', 'summary', 'strategic_recommendations'),
+    (DATA_PAPPERS, DATA_HATVP)
+)
+
+# Clé du template → donnée correspondante
+TEMPLATE_DATA_KEYS = {
+    'content_summary': DATA_CONTENT,
+    'pappers_data': DATA_PAPPERS,
+    'dvf_data': DATA_DVF,
+    'hatvp_data': DATA_HATVP,
+    'linkedin_posts': DATA_LINKEDIN,
+    'linkedin_urls': DATA_LINKEDIN,
+}
+
+
+EXCLUDED_CONTENT = "Non transmises pour cette passe (voir SECTIONS DÉJÀ ANALYSÉES)."
+
+
+def get_section_group(section: str) -> SectionGroup:
+    """Groupe (et donc données utiles) d'une section; toutes les données si la section n'est dans aucun groupe"""
+    for group in SECTION_GROUPS + (CONSOLIDATION_GROUP,):
+        if section in group.sections:
+            return group
+    return SectionGroup('all', (section,), tuple(set(TEMPLATE_DATA_KEYS.values())))
+
+
+def get_group_prompt_data(prompt_data: Dict, group: SectionGroup) -> Dict:
+    """Variables du template restreintes aux données du groupe"""
+    group_data = dict(prompt_data)
+
+    for key, data_type in TEMPLATE_DATA_KEYS.items():
+        if data_type not in group.data:
+            group_data[key] = EXCLUDED_CONTENT if key == 'content_summary' else None
+
+    return group_data
+
+
+def split_schema(prompt: str) -> Tuple[str, Dict[str, str], str]:
+    """
+    Découpe le prompt statique autour du bloc ```json du schéma.
+
+    Returns:
+        (texte avant le schéma, {section: fragment de schéma}, texte après)
+    """
+    match = SCHEMA_BLOCK.search(prompt)
+    if not match:
+        raise ValueError("Schema block not found in prompt template")
+
+    schema = match.group(1)
+    keys = list(TOP_LEVEL_KEY.finditer(schema))
+    fragments = {}
+
+    for index, key_match in enumerate(keys):
+        end = keys[index + 1].start() if index + 1 < len(keys) else schema.rstrip().rfind('}')
+        fragments[key_match.group(1)] = schema[key_match.start():end].rstrip().rstrip(',')
+
+    return prompt[:match.start()], fragments, prompt[match.end():]
+
+
+def build_group_prompt(prompt: str, group: SectionGroup) -> str:
+    """Préfixe statique du groupe: mêmes instructions, schéma limité à ses sections"""
+    before, fragments, after = split_schema(prompt)
+
+    missing = [section for section in group.sections if section not in fragments]
+    if missing:
+        raise ValueError(f"Sections {missing} not found in prompt template schema")
+
+    schema = "{\n" + ",\n\n".join(fragments[section] for section in group.sections) + "\n}"
+    scope = (
+        f"\n**PÉRIMÈTRE DE CETTE ANALYSE:** génère UNIQUEMENT les champs suivants: "
+        f"{', '.join(group.sections)}. Les autres sections du profil sont produites séparément.\n"
+    )
+
+    return f"{before}{scope}\n```json\n{schema}\n```{after}"
+
+
+def get_schema_order(prompt: str) -> List[str]:
+    """Ordre des sections dans le schéma du template (ordre du profil final)"""
+    return list(split_schema(prompt)[1])
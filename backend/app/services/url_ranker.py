@@ -0,0 +1,114 @@
+"""
+URL ranker - classement des URLs candidates avant validation et scraping.
+
+Score additif par URL:
+- Position Serper (meilleure position parmi les requêtes ayant renvoyé l'URL)
+- Nom complet / nom de famille / entreprise présents dans le titre ou le snippet
+- Catégorie de domaine (registre légal, presse, site de l'entreprise)
+- Historique du domaine (taux de succès de scraping, via DomainLedger)
+
+Les URLs sans métadonnées (sources hors Serper) gardent un score neutre.
+"""
+
+from typing import List, Dict
+from app.services.domain_ledger import DomainLedger
+from app.utils.name_normalizer import normalize_person_name, normalize_company_name
+from app.utils.url_validator import get_domain
+
+REGISTRY_DOMAINS = (
+    'societe.com', 'infogreffe.fr', 'pappers.fr', 'verif.com', 'legifrance.gouv.fr',
+    'bodacc.fr', 'annuaire-entreprises.data.gouv.fr', 'manageo.fr', 'score3.fr',
+)
+
+PRESS_DOMAINS = (
+    'lesechos.fr', 'lefigaro.fr', 'lemonde.fr', 'latribune.fr', 'challenges.fr',
+    'capital.fr', 'bfmtv.com', 'usinenouvelle.com', 'journaldunet.com', 'maddyness.com',
+    'frenchweb.fr', 'decideurs-magazine.com', 'cfnews.net', 'lopinion.fr', 'liberation.fr',
+    'ouest-france.fr', 'leparisien.fr', 'forbes.fr', 'lexpress.fr', 'lepoint.fr',
+)
+
+# Labels Serper dont les résultats sont des articles de presse
+PRESS_LABELS = {'news', 'media', 'tech_media', 'podcasts'}
+
+WEIGHTS = {
+    'position': 2.0,
+    'name_in_title': 3.0,
+    'name_in_snippet': 2.0,
+    'last_name_only': 1.0,
+    'company_mention': 1.5,
+    'registry': 2.0,
+    'press': 1.5,
+    'company_site': 2.5,
+    'domain_history': 4.0,
+}
+
+
+def _domain_matches(domain: str, candidates) -> bool:
+    return any(domain == d or domain.endswith('.' + d) for d in candidates)
+
+
+class UrlRanker:
+    def __init__(self, ledger: DomainLedger = None):
+        self.ledger = ledger or DomainLedger()
+
+    def score(self, url: str, metadata: Dict, names: Dict, domain_usefulness: Dict[str, float]) -> float:
+        domain = get_domain(url).lower()
+        score = 0.0
+
+        position = metadata.get('position')
+        if position is not None:
+            # Position 1 → poids plein, décroît jusqu'à 0 vers la position 21
+            score += WEIGHTS['position'] * max(0.0, 1 - (position - 1) / 20)
+
+        title = normalize_person_name(metadata.get('title', ''))
+        snippet = normalize_person_name(metadata.get('snippet', ''))
+
+        if names['full_name'] and names['full_name'] in title:
+            score += WEIGHTS['name_in_title']
+        elif names['full_name'] and names['full_name'] in snippet:
+            score += WEIGHTS['name_in_snippet']
+        elif names['last_name'] and (names['last_name'] in title or names['last_name'] in snippet):
+            score += WEIGHTS['last_name_only']
+
+        if names['company'] and (names['company'] in title or names['company'] in snippet):
+            score += WEIGHTS['company_mention']
+
+        if _domain_matches(domain, REGISTRY_DOMAINS):
+            score += WEIGHTS['registry']
+        elif _domain_matches(domain, PRESS_DOMAINS) or metadata.get('label') in PRESS_LABELS:
+            score += WEIGHTS['press']
+        elif names['company_token'] and names['company_token'] in domain.replace('-', ''):
+            score += WEIGHTS['company_site']
+
+        # Historique: centré sur 0.5 (domaine inconnu = neutre)
+        if domain in domain_usefulness:
+            score += WEIGHTS['domain_history'] * (domain_usefulness[domain] - 0.5)
+
+        return score
+
+    def rank(self, urls: List[str], url_metadata: Dict[str, Dict], first_name: str, last_name: str, company: str) -> List[str]:
+        """Retourne les URLs triées par score décroissant (ordre d'origine conservé à score égal)"""
+        if not urls:
+            return []
+
+        company_normalized = normalize_company_name(company)
+        names = {
+            'full_name': normalize_person_name(f"{first_name} {last_name}"),
+            'last_name': normalize_person_name(last_name),
+            'company': company_normalized,
+            # Site de l'entreprise: "msdev" dans "msdev.fr", "mon-entreprise" → "monentreprise"
+            'company_token': company_normalized.replace(' ', '') if len(company_normalized) >= 4 else '',
+        }
+
+        domain_usefulness = self.ledger.get_usefulness([get_domain(url).lower() for url in urls])
+
+        scores = {
+            url: self.score(url, url_metadata.get(url, {}), names, domain_usefulness)
+            for url in urls
+        }
+        ranked = sorted(urls, key=lambda url: scores[url], reverse=True)
+
+        for url in ranked[:5]:
+            print(f"[Ranker] {scores[url]:.2f} {url}")
+
+        return ranked
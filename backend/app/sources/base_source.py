@@ -1,9 +1,64 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Dict, NamedTuple, Optional
+
+
+class SearchQuery(NamedTuple):
+    """Requête Serper déclarée par une source (exécutée par le QueryPlanner)"""
+    label: str
+    query: str
+    num_results: int
+    endpoint: str = 'search'  # 'search' (Google) ou 'news' (Google News)
+    compliance: bool = False  # Contrôle de conformité (PPE, DVF, justice): jamais élagué par le planner
+
+
+class SourceRun:
+    """
+    Contexte d'un appel get_urls pour une requête de profil.
+    Les sources sont des singletons partagés entre requêtes concurrentes (workers gevent):
+    les données propres à la requête transitent par ce contexte, jamais par la source.
+    """
+
+    def __init__(self, search_results: Optional[Dict[str, Dict]] = None, previous_data: Optional[Dict] = None):
+        self.search_results = search_results  # Résultats Serper par label, pré-calculés par le QueryPlanner
+        self.previous_data = previous_data  # scraped_data du cache (refresh incrémental)
+
+        # Contribution par label: URLs ajoutées à la file de scraping et snippets retenus
+        self.label_urls: Dict[str, set] = {}
+        self.label_snippets: Dict[str, int] = {}
+        # Métadonnées de recherche par URL (utilisées par l'UrlRanker)
+        self.url_metadata: Dict[str, Dict] = {}
+
+    def track_label_url(self, label: str, url: str):
+        self.label_urls.setdefault(label, set()).add(url)
+
+    def track_url_metadata(self, url: str, label: str, item: Dict):
+        """Conserve label, position, titre et snippet (meilleure position si l'URL revient)"""
+        position = item.get('position', 999)
+        existing = self.url_metadata.get(url)
+        if existing and existing['position'] <= position:
+            return
+
+        self.url_metadata[url] = {
+            'label': label,
+            'position': position,
+            'title': item.get('title', ''),
+            'snippet': item.get('snippet', '')
+        }
+
+    def track_label_snippet(self, label: str, count: int = 1):
+        self.label_snippets[label] = self.label_snippets.get(label, 0) + count
+
+    def get_label_yield(self, used_urls: set) -> Dict[str, int]:
+        """Nombre d'éléments effectivement utilisés par label (URLs scrapées + snippets retenus)"""
+        return {
+            label: len(self.label_urls.get(label, set()) & used_urls) + self.label_snippets.get(label, 0)
+            for label in set(self.label_urls) | set(self.label_snippets)
+        }
+
 
 class BaseSource(ABC):
     @abstractmethod
-    def get_urls(self, first_name: str, last_name: str, company: str) -> List[str]:
+    def get_urls(self, first_name: str, last_name: str, company: str, run: Optional[SourceRun] = None) -> List[str]:
         pass
 
     @classmethod
@@ -18,3 +73,10 @@ class BaseSource(ABC):
     def build_search_query(self, *terms) -> str:
         from urllib.parse import quote_plus
         return quote_plus(" ".join(str(term) for term in terms if term))
+
+    def get_search_queries(self, first_name: str, last_name: str, company: str) -> List[SearchQuery]:
+        """
+        Requêtes Serper nécessaires à la source. Le QueryPlanner les déduplique et les exécute
+        dans un batch parallèle commun, puis transmet les résultats à get_urls via SourceRun.
+        """
+        return []
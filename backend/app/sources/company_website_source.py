@@ -1,5 +1,5 @@
-from typing import List
-from app.sources.base_source import BaseSource
+from typing import List, Optional
+from app.sources.base_source import BaseSource, SourceRun
 
 class CompanyWebsiteSource(BaseSource):
     @classmethod
@@ -10,7 +10,7 @@ class CompanyWebsiteSource(BaseSource):
     def get_description(cls) -> str:
         return "Pages web d'entreprise (équipe, à propos, leadership)"
 
-    def get_urls(self, first_name: str, last_name: str, company: str) -> List[str]:
+    def get_urls(self, first_name: str, last_name: str, company: str, run: Optional[SourceRun] = None) -> List[str]:
         urls = []
         domains = self._guess_company_domains(company)
 
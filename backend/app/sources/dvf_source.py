@@ -5,7 +5,8 @@ Alternative gratuite à Pappers parcelles_detenues (15 crédits)
 """
 
 from typing import List, Dict, Optional
-from app.sources.base_source import BaseSource
+from app.sources.base_source import BaseSource, SearchQuery, SourceRun
+from app.utils.url_canonicalizer import url_dedup_key
 
 
 class DVFSource(BaseSource):
@@ -28,10 +29,21 @@ class DVFSource(BaseSource):
     def get_description(cls) -> str:
         return "Transactions immobilières publiques (DVF - data.gouv.fr)"
 
-    def get_urls(self, first_name: str, last_name: str, company: str) -> List[str]:
+    def get_search_queries(self, first_name: str, last_name: str, company: str) -> List[SearchQuery]:
+        full_name = f"{first_name} {last_name}"
+
+        return [
+            # Query 1: Mentions immobilières générales
+            SearchQuery('real_estate', f'"{full_name}" (immobilier OR "achat immobilier" OR "vente immobilier" OR propriétaire OR patrimoine)', 5, compliance=True),
+            # Query 2: Site DVF direct (si mention dans presse)
+            SearchQuery('dvf_site', f'site:app.dvf.etalab.gouv.fr "{full_name}" OR "{last_name}"', 3, compliance=True),
+        ]
+
+    def get_urls(self, first_name: str, last_name: str, company: str, run: Optional[SourceRun] = None) -> List[str]:
         """
         DVF API nécessite adresse exacte, pas de recherche par nom
         On utilise Serper pour détecter mentions immobilières dans la presse
+        (requêtes exécutées par le QueryPlanner, ou ici en autonome)
         """
         from app.sources.serper_search_source import SerperSearchSource
 
@@ -40,35 +52,47 @@ class DVFSource(BaseSource):
         serper = SerperSearchSource()
         full_name = f"{first_name} {last_name}"
         dvf_snippets = []
+        seen_urls = set()  # Même page renvoyée par plusieurs requêtes
+        run = run or SourceRun()
+
+        results_map = run.search_results
+        if results_map is None:
+            results_map = serper.run_queries(self.get_search_queries(first_name, last_name, company))
 
         # Query 1: Mentions immobilières générales
-        query_real_estate = f'"{full_name}" (immobilier OR "achat immobilier" OR "vente immobilier" OR propriétaire OR patrimoine)'
-        results = serper.search_google(query_real_estate, num_results=5)
+        results = results_map.get('real_estate')
 
         if results:
             extracted = serper.extract_urls_and_snippets(results)
             for item in extracted:
+                if url_dedup_key(item['url']) in seen_urls:
+                    continue
                 if item['snippet']:
                     dvf_snippets.append({
                         'url': item['url'],
                         'snippet': item['snippet'],
                         'title': item['title']
                     })
+                    seen_urls.add(url_dedup_key(item['url']))
+                    run.track_label_snippet('real_estate')
                     print(f"[DVF] ✓ Real estate mention: {item['title'][:50]}")
 
         # Query 2: Site DVF direct (si mention dans presse)
-        query_dvf_site = f'site:app.dvf.etalab.gouv.fr "{full_name}" OR "{last_name}"'
-        results_dvf = serper.search_google(query_dvf_site, num_results=3)
+        results_dvf = results_map.get('dvf_site')
 
         if results_dvf:
             extracted_dvf = serper.extract_urls_and_snippets(results_dvf)
             for item in extracted_dvf:
+                if url_dedup_key(item['url']) in seen_urls:
+                    continue
                 if item['snippet']:
                     dvf_snippets.append({
                         'url': item['url'],
                         'snippet': item['snippet'],
                         'title': item['title']
                     })
+                    seen_urls.add(url_dedup_key(item['url']))
+                    run.track_label_snippet('dvf_site')
                     print(f"[DVF] ✓ DVF direct mention: {item['title'][:50]}")
 
         # Stocker les snippets pour analyse
@@ -5,7 +5,8 @@ Alternative gratuite à Pappers personne_politiquement_exposee (1 crédit)
 """
 
 from typing import List, Dict, Optional
-from app.sources.base_source import BaseSource
+from app.sources.base_source import BaseSource, SearchQuery, SourceRun
+from app.utils.url_canonicalizer import url_dedup_key
 
 
 class HAVTPSource(BaseSource):
@@ -30,10 +31,23 @@ class HAVTPSource(BaseSource):
     def get_description(cls) -> str:
         return "Personnes Politiquement Exposées - HATVP"
 
-    def get_urls(self, first_name: str, last_name: str, company: str) -> List[str]:
+    def get_search_queries(self, first_name: str, last_name: str, company: str) -> List[SearchQuery]:
+        full_name = f"{first_name} {last_name}"
+
+        return [
+            # Query 1: Site HATVP direct
+            SearchQuery('hatvp_site', f'site:hatvp.fr "{full_name}"', 5, compliance=True),
+            # Query 2: Déclarations d'intérêts (élargi)
+            SearchQuery('declarations', f'"{full_name}" ("déclaration d\'intérêts" OR "déclaration de patrimoine" OR "élu" OR "mandat électif" OR "fonction publique")', 5, compliance=True),
+            # Query 3: Assemblée Nationale / Sénat
+            SearchQuery('parliament', f'site:assemblee-nationale.fr OR site:senat.fr "{full_name}"', 3, compliance=True),
+        ]
+
+    def get_urls(self, first_name: str, last_name: str, company: str, run: Optional[SourceRun] = None) -> List[str]:
         """
         Recherche HATVP via Serper pour détecter PPE
         Pas d'API publique, on utilise Google Search
+        (requêtes exécutées par le QueryPlanner, ou ici en autonome)
         """
         from app.sources.serper_search_source import SerperSearchSource
 
@@ -42,14 +56,21 @@ class HAVTPSource(BaseSource):
         serper = SerperSearchSource()
         full_name = f"{first_name} {last_name}"
         hatvp_snippets = []
+        seen_urls = set()  # Même page renvoyée par plusieurs requêtes
+        run = run or SourceRun()
+
+        results_map = run.search_results
+        if results_map is None:
+            results_map = serper.run_queries(self.get_search_queries(first_name, last_name, company))
 
         # Query 1: Site HATVP direct
-        query_hatvp = f'site:hatvp.fr "{full_name}"'
-        results = serper.search_google(query_hatvp, num_results=5)
+        results = results_map.get('hatvp_site')
 
         if results:
             extracted = serper.extract_urls_and_snippets(results)
             for item in extracted:
+                if url_dedup_key(item['url']) in seen_urls:
+                    continue
                 if item['snippet']:
                     hatvp_snippets.append({
                         'url': item['url'],
@@ -57,15 +78,18 @@ class HAVTPSource(BaseSource):
                         'title': item['title'],
                         'source': 'HATVP'
                     })
+                    seen_urls.add(url_dedup_key(item['url']))
+                    run.track_label_snippet('hatvp_site')
                     print(f"[HATVP] ✓ PPE mention found: {item['title'][:50]}")
 
         # Query 2: Déclarations d'intérêts (élargi)
-        query_declaration = f'"{full_name}" ("déclaration d\'intérêts" OR "déclaration de patrimoine" OR "élu" OR "mandat électif" OR "fonction publique")'
-        results_decl = serper.search_google(query_declaration, num_results=5)
+        results_decl = results_map.get('declarations')
 
         if results_decl:
             extracted_decl = serper.extract_urls_and_snippets(results_decl)
             for item in extracted_decl:
+                if url_dedup_key(item['url']) in seen_urls:
+                    continue
                 if item['snippet'] and 'hatvp' in item['url'].lower() or 'élu' in item['snippet'].lower() or 'mandat' in item['snippet'].lower():
                     hatvp_snippets.append({
                         'url': item['url'],
@@ -73,15 +97,18 @@ class HAVTPSource(BaseSource):
                         'title': item['title'],
                         'source': 'Public declaration'
                     })
+                    seen_urls.add(url_dedup_key(item['url']))
+                    run.track_label_snippet('declarations')
                     print(f"[HATVP] ✓ Political activity mention: {item['title'][:50]}")
 
         # Query 3: Assemblée Nationale / Sénat
-        query_parlement = f'site:assemblee-nationale.fr OR site:senat.fr "{full_name}"'
-        results_parl = serper.search_google(query_parlement, num_results=3)
+        results_parl = results_map.get('parliament')
 
         if results_parl:
             extracted_parl = serper.extract_urls_and_snippets(results_parl)
             for item in extracted_parl:
+                if url_dedup_key(item['url']) in seen_urls:
+                    continue
                 if item['snippet']:
                     hatvp_snippets.append({
                         'url': item['url'],
@@ -89,6 +116,8 @@ class HAVTPSource(BaseSource):
                         'title': item['title'],
                         'source': 'Parliament'
                     })
+                    seen_urls.add(url_dedup_key(item['url']))
+                    run.track_label_snippet('parliament')
                     print(f"[HATVP] ✓ Parliament mention: {item['title'][:50]}")
 
         # Stocker les résultats
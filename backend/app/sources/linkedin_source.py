@@ -1,5 +1,5 @@
-from typing import List
-from app.sources.base_source import BaseSource
+from typing import List, Optional
+from app.sources.base_source import BaseSource, SourceRun
 
 class LinkedInSource(BaseSource):
     @classmethod
@@ -10,7 +10,7 @@ class LinkedInSource(BaseSource):
     def get_description(cls) -> str:
         return "Recherche de profils LinkedIn (taux de succès variable)"
 
-    def get_urls(self, first_name: str, last_name: str, company: str) -> List[str]:
+    def get_urls(self, first_name: str, last_name: str, company: str, run: Optional[SourceRun] = None) -> List[str]:
         """
         Returns LinkedIn URLs to scrape including profile and activity pages.
 
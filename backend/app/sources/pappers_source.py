@@ -5,9 +5,9 @@ API: https://www.pappers.fr/api/documentation
 """
 
 from typing import List, Dict, Optional
-import requests
 import os
-from app.sources.base_source import BaseSource
+from app.sources.base_source import BaseSource, SourceRun
+from app.utils.http_client import get_http_client
 
 
 class PappersSource(BaseSource):
@@ -42,12 +42,35 @@ class PappersSource(BaseSource):
         self.include_bodacc_person = os.getenv('PAPPERS_INCLUDE_BODACC_PERSON', 'true').lower() == 'true'
 
         self.pappers_data = None  # Cache pour éviter multiple appels
+        self.http = get_http_client()
 
         # Log de la configuration
         if self.api_key:
             print(f"[Pappers] Mode: {self.mode} | Decisions: {self.include_decisions} | Parcelles: {self.include_parcelles} | BODACC: {self.include_bodacc_person}")
 
-    def get_urls(self, first_name: str, last_name: str, company: str) -> List[str]:
+    def _get_previous_economic_data(self, previous_data: Optional[Dict], siren: str, search_result: Dict) -> Optional[Dict]:
+        """
+        Refresh incrémental: retourne les economic_data des données Pappers du cache si l'entreprise
+        n'a pas été mise à jour depuis (pas de nouvel appel /entreprise, pas de crédits consommés).
+        """
+        if not previous_data or not siren:
+            return None
+
+        search_update = search_result.get('derniere_mise_a_jour')
+        if not search_update:
+            return None
+
+        for previous_company in previous_data.get('companies', []):
+            if previous_company.get('siren') != siren:
+                continue
+
+            economic_data = previous_company.get('economic_data')
+            if economic_data and economic_data.get('derniere_mise_a_jour') == search_update:
+                return economic_data
+
+        return None
+
+    def get_urls(self, first_name: str, last_name: str, company: str, run: Optional[SourceRun] = None) -> List[str]:
         """
         Pappers ne fournit pas d'URLs à scraper mais des données API
         On retourne une URL fictive pour signaler qu'on a des données
@@ -61,7 +84,8 @@ class PappersSource(BaseSource):
             return []
 
         # Recherche des entreprises (3 premiers résultats)
-        companies_data = self._search_companies(company, first_name, last_name)
+        previous_data = ((run.previous_data if run else None) or {}).get('pappers_data')
+        companies_data = self._search_companies(company, first_name, last_name, previous_data)
         if not companies_data:
             print(f"[Pappers] ✗ No companies found for: {company}")
             return []
@@ -88,7 +112,7 @@ class PappersSource(BaseSource):
         # Retourner une URL fictive pour signaler qu'on a des données
         return [f"pappers://legal-data/{company}"]
 
-    def _search_companies(self, company_name: str, first_name: str, last_name: str) -> List[Dict]:
+    def _search_companies(self, company_name: str, first_name: str, last_name: str, previous_data: Optional[Dict] = None) -> List[Dict]:
         """Recherche les 3 premières entreprises correspondantes et enrichit les données"""
         try:
             url = f"{self.API_BASE_URL}/recherche"
@@ -100,7 +124,7 @@ class PappersSource(BaseSource):
                 'par_page': 3  # Les 3 premiers résultats
             }
 
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self.http.get(url, provider='pappers', params=params, headers=headers)
             response.raise_for_status()
             data = response.json()
 
@@ -125,7 +149,11 @@ class PappersSource(BaseSource):
 
                     # Récupérer détails économiques (si SIREN valide)
                     if siren:
-                        economic_data = self._get_company_details(siren, first_name, last_name)
+                        economic_data = self._get_previous_economic_data(previous_data, siren, company)
+                        if economic_data:
+                            print(f"[Pappers] ↺ SIREN {siren} unchanged since {economic_data.get('derniere_mise_a_jour')}, reusing cached details")
+                        else:
+                            economic_data = self._get_company_details(siren, first_name, last_name)
                         if economic_data:
                             enriched_company['economic_data'] = economic_data
 
@@ -170,7 +198,7 @@ class PappersSource(BaseSource):
             }
 
             print(f"[Pappers BODACC] Searching publications for {clean_first} {clean_last}")
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self.http.get(url, provider='pappers', params=params, headers=headers)
 
             # Si 400, l'API n'a pas trouvé ou paramètres invalides
             if response.status_code == 400:
@@ -266,7 +294,7 @@ class PappersSource(BaseSource):
             print(f"[Pappers] Fetching details for SIREN {siren} (~{1 + credits_cost} credits)")
             print(f"[Pappers] Champs demandés: {', '.join(champs_supplementaires)}")
 
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self.http.get(url, provider='pappers', params=params, headers=headers)
             response.raise_for_status()
             data = response.json()
 
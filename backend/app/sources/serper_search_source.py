@@ -1,15 +1,21 @@
 import os
-import requests
 from typing import List, Dict, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
-from app.sources.base_source import BaseSource
+from app.sources.base_source import BaseSource, SearchQuery, SourceRun
+from app.utils.http_client import get_http_client
+from app.utils.url_canonicalizer import canonicalize_url, url_dedup_key
+from app.utils.name_normalizer import normalize_person_name
 
 class SerperSearchSource(BaseSource):
     def __init__(self):
         self.api_key = os.getenv('SERPER_API_KEY')
         self.base_url = "https://google.serper.dev/search"
         self.news_url = "https://google.serper.dev/news"
+        self.http = get_http_client()
+
+        # Pages Serper récupérées en parallèle par requête (1 = séquentiel)
+        self.page_concurrency = int(os.getenv('SERPER_PAGE_CONCURRENCY', '5'))
 
     @classmethod
     def get_name(cls) -> str:
@@ -19,64 +25,88 @@ class SerperSearchSource(BaseSource):
     def get_description(cls) -> str:
         return "ReEn cherche Google via Serper API (web + news + snippets)"
 
-    def search_google(self, query: str, num_results: int = 10) -> Optional[Dict]:
+    def _fetch_page(self, endpoint_url: str, result_key: str, query: str, page: int, log_prefix: str) -> Optional[List[Dict]]:
+        """Récupère une page de résultats Serper (None si erreur HTTP)"""
+        headers = {
+            'X-API-KEY': self.api_key,
+            'Content-Type': 'application/json'
+        }
+
+        payload = {
+            'q': query,
+            'page': page,
+            'num': 10,  # Max 10 par page
+            'gl': 'fr',
+        }
+
+        response = self.http.post(
+            endpoint_url,
+            provider='serper',
+            headers=headers,
+            json=payload
+        )
+
+        if response.status_code != 200:
+            print(f"{log_prefix} ✗ Page {page} Error {response.status_code}")
+            return None
+
+        return response.json().get(result_key, [])
+
+    def _search_paginated(self, endpoint_url: str, result_key: str, query: str, num_results: int, log_prefix: str, unit: str) -> List[Dict]:
         """
-        Recherche Google via Serper
-        Note: Serper retourne max 10 résultats par page, utilise pagination pour plus
+        Pagination Serper parallèle avec arrêt anticipé.
+
+        Serper retourne max 10 résultats par page: les pages 2..N sont lancées en parallèle
+        de la page 1 (spéculativement). Les résultats sont fusionnés dans l'ordre des pages;
+        dès qu'une page revient avec moins de 10 résultats, les pages suivantes sont annulées
+        (ou ignorées si déjà en vol).
         """
-        if not self.api_key:
-            print("[Serper] API key not configured, skipping")
-            return None
+        num_pages = (num_results + 9) // 10  # Arrondi supérieur
+        print(f"{log_prefix} Searching: {query} ({num_results} {unit} via {num_pages} page(s))")
+
+        all_results = []
+        executor = ThreadPoolExecutor(max_workers=max(1, min(num_pages, self.page_concurrency)))
 
         try:
-            headers = {
-                'X-API-KEY': self.api_key,
-                'Content-Type': 'application/json'
+            future_by_page = {
+                page: executor.submit(self._fetch_page, endpoint_url, result_key, query, page, log_prefix)
+                for page in range(1, num_pages + 1)
             }
 
-            # Serper retourne max 10 résultats par page
-            # Pour avoir plus, il faut paginer
-            num_pages = (num_results + 9) // 10  # Arrondi supérieur
-            all_results = []
-
             for page in range(1, num_pages + 1):
-                payload = {
-                    'q': query,
-                    'page': page,
-                    'num': 10,  # Max 10 par page
-                    'gl': 'fr',
-                }
-
-                if page == 1:
-                    print(f"[Serper] Searching: {query} ({num_results} results via {num_pages} page(s))")
-
-                response = requests.post(
-                    self.base_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=10
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    organic = data.get('organic', [])
-                    all_results.extend(organic)
-
-                    if page == 1:
-                        print(f"[Serper] ✓ Page 1: {len(organic)} results")
-                    else:
-                        print(f"[Serper] ✓ Page {page}: {len(organic)} results")
+                results = future_by_page[page].result()
 
-                    # Si moins de 10 résultats, pas de page suivante
-                    if len(organic) < 10:
-                        break
-                else:
-                    print(f"[Serper] ✗ Page {page} Error {response.status_code}")
+                if results is not None:
+                    all_results.extend(results)
+                    print(f"{log_prefix} ✓ Page {page}: {len(results)} {unit}")
+
+                # Erreur ou moins de 10 résultats: pas de page suivante
+                if results is None or len(results) < 10:
+                    cancelled = sum(1 for later in range(page + 1, num_pages + 1) if future_by_page[later].cancel())
+                    if page < num_pages:
+                        print(f"{log_prefix} ⚡ Early stop after page {page} ({cancelled} page(s) cancelled)")
                     break
+        finally:
+            # Ne pas attendre les pages spéculatives encore en vol
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return all_results[:num_results]  # Limiter au nombre demandé
+
+    def search_google(self, query: str, num_results: int = 10) -> Optional[Dict]:
+        """
+        Recherche Google via Serper
+        Note: Serper retourne max 10 résultats par page, pagination parallèle pour plus
+        """
+        if not self.api_key:
+            print("[Serper] API key not configured, skipping")
+            return None
+
+        try:
+            organic = self._search_paginated(self.base_url, 'organic', query, num_results, "[Serper]", "results")
 
             # Retourner au format Serper standard
             return {
-                'organic': all_results[:num_results],  # Limiter au nombre demandé
+                'organic': organic,
                 'searchParameters': {'q': query, 'num': num_results}
             }
 
@@ -87,58 +117,17 @@ class SerperSearchSource(BaseSource):
     def search_news(self, query: str, num_results: int = 10) -> Optional[Dict]:
         """
         Recherche Google News via Serper
-        Note: Serper retourne max 10 résultats par page, utilise pagination pour plus
+        Note: Serper retourne max 10 résultats par page, pagination parallèle pour plus
         """
         if not self.api_key:
             print("[Serper News] API key not configured, skipping")
             return None
 
         try:
-            headers = {
-                'X-API-KEY': self.api_key,
-                'Content-Type': 'application/json'
-            }
-
-            # Pagination pour obtenir plus de 10 résultats
-            num_pages = (num_results + 9) // 10
-            all_news = []
-
-            for page in range(1, num_pages + 1):
-                payload = {
-                    'q': query,
-                    'page': page,
-                    'num': 10,
-                    'gl': 'fr',
-                }
-
-                if page == 1:
-                    print(f"[Serper News] Searching: {query} ({num_results} articles via {num_pages} page(s))")
-
-                response = requests.post(
-                    self.news_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=10
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    news = data.get('news', [])
-                    all_news.extend(news)
-
-                    if page == 1:
-                        print(f"[Serper News] ✓ Page 1: {len(news)} articles")
-                    else:
-                        print(f"[Serper News] ✓ Page {page}: {len(news)} articles")
-
-                    if len(news) < 10:
-                        break
-                else:
-                    print(f"[Serper News] ✗ Page {page} Error {response.status_code}")
-                    break
+            news = self._search_paginated(self.news_url, 'news', query, num_results, "[Serper News]", "articles")
 
             return {
-                'news': all_news[:num_results],
+                'news': news,
                 'searchParameters': {'q': query, 'num': num_results}
             }
 
@@ -153,7 +142,8 @@ class SerperSearchSource(BaseSource):
         results = search_results.get('news', []) if is_news else search_results.get('organic', [])
 
         for result in results:
-            url = result.get('link')
+            # Forme canonique: tracking params, AMP, fr.linkedin.com, slash final...
+            url = canonicalize_url(result.get('link'))
             snippet = result.get('snippet', '')
             title = result.get('title', '')
 
@@ -189,79 +179,78 @@ class SerperSearchSource(BaseSource):
 
         return True
 
-    def get_urls(self, first_name: str, last_name: str, company: str) -> List[str]:
-        """
-        v3.1: Parallélisé pour -75% de temps (20s → 5s)
-        Exécute toutes les requêtes Serper en parallèle avec ThreadPoolExecutor
-        """
-        start_time = time.time()
+    def get_search_queries(self, first_name: str, last_name: str, company: str) -> List[SearchQuery]:
+        """Déclare toutes les requêtes Serper de la source (exécutées par le QueryPlanner)"""
         full_name = f"{first_name} {last_name}"
         last_name_only = last_name
         linkedin_slug = f"{first_name.lower()}-{last_name.lower()}".replace(' ', '-')
 
-        scrapable_urls = []
-        linkedin_profiles = []
-
-        # ========== PHASE 1: Préparer TOUTES les requêtes (batching) ==========
         queries_batch = []
 
         # Query 1: Recherche générale
-        queries_batch.append(('general', f'{full_name} {company}', 50, 'search'))
+        queries_batch.append(SearchQuery('general', f'{full_name} {company}', 50, 'search'))
 
         # Query 2: Google News
-        queries_batch.append(('news', f'{full_name} {company}', 30, 'news'))
+        queries_batch.append(SearchQuery('news', f'{full_name} {company}', 30, 'news'))
 
         # Query 3: Twitter/X
-        queries_batch.append(('twitter', f'site:twitter.com OR site:x.com "{full_name}" {company}', 10, 'search'))
+        queries_batch.append(SearchQuery('twitter', f'site:twitter.com OR site:x.com "{full_name}" {company}', 10, 'search'))
 
         # Query 4: Sites officiels français
         queries_batch.extend([
-            ('legifrance', f'site:legifrance.gouv.fr "{full_name}" OR "{last_name_only}"', 10, 'search'),
-            ('infogreffe', f'site:infogreffe.fr "{full_name}" OR "{company}"', 10, 'search'),
-            ('societe', f'site:societe.com "{company}"', 10, 'search'),
-            ('verif', f'site:verif.com "{company}"', 10, 'search'),
+            SearchQuery('legifrance', f'site:legifrance.gouv.fr "{full_name}" OR "{last_name_only}"', 10, 'search', compliance=True),
+            SearchQuery('infogreffe', f'site:infogreffe.fr "{full_name}" OR "{company}"', 10, 'search', compliance=True),
+            SearchQuery('societe', f'site:societe.com "{company}"', 10, 'search'),
+            SearchQuery('verif', f'site:verif.com "{company}"', 10, 'search'),
         ])
 
         # Query 5: Recherches complémentaires
         queries_batch.extend([
-            ('roles', f'{full_name} {company} (CEO OR CTO OR CFO OR Director OR Manager OR Président OR Gérant)', 20, 'search'),
-            ('media', f'"{full_name}" interview OR article OR tribune', 15, 'search'),
-            ('team', f'{company} "{last_name_only}" équipe OR team OR about', 15, 'search'),
+            SearchQuery('roles', f'{full_name} {company} (CEO OR CTO OR CFO OR Director OR Manager OR Président OR Gérant)', 20, 'search'),
+            SearchQuery('media', f'"{full_name}" interview OR article OR tribune', 15, 'search'),
+            SearchQuery('team', f'{company} "{last_name_only}" équipe OR team OR about', 15, 'search'),
         ])
 
         # Query 6: LinkedIn Posts & Activity
         queries_batch.extend([
-            ('linkedin_posts', f'site:linkedin.com/posts/{first_name.lower()}-{last_name.lower()}', 20, 'search'),
-            ('linkedin_activity', f'site:linkedin.com/in/{linkedin_slug}/recent-activity', 15, 'search'),
-            ('linkedin_engagement', f'site:linkedin.com "{full_name}" (shared OR posted OR commented)', 15, 'search'),
-            ('linkedin_company', f'site:linkedin.com "{full_name}" {company} activity', 10, 'search'),
+            SearchQuery('linkedin_posts', f'site:linkedin.com/posts/{first_name.lower()}-{last_name.lower()}', 20, 'search'),
+            SearchQuery('linkedin_activity', f'site:linkedin.com/in/{linkedin_slug}/recent-activity', 15, 'search'),
+            SearchQuery('linkedin_engagement', f'site:linkedin.com "{full_name}" (shared OR posted OR commented)', 15, 'search'),
+            SearchQuery('linkedin_company', f'site:linkedin.com "{full_name}" {company} activity', 10, 'search'),
         ])
 
         # Query 7: Recherches spécialisées
         queries_batch.extend([
-            ('github', f'site:github.com "{full_name}" OR "{last_name_only}"', 10, 'search'),
-            ('podcasts', f'"{full_name}" podcast OR conférence OR talk OR webinar', 10, 'search'),
-            ('patents', f'site:patents.google.com "{full_name}"', 5, 'search'),
-            ('publications', f'"{full_name}" {company} publication OR recherche OR étude', 10, 'search'),
-            ('tech_media', f'"{full_name}" TechCrunch OR Maddyness OR FrenchWeb OR LesEchos', 10, 'search'),
+            SearchQuery('github', f'site:github.com "{full_name}" OR "{last_name_only}"', 10, 'search'),
+            SearchQuery('podcasts', f'"{full_name}" podcast OR conférence OR talk OR webinar', 10, 'search'),
+            SearchQuery('patents', f'site:patents.google.com "{full_name}"', 5, 'search'),
+            SearchQuery('publications', f'"{full_name}" {company} publication OR recherche OR étude', 10, 'search'),
+            SearchQuery('tech_media', f'"{full_name}" TechCrunch OR Maddyness OR FrenchWeb OR LesEchos', 10, 'search'),
         ])
 
-        # ========== PHASE 2: Exécuter TOUTES les requêtes en PARALLÈLE ==========
-        print(f"[Serper] 🚀 Lancement de {len(queries_batch)} requêtes en parallèle...")
+        return queries_batch
+
+    def run_queries(self, queries: List[SearchQuery]) -> Dict[str, Dict]:
+        """
+        Exécution autonome d'un batch de requêtes en parallèle (hors QueryPlanner).
+        Retourne {label: résultat Serper}.
+        """
+        start_time = time.time()
+        print(f"[Serper] 🚀 Lancement de {len(queries)} requêtes en parallèle...")
 
         results_map = {}
         with ThreadPoolExecutor(max_workers=10) as executor:
             future_to_query = {
                 executor.submit(
-                    self.search_news if query_type == 'news' else self.search_google,
-                    query,
-                    num
-                ): (label, query_type)
-                for label, query, num, query_type in queries_batch
+                    self.search_news if query.endpoint == 'news' else self.search_google,
+                    query.query,
+                    query.num_results
+                ): query.label
+                for query in queries
             }
 
             for future in as_completed(future_to_query):
-                label, query_type = future_to_query[future]
+                label = future_to_query[future]
                 try:
                     result = future.result()
                     if result:
@@ -273,25 +262,64 @@ class SerperSearchSource(BaseSource):
         parallel_time = time.time() - start_time
         print(f"[Serper] ⚡ Toutes les requêtes terminées en {parallel_time:.1f}s (parallèle)")
 
+        return results_map
+
+    def get_urls(self, first_name: str, last_name: str, company: str, run: Optional[SourceRun] = None) -> List[str]:
+        """
+        Traite les résultats Serper (pré-calculés par le QueryPlanner, sinon exécutés ici
+        en un batch parallèle) et retourne les URLs scrapables.
+        """
+        full_name = f"{first_name} {last_name}"
+
+        scrapable_urls = []
+        linkedin_profiles = []
+        # Index de dédup (clé canonique): évite les scans linéaires et les doublons http/https, www...
+        seen_urls = set()
+        seen_linkedin = set()
+        run = run or SourceRun()
+
+        def add_url(item: Dict, label: str):
+            url = item['url']
+            # Le label est crédité même si l'URL a déjà été fournie par une autre requête
+            run.track_label_url(label, url)
+            run.track_url_metadata(url, label, item)
+            key = url_dedup_key(url)
+            if key not in seen_urls:
+                seen_urls.add(key)
+                scrapable_urls.append(url)
+
+        def add_linkedin_profile(item: Dict, label: str) -> bool:
+            key = url_dedup_key(item['url'])
+            if key in seen_linkedin:
+                return False
+            seen_linkedin.add(key)
+            linkedin_profiles.append({
+                'url': item['url'],
+                'snippet': item['snippet'],
+                'title': item['title'],
+                'position': item.get('position', 999)
+            })
+            run.track_label_snippet(label)
+            return True
+
+        results_map = run.search_results
+        if results_map is None:
+            results_map = self.run_queries(self.get_search_queries(first_name, last_name, company))
+
         # ========== PHASE 3: Traiter les résultats ==========
         # Query 1: Recherche générale (v3.1: augmenté à 50 résultats)
         results1 = results_map.get('general')
 
         if results1:
             extracted = self.extract_urls_and_snippets(results1)
-            self._store_snippets(extracted, full_name, company)
+            self._store_snippets(extracted, full_name, company, 'general', run)
 
             for item in extracted:
                 if 'linkedin.com' in item['url']:
                     # v3.1: Filtrer les homonymes LinkedIn
                     if self._is_linkedin_url_relevant(item['url'], first_name, last_name):
-                        linkedin_profiles.append({
-                            'url': item['url'],
-                            'snippet': item['snippet'],
-                            'title': item['title'],
-                            'position': item.get('position', 999)
-                        })
-                        print(f"[Serper] ✓ LinkedIn found: {item['url']}")
+                        if add_linkedin_profile(item, 'general'):
+                            print(f"[Serper] ✓ LinkedIn found: {item['url']}")
                     else:
                         print(f"[Serper] ✗ LinkedIn homonym rejected: {item['url']}")
                 elif item['scrapable']:
@@ -300,18 +328,18 @@ class SerperSearchSource(BaseSource):
                         if not self._is_company_registry_url_relevant(item['url'], company):
                             print(f"[Serper] ✗ Registry rejected (wrong company): {item['url']}")
                             continue
-                    scrapable_urls.append(item['url'])
+                    add_url(item, 'general')
 
         # Query 2: Recherche Google News API pour articles récents (v3.1: augmenté à 30)
         results_news = results_map.get('news')
 
         if results_news:
             extracted_news = self.extract_urls_and_snippets(results_news, is_news=True)
-            self._store_snippets(extracted_news, full_name, company)
+            self._store_snippets(extracted_news, full_name, company, 'news', run)
 
             for item in extracted_news:
-                if item['scrapable'] and item['url'] not in scrapable_urls:
-                    scrapable_urls.append(item['url'])
+                if item['scrapable']:
+                    add_url(item, 'news')
                     date_str = f" ({item['date']})" if item.get('date') else ""
                     print(f"[Serper News] ✓ Article found: {item['title'][:60]}{date_str}")
 
@@ -326,6 +354,7 @@ class SerperSearchSource(BaseSource):
             for item in extracted_twitter:
                 if ('twitter.com' in item['url'] or 'x.com' in item['url']) and item['snippet']:
                     # Ajouter les snippets Twitter au cache pour analyse
+                    run.track_label_snippet('twitter')
                     print(f"[Serper] ✓ Twitter/X mention found: {item['url']}")
 
         # Query 4: Recherche sites officiels français (v3.1: augmenté à 10 résultats)
@@ -340,7 +369,7 @@ class SerperSearchSource(BaseSource):
             results_official = results_map.get(label)
             if results_official:
                 extracted_official = self.extract_urls_and_snippets(results_official)
-                self._store_snippets(extracted_official, full_name, company)
+                self._store_snippets(extracted_official, full_name, company, label, run)
 
                 for item in extracted_official:
                     # v3.1: Filtrer les pages Société.com/Verif.com non pertinentes
@@ -349,8 +378,8 @@ class SerperSearchSource(BaseSource):
                             print(f"[Serper] ✗ {source_name} rejected (wrong company): {item['url']}")
                             continue
 
-                    if item['scrapable'] and item['url'] not in scrapable_urls:
-                        scrapable_urls.append(item['url'])
+                    if item['scrapable']:
+                        add_url(item, label)
                     if item['snippet']:
                         print(f"[Serper] ✓ {source_name} mention: {item['title'][:50]}")
 
@@ -365,29 +394,23 @@ class SerperSearchSource(BaseSource):
 
             if results:
                 extracted = self.extract_urls_and_snippets(results)
-                self._store_snippets(extracted, full_name, company)
+                self._store_snippets(extracted, full_name, company, label, run)
 
                 for item in extracted:
                     if 'linkedin.com' in item['url']:
                         # v3.1: Filtrer les homonymes LinkedIn
                         if self._is_linkedin_url_relevant(item['url'], first_name, last_name):
-                            if not any(p['url'] == item['url'] for p in linkedin_profiles):
-                                linkedin_profiles.append({
-                                    'url': item['url'],
-                                    'snippet': item['snippet'],
-                                    'title': item['title'],
-                                    'position': item.get('position', 999)
-                                })
+                            if add_linkedin_profile(item, label):
                                 print(f"[Serper] ✓ LinkedIn found: {item['url']}")
                         else:
                             print(f"[Serper] ✗ LinkedIn homonym rejected: {item['url']}")
-                    elif item['scrapable'] and item['url'] not in scrapable_urls:
+                    elif item['scrapable']:
                         # v3.1: Filtrer pages Société.com/Verif.com non pertinentes
                         if 'societe.com' in item['url'] or 'verif.com' in item['url']:
                             if not self._is_company_registry_url_relevant(item['url'], company):
                                 print(f"[Serper] ✗ Registry rejected (wrong company): {item['url']}")
                                 continue
-                        scrapable_urls.append(item['url'])
+                        add_url(item, label)
 
         # Query 6: LinkedIn Posts & Activity (v3.1: NOUVEAU - collecte enrichie)
         # Objectif: Récupérer 10-15 posts LinkedIn avec commentaires visibles dans snippets
@@ -403,19 +426,13 @@ class SerperSearchSource(BaseSource):
 
             if results_linkedin:
                 extracted_linkedin = self.extract_urls_and_snippets(results_linkedin)
-                self._store_snippets(extracted_linkedin, full_name, company)
+                self._store_snippets(extracted_linkedin, full_name, company, label, run)
 
                 for item in extracted_linkedin:
                     if 'linkedin.com' in item['url']:
                         # v3.1: Filtrer les homonymes LinkedIn
                         if self._is_linkedin_url_relevant(item['url'], first_name, last_name):
-                            if not any(p['url'] == item['url'] for p in linkedin_profiles):
-                                linkedin_profiles.append({
-                                    'url': item['url'],
-                                    'snippet': item['snippet'],
-                                    'title': item['title'],
-                                    'position': item.get('position', 999)
-                                })
+                            if add_linkedin_profile(item, label):
                                 print(f"[Serper] ✓ {source_name}: {item['url']}")
                         else:
                             print(f"[Serper] ✗ {source_name} homonym rejected: {item['url']}")
@@ -437,11 +454,11 @@ class SerperSearchSource(BaseSource):
 
             if results_specialized:
                 extracted_specialized = self.extract_urls_and_snippets(results_specialized)
-                self._store_snippets(extracted_specialized, full_name, company)
+                self._store_snippets(extracted_specialized, full_name, company, label, run)
 
                 for item in extracted_specialized:
-                    if item['scrapable'] and item['url'] not in scrapable_urls:
-                        scrapable_urls.append(item['url'])
+                    if item['scrapable']:
+                        add_url(item, label)
                     if item['snippet']:
                         print(f"[Serper] ✓ {source_name} mention: {item['title'][:50]}")
 
@@ -551,11 +568,13 @@ class SerperSearchSource(BaseSource):
 
         return merged_content
 
-    def _store_snippets(self, extracted: List[Dict], person_name: str, company: str):
+    def _store_snippets(self, extracted: List[Dict], person_name: str, company: str, label: Optional[str] = None, run: Optional[SourceRun] = None):
         """
-        For now, just for debugging purposes
+        Snippets citant la personne: crédités au label (rendement du QueryPlanner) même si
+        aucune URL n'est scrapée. Les snippets LinkedIn sont crédités via les profils retenus.
         """
         linkedin_snippets = []
+        person_terms = normalize_person_name(person_name)
 
         for item in extracted:
             if 'linkedin.com' in item['url']:
@@ -563,6 +582,8 @@ class SerperSearchSource(BaseSource):
                     'snippet': item['snippet'],
                     'title': item['title']
                 })
+            elif run and label and person_terms and f" {person_terms} " in f" {normalize_person_name(item['title'] + ' ' + item['snippet'])} ":
+                run.track_label_snippet(label)
 
         if linkedin_snippets:
             print(f"[Serper] Found {len(linkedin_snippets)} LinkedIn snippets for {person_name} @ {company}")
\ No newline at end of file
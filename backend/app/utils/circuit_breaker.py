@@ -0,0 +1,183 @@
+"""
+Circuit breakers per external provider (Serper, Pappers, Firecrawl, OpenAI).
+
+When a provider is degraded, every call would otherwise wait out its full timeout
+(10 s per Serper query, 45 s per Firecrawl page...), saturating worker threads and
+gevent greenlets. Each provider gets a breaker driven by a rolling window of calls:
+- closed: calls go through; the circuit opens when the error rate or the slow-call
+  rate over the window exceeds its threshold (after a minimum number of calls)
+- open: calls fail fast (CircuitOpenError) until the cooldown has elapsed
+- half-open: a few trial calls go through; success closes the circuit, failure re-opens it
+
+Callers degrade gracefully: Firecrawl skipped (local GET / ScraperAPI / snippets only),
+empty Serper or Pappers results, raw LinkedIn posts instead of summaries.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# Seuil d'appel lent (s) par provider, surchargeable via BREAKER_SLOW_SECONDS_<PROVIDER>
+SLOW_CALL_DEFAULTS = {
+    'serper': 5,
+    'pappers': 5,
+    'firecrawl': 40,
+    'openai': 90,
+}
+
+
+class CircuitOpenError(Exception):
+    """Appel refusé: le circuit du provider est ouvert"""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"Circuit open for {provider} (retry in {retry_in:.0f}s)")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.window_size = int(os.getenv('BREAKER_WINDOW', '20'))
+        self.min_calls = int(os.getenv('BREAKER_MIN_CALLS', '8'))
+        self.error_rate = float(os.getenv('BREAKER_ERROR_RATE', '0.5'))
+        self.slow_rate = float(os.getenv('BREAKER_SLOW_RATE', '0.8'))
+        self.open_seconds = float(os.getenv('BREAKER_OPEN_SECONDS', '30'))
+        self.half_open_calls = int(os.getenv('BREAKER_HALF_OPEN_CALLS', '1'))
+
+        env_slow = os.getenv(f'BREAKER_SLOW_SECONDS_{provider.upper()}')
+        self.slow_seconds = float(env_slow) if env_slow else SLOW_CALL_DEFAULTS.get(provider, 15)
+
+        self._calls = deque(maxlen=self.window_size)  # (succès, lent)
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_started_at = 0.0
+        self._stats = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+        self._last_reason = None
+        self._lock = threading.Lock()
+
+    def _refresh_state(self):
+        """
+        Open → half-open une fois le délai écoulé; half-open → open si un appel d'essai
+        n'a rien enregistré à temps (record() perdu), sinon le circuit resterait bloqué
+        (à appeler sous self._lock)
+        """
+        now = time.time()
+        if self._state == STATE_OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = STATE_HALF_OPEN
+            self._trials = 0
+        elif (self._state == STATE_HALF_OPEN and self._trials >= self.half_open_calls
+              and now - self._trial_started_at >= max(self.open_seconds, self.slow_seconds)):
+            self._open("half-open trial never reported")
+
+    def _open(self, reason: str):
+        self._state = STATE_OPEN
+        self._opened_at = time.time()
+        self._calls.clear()
+        self._stats['opened'] += 1
+        self._last_reason = reason
+        print(f"[CircuitBreaker] ⚠ {self.provider} circuit OPEN ({reason}), failing fast for {self.open_seconds:.0f}s")
+
+    def is_open(self) -> bool:
+        """Circuit ouvert (sans consommer d'appel d'essai): permet de sauter le provider en amont"""
+        with self._lock:
+            self._refresh_state()
+            return self._state == STATE_OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            self._refresh_state()
+
+            if self._state == STATE_CLOSED:
+                return True
+
+            if self._state == STATE_HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                self._trial_started_at = time.time()
+                return True
+
+            self._stats['rejected'] += 1
+            return False
+
+    def check(self):
+        """Lève CircuitOpenError si l'appel n'est pas autorisé"""
+        if not self.allow():
+            with self._lock:
+                retry_in = max(0.0, self.open_seconds - (time.time() - self._opened_at))
+            raise CircuitOpenError(self.provider, retry_in)
+
+    def record(self, success: bool, latency_seconds: float):
+        slow = latency_seconds >= self.slow_seconds
+
+        with self._lock:
+            self._stats['calls'] += 1
+            if not success:
+                self._stats['failures'] += 1
+
+            if self._state == STATE_HALF_OPEN:
+                if success and not slow:
+                    self._state = STATE_CLOSED
+                    self._calls.clear()
+                    print(f"[CircuitBreaker] ✓ {self.provider} circuit closed (trial call succeeded)")
+                else:
+                    self._open("half-open trial failed")
+                return
+
+            if self._state == STATE_OPEN:
+                # Appel démarré avant l'ouverture: ignoré
+                return
+
+            self._calls.append((success, slow))
+            if len(self._calls) < self.min_calls:
+                return
+
+            failures = sum(1 for ok, _ in self._calls if not ok)
+            slow_calls = sum(1 for _, is_slow in self._calls if is_slow)
+
+            if failures / len(self._calls) >= self.error_rate:
+                self._open(f"error rate {failures}/{len(self._calls)}")
+            elif slow_calls / len(self._calls) >= self.slow_rate:
+                self._open(f"{slow_calls}/{len(self._calls)} calls slower than {self.slow_seconds:.0f}s")
+
+    def get_state(self) -> Dict:
+        with self._lock:
+            self._refresh_state()
+            failures = sum(1 for ok, _ in self._calls if not ok)
+            return {
+                'state': self._state,
+                'window_calls': len(self._calls),
+                'window_error_rate': round(failures / len(self._calls), 3) if self._calls else 0.0,
+                'slow_call_seconds': self.slow_seconds,
+                'retry_in_seconds': round(max(0.0, self.open_seconds - (time.time() - self._opened_at)), 1) if self._state == STATE_OPEN else None,
+                'last_open_reason': self._last_reason,
+                **self._stats
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """Retourne le circuit breaker partagé du provider (créé au premier appel)"""
+    breaker = _breakers.get(provider)
+    if breaker:
+        return breaker
+
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+
+def get_breaker_states() -> Dict[str, Dict]:
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {provider: breaker.get_state() for provider, breaker in breakers.items()}
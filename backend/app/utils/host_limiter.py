@@ -0,0 +1,133 @@
+"""
+Per-host politeness limits shared by URL validation and direct (local tier) fetches.
+
+Serper results cluster on a few hosts (societe.com, verif.com, lesechos.fr...).
+Hammering them triggers throttling or anti-bot blocks, which shows up as false
+"inaccessible" results and wasted timeouts. One process-wide limiter enforces:
+- A concurrency cap per host (HOST_MAX_CONCURRENT)
+- A minimum spacing between two request starts on the same host (HOST_MIN_INTERVAL_SECONDS)
+
+round_robin_by_host() interleaves URLs across hosts before submission so that
+worker threads are not all waiting on the same host.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Optional
+from urllib.parse import urlparse
+
+
+def get_host(url: str) -> str:
+    try:
+        host = (urlparse(url).hostname or '').lower()
+    except ValueError:
+        return ''
+    return host[len('www.'):] if host.startswith('www.') else host
+
+
+def round_robin_by_host(urls: List[str]) -> List[str]:
+    """
+    Entrelace les URLs par host en conservant l'ordre relatif de chaque host.
+
+    Example:
+        [a1, a2, a3, b1, c1] → [a1, b1, c1, a2, a3]
+    """
+    queues: Dict[str, List[str]] = {}
+    for url in urls:
+        queues.setdefault(get_host(url), []).append(url)
+
+    ordered = []
+    while queues:
+        for host in list(queues):
+            ordered.append(queues[host].pop(0))
+            if not queues[host]:
+                del queues[host]
+
+    return ordered
+
+
+class HostLimiter:
+    def __init__(self):
+        self.max_per_host = int(os.getenv('HOST_MAX_CONCURRENT', '2'))
+        self.min_interval = float(os.getenv('HOST_MIN_INTERVAL_SECONDS', '0.5'))
+
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+        print(f"[HostLimiter] Config: {self.max_per_host} concurrent/host, {self.min_interval}s min spacing")
+
+    def _get_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+                self._stats[host] = {'requests': 0, 'waited_seconds': 0.0}
+            return self._semaphores[host]
+
+    def _reserve_start(self, host: str) -> float:
+        """Réserve le prochain créneau de démarrage du host, retourne l'attente nécessaire"""
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next_start.get(host, 0.0))
+            self._next_start[host] = start + self.min_interval
+            return start - now
+
+    @contextmanager
+    def slot(self, url: str):
+        """Bloque jusqu'à ce qu'une requête vers le host de l'URL soit autorisée"""
+        host = get_host(url)
+        if not host:
+            yield
+            return
+
+        semaphore = self._get_semaphore(host)
+        wait_start = time.time()
+        semaphore.acquire()
+
+        try:
+            delay = self._reserve_start(host)
+            if delay > 0:
+                time.sleep(delay)
+
+            with self._lock:
+                self._stats[host]['requests'] += 1
+                self._stats[host]['waited_seconds'] += time.time() - wait_start
+
+            yield
+        finally:
+            semaphore.release()
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            hosts = {
+                host: {
+                    'requests': stats['requests'],
+                    'avg_wait_ms': round(stats['waited_seconds'] / stats['requests'] * 1000) if stats['requests'] else 0
+                }
+                for host, stats in self._stats.items()
+            }
+
+        return {
+            'max_per_host': self.max_per_host,
+            'min_interval_seconds': self.min_interval,
+            'hosts': hosts
+        }
+
+
+_host_limiter: Optional[HostLimiter] = None
+_host_limiter_lock = threading.Lock()
+
+
+def get_host_limiter() -> HostLimiter:
+    """Retourne le limiteur par host partagé du process (créé au premier appel)"""
+    global _host_limiter
+
+    if _host_limiter is None:
+        with _host_limiter_lock:
+            if _host_limiter is None:
+                _host_limiter = HostLimiter()
+
+    return _host_limiter
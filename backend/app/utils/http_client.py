@@ -0,0 +1,220 @@
+"""
+Shared HTTP client for all outbound provider calls (Serper, Pappers, ScraperAPI, URL validation, local fetching).
+
+One process-wide client keeps a requests.Session per provider, each with:
+- Keep-alive connection pools per host (pool sizes configurable)
+- Retries with exponential backoff, honouring Retry-After on 429/503 (capped by HTTP_RETRY_AFTER_MAX_SECONDS)
+- Per-provider timeout defaults (overridable via HTTP_TIMEOUT_<PROVIDER>)
+- Connection reuse metrics (requests sent vs new TCP/TLS connections opened)
+- A circuit breaker for the paid APIs (Serper, Pappers): calls fail fast while the provider is down
+"""
+
+import os
+import time
+import threading
+import requests
+from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.utils.circuit_breaker import get_circuit_breaker
+
+# Configuration par provider: timeout (s), retries activés, circuit breaker
+PROVIDER_DEFAULTS = {
+    'serper': {'timeout': 10, 'retries': True, 'breaker': True},
+    'pappers': {'timeout': 10, 'retries': True, 'breaker': True},
+    'scraperapi': {'timeout': 30, 'retries': True},
+    # Validation HEAD: on veut échouer vite, pas de retry
+    'validator': {'timeout': 3, 'retries': False},
+    # GET direct (tier local du scraping): l'échec escalade vers Firecrawl, pas de retry
+    'fetcher': {'timeout': 8, 'retries': False},
+    'default': {'timeout': 15, 'retries': True},
+}
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class CappedRetry(Retry):
+    """Retry dont l'attente Retry-After est plafonnée (un serveur peut annoncer plusieurs minutes)"""
+
+    def __init__(self, *args, retry_after_max: float = 10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after_max = retry_after_max
+
+    def new(self, **kw) -> 'CappedRetry':
+        # urllib3 recrée l'objet à chaque tentative: le plafond doit suivre
+        retry = super().new(**kw)
+        retry.retry_after_max = self.retry_after_max
+        return retry
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.retry_after_max)
+
+
+class HttpClient:
+    def __init__(self):
+        self.pool_connections = int(os.getenv('HTTP_POOL_CONNECTIONS', '20'))  # Nombre de hosts gardés en pool
+        self.pool_maxsize = int(os.getenv('HTTP_POOL_MAXSIZE', '50'))          # Connexions keep-alive par host
+        self.max_retries = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+        self.backoff_factor = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+        self.retry_after_max = float(os.getenv('HTTP_RETRY_AFTER_MAX_SECONDS', '10'))
+
+        self._sessions: Dict[str, requests.Session] = {}
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+        print(f"[HTTP] Config: pools={self.pool_connections} hosts x {self.pool_maxsize} conn, retries={self.max_retries}, backoff={self.backoff_factor}s, Retry-After max={self.retry_after_max}s")
+
+    def _get_provider_config(self, provider: str) -> Dict:
+        config = dict(PROVIDER_DEFAULTS.get(provider, PROVIDER_DEFAULTS['default']))
+
+        env_timeout = os.getenv(f'HTTP_TIMEOUT_{provider.upper()}')
+        if env_timeout:
+            config['timeout'] = float(env_timeout)
+
+        return config
+
+    def _build_session(self, provider: str) -> requests.Session:
+        config = self._get_provider_config(provider)
+
+        retry = CappedRetry(
+            total=self.max_retries if config['retries'] else 0,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES if config['retries'] else (),
+            allowed_methods=frozenset(['GET', 'HEAD', 'POST']),
+            respect_retry_after_header=True,
+            retry_after_max=self.retry_after_max,
+            raise_on_status=False
+        )
+
+        # Validation / GET direct: beaucoup de hosts différents → garder plus de pools en mémoire
+        pool_connections = max(self.pool_connections, 100) if provider in ('validator', 'fetcher') else self.pool_connections
+
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry
+        )
+
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        self._adapters[provider] = adapter
+        self._stats[provider] = {'requests': 0, 'errors': 0, 'total_latency': 0.0}
+
+        return session
+
+    def get_session(self, provider: str = 'default') -> requests.Session:
+        session = self._sessions.get(provider)
+        if session:
+            return session
+
+        with self._lock:
+            if provider not in self._sessions:
+                self._sessions[provider] = self._build_session(provider)
+            return self._sessions[provider]
+
+    def request(self, method: str, url: str, provider: str = 'default', timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        Envoie une requête via le pool du provider.
+        Lève les mêmes exceptions que requests (Timeout, ConnectionError...),
+        ou CircuitOpenError si le circuit du provider est ouvert.
+        """
+        config = self._get_provider_config(provider)
+        breaker = get_circuit_breaker(provider) if config.get('breaker') else None
+        if breaker:
+            breaker.check()
+
+        session = self.get_session(provider)
+        if timeout is None:
+            timeout = config['timeout']
+
+        start_time = time.time()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+            if breaker:
+                breaker.record(response.status_code not in RETRY_STATUS_CODES, time.time() - start_time)
+            return response
+        except Exception:
+            if breaker:
+                breaker.record(False, time.time() - start_time)
+            with self._lock:
+                self._stats[provider]['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._stats[provider]['requests'] += 1
+                self._stats[provider]['total_latency'] += time.time() - start_time
+
+    def get(self, url: str, provider: str = 'default', **kwargs) -> requests.Response:
+        return self.request('GET', url, provider=provider, **kwargs)
+
+    def post(self, url: str, provider: str = 'default', **kwargs) -> requests.Response:
+        return self.request('POST', url, provider=provider, **kwargs)
+
+    def head(self, url: str, provider: str = 'default', **kwargs) -> requests.Response:
+        return self.request('HEAD', url, provider=provider, **kwargs)
+
+    def _get_pool_stats(self, adapter: HTTPAdapter) -> Dict:
+        """Connexions ouvertes vs requêtes servies par les pools urllib3 encore actifs"""
+        pools = adapter.poolmanager.pools
+        hosts = {}
+
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            host = f"{pool.scheme}://{pool.host}"
+            num_requests = getattr(pool, 'num_requests', 0)
+            num_connections = getattr(pool, 'num_connections', 0)
+
+            hosts[host] = {
+                'requests': num_requests,
+                'connections_opened': num_connections,
+                'reuse_ratio': round(1 - num_connections / num_requests, 3) if num_requests else 0.0
+            }
+
+        return hosts
+
+    def get_metrics(self) -> Dict:
+        metrics = {}
+
+        for provider, adapter in list(self._adapters.items()):
+            stats = self._stats[provider]
+            hosts = self._get_pool_stats(adapter)
+
+            pool_requests = sum(h['requests'] for h in hosts.values())
+            pool_connections = sum(h['connections_opened'] for h in hosts.values())
+
+            metrics[provider] = {
+                'requests': stats['requests'],
+                'errors': stats['errors'],
+                'avg_latency_ms': round(stats['total_latency'] / stats['requests'] * 1000) if stats['requests'] else 0,
+                'timeout_seconds': self._get_provider_config(provider)['timeout'],
+                'connections_opened': pool_connections,
+                'reuse_ratio': round(1 - pool_connections / pool_requests, 3) if pool_requests else 0.0,
+                'hosts': hosts
+            }
+
+        return metrics
+
+
+_http_client: Optional[HttpClient] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Retourne le client HTTP partagé du process (créé au premier appel)"""
+    global _http_client
+
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = HttpClient()
+
+    return _http_client
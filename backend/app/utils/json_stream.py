@@ -0,0 +1,74 @@
+"""
+Incremental parser for a streamed JSON object.
+
+GPT-4o streams the profile JSON token by token. The parser is fed the chunks as
+they arrive and returns each top-level member ("risk_assessment": {...}) as soon
+as its closing comma / brace has been received, so the caller can forward the
+section before the model has finished the whole document.
+"""
+
+import json
+from typing import List, Tuple, Any
+
+
+class IncrementalJsonObjectParser:
+    def __init__(self):
+        self.buffer = ''
+        self._pos = 0             # Prochain caractère à analyser
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start = None  # Début du membre top-level en cours
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Ajoute un fragment et retourne les membres top-level complétés: [(clé, valeur)].
+        Un membre illisible (JSON invalide) est ignoré: le document complet reste
+        disponible dans self.buffer pour le parse final.
+        """
+        self.buffer += chunk
+        completed = []
+
+        while self._pos < len(self.buffer) and not self.done:
+            char = self.buffer[self._pos]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+
+            elif char == '"':
+                self._in_string = True
+
+            elif char in '{[':
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = self._pos + 1
+
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.extend(self._close_member(self._pos))
+                    self.done = True
+
+            elif char == ',' and self._depth == 1:
+                completed.extend(self._close_member(self._pos))
+                self._member_start = self._pos + 1
+
+            self._pos += 1
+
+        return completed
+
+    def _close_member(self, end: int) -> List[Tuple[str, Any]]:
+        text = self.buffer[self._member_start:end].strip() if self._member_start is not None else ''
+        if not text:
+            return []
+
+        try:
+            return list(json.loads('{' + text + '}').items())
+        except json.JSONDecodeError:
+            return []
@@ -0,0 +1,328 @@
+"""
+Shared gateway for every OpenAI call of the process.
+
+LLMService used to hold its own synchronous client with no limit across
+concurrent requests: a burst (bulk re-analysis, several searches at once, the
+parallel section groups) triggered 429s that surfaced as "Failed to analyze
+profile". All chat completions now go through one process-wide gateway:
+- a concurrency cap (LLM_MAX_CONCURRENT), with a lower cap for batch callers so
+  interactive searches always find a free slot
+- a tokens-per-minute budget per model (LLM_TPM_BUDGET): each call reserves its
+  estimated tokens (prompt + expected output) in a 60 s sliding window, corrected
+  with the actual usage once the response is in
+- priority: waiting interactive calls start before batch ones (FIFO within a class);
+  the priority comes from the caller's context (llm_priority())
+- automatic backoff on 429 (Retry-After honoured, exponential otherwise): the
+  cooldown is shared, so every queued call waits instead of hammering the API
+- the 'openai' circuit breaker and the token usage accounting
+
+The calls stay synchronous: under gunicorn's gevent workers the socket I/O and
+the gateway's locks are cooperative, so a waiting or streaming call yields the worker.
+"""
+
+import os
+import time
+import heapq
+import random
+import itertools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from openai import OpenAI, APIConnectionError, APITimeoutError, RateLimitError, InternalServerError
+
+from app.utils.circuit_breaker import get_circuit_breaker
+from app.utils.llm_usage import get_llm_usage_stats, usage_to_dict
+from app.utils.token_budget import count_tokens
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BATCH = 'batch'
+PRIORITY_RANKS = {PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 1}
+
+# Erreurs transitoires rejouées. Les timeouts (APITimeoutError, sous-classe d'APIConnectionError)
+# ne le sont pas: l'appel a déjà coûté sa durée max. Les 400 / erreurs de prompt ne comptent
+# pas pour le circuit breaker
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+TPM_WINDOW_SECONDS = 60
+
+_priority = contextvars.ContextVar('llm_priority', default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """Priorité des appels LLM faits dans ce contexte (ex: ré-analyse en masse → PRIORITY_BATCH)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class _Reservation:
+    """Créneau accordé: priorité, modèle et entrée de la fenêtre TPM ([horodatage, tokens])"""
+
+    def __init__(self, priority: str, model: str, entry: list):
+        self.priority = priority
+        self.model = model
+        self.entry = entry
+
+
+class LLMGateway:
+    def __init__(self):
+        self.api_key = os.getenv('OPENAI_API_KEY')
+        # Retries gérés par la passerelle (backoff partagé), pas par le SDK
+        self.client = OpenAI(api_key=self.api_key, max_retries=0, timeout=float(os.getenv('LLM_TIMEOUT_SECONDS', '110'))) if self.api_key else None
+
+        self.max_concurrent = int(os.getenv('LLM_MAX_CONCURRENT', '8'))
+        self.batch_max_concurrent = int(os.getenv('LLM_BATCH_MAX_CONCURRENT', str(max(1, self.max_concurrent // 2))))
+        self.tpm_budget = int(os.getenv('LLM_TPM_BUDGET', '450000'))  # 0 = pas de budget
+        self.expected_output_tokens = int(os.getenv('LLM_EXPECTED_OUTPUT_TOKENS', '4000'))
+        self.max_retries = int(os.getenv('LLM_MAX_RETRIES', '4'))
+        self.backoff_base = float(os.getenv('LLM_BACKOFF_BASE_SECONDS', '1'))
+        self.backoff_max = float(os.getenv('LLM_BACKOFF_MAX_SECONDS', '30'))
+
+        self.breaker = get_circuit_breaker('openai')
+        self.usage_stats = get_llm_usage_stats()
+
+        self._condition = threading.Condition()
+        self._queue = []                      # Tas des appels en attente: (rang de priorité, séquence)
+        self._sequence = itertools.count()
+        self._active = {PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 0}
+        self._windows: Dict[str, deque] = {}  # Modèle → [[horodatage, tokens]] des 60 dernières secondes
+        self._cooldown_until = 0.0            # Backoff 429 partagé
+        self._stats = {
+            PRIORITY_INTERACTIVE: {'calls': 0, 'waited_seconds': 0.0},
+            PRIORITY_BATCH: {'calls': 0, 'waited_seconds': 0.0},
+        }
+        self._errors = {'rate_limited': 0, 'retries': 0, 'failed': 0}
+
+        print(f"[LLMGateway] Config: {self.max_concurrent} concurrent ({self.batch_max_concurrent} batch), TPM budget {self.tpm_budget or 'off'}, {self.max_retries} retries")
+
+    # ---------- Admission ----------
+
+    def _estimate_tokens(self, kwargs: Dict) -> int:
+        model = kwargs.get('model', 'gpt-4o')
+        prompt_tokens = sum(count_tokens(message.get('content') or '', model) for message in kwargs.get('messages', []))
+        return prompt_tokens + int(kwargs.get('max_tokens') or self.expected_output_tokens)
+
+    def _window_tokens(self, model: str, now: float) -> int:
+        """Tokens réservés sur la fenêtre glissante du modèle (à appeler sous self._condition)"""
+        window = self._windows.setdefault(model, deque())
+        while window and now - window[0][0] >= TPM_WINDOW_SECONDS:
+            window.popleft()
+        return sum(entry[1] for entry in window)
+
+    def _wait_time(self, rank: Tuple[int, int], priority: str, model: str, tokens: int) -> float:
+        """0 si l'appel peut démarrer, sinon durée d'attente maximale avant réévaluation"""
+        now = time.time()
+
+        if now < self._cooldown_until:
+            return self._cooldown_until - now
+        if self._queue[0] != rank:
+            return 1.0
+        if sum(self._active.values()) >= self.max_concurrent:
+            return 1.0
+        if priority == PRIORITY_BATCH and self._active[PRIORITY_BATCH] >= self.batch_max_concurrent:
+            return 1.0
+
+        if self.tpm_budget:
+            used = self._window_tokens(model, now)
+            # Fenêtre vide: un appel plus gros que le budget passe quand même (sinon blocage définitif)
+            if used and used + tokens > self.tpm_budget:
+                return max(0.05, TPM_WINDOW_SECONDS - (now - self._windows[model][0][0]))
+
+        return 0.0
+
+    def _acquire(self, priority: str, model: str, tokens: int) -> _Reservation:
+        rank = (PRIORITY_RANKS.get(priority, 0), next(self._sequence))
+        wait_start = time.time()
+
+        with self._condition:
+            heapq.heappush(self._queue, rank)
+            try:
+                while True:
+                    delay = self._wait_time(rank, priority, model, tokens)
+                    if delay <= 0:
+                        break
+                    self._condition.wait(min(delay, 1.0))
+            except BaseException:
+                # Attente interrompue (timeout gevent, arrêt du worker): sans retrait, ce rang
+                # resterait en tête de file et bloquerait tous les appels suivants
+                self._queue.remove(rank)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+                raise
+
+            heapq.heappop(self._queue)
+            self._active[priority] += 1
+            entry = [time.time(), tokens]
+            self._windows.setdefault(model, deque()).append(entry)
+
+            stats = self._stats[priority]
+            stats['calls'] += 1
+            stats['waited_seconds'] += time.time() - wait_start
+
+            # La tête de file a changé
+            self._condition.notify_all()
+
+        waited = time.time() - wait_start
+        if waited >= 1:
+            print(f"[LLMGateway] ⏳ {priority} call waited {waited:.1f}s for a slot ({model})")
+
+        return _Reservation(priority, model, entry)
+
+    def _release(self, reservation: _Reservation, actual_tokens: Optional[int] = None):
+        """Libère le créneau; la réservation TPM est corrigée avec l'usage réel s'il est connu"""
+        with self._condition:
+            self._active[reservation.priority] -= 1
+            if actual_tokens is not None:
+                reservation.entry[1] = actual_tokens
+            self._condition.notify_all()
+
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        delay = _retry_after_seconds(error)
+        if delay is None:
+            delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+        if isinstance(error, RateLimitError):
+            with self._condition:
+                self._cooldown_until = max(self._cooldown_until, time.time() + delay)
+                self._errors['rate_limited'] += 1
+        return delay
+
+    # ---------- Appels ----------
+
+    def chat_completion(self, usage_kind: str = 'other', priority: Optional[str] = None, **kwargs):
+        """
+        chat.completions.create via la passerelle: attente d'un créneau (concurrence, budget TPM,
+        priorité), circuit breaker, backoff sur 429. Avec stream=True, le créneau est tenu jusqu'à
+        la fin de la lecture du flux.
+        """
+        if not self.client:
+            raise ValueError("OpenAI API key not configured")
+
+        priority = priority or current_priority()
+        if priority not in PRIORITY_RANKS:
+            priority = PRIORITY_INTERACTIVE
+        model = kwargs.get('model', 'gpt-4o')
+        estimate = self._estimate_tokens(kwargs)
+        attempt = 0
+
+        # Un seul passage par le breaker par appel logique: les retries ne reprennent pas
+        # d'appel d'essai en half-open, et chaque sortie de la boucle enregistre un résultat
+        self.breaker.check()
+
+        while True:
+            reservation = self._acquire(priority, model, estimate)
+            start_time = time.time()
+
+            try:
+                response = self.client.chat.completions.create(**kwargs)
+            except APITimeoutError:
+                self._release(reservation)
+                self.breaker.record(False, time.time() - start_time)
+                with self._condition:
+                    self._errors['failed'] += 1
+                raise
+            except RETRYABLE_ERRORS as e:
+                # Requête refusée: aucun token consommé
+                self._release(reservation, 0)
+                quota_exhausted = getattr(e, 'code', None) == 'insufficient_quota'
+                if attempt >= self.max_retries or quota_exhausted:
+                    self.breaker.record(False, time.time() - start_time)
+                    with self._condition:
+                        self._errors['failed'] += 1
+                    raise
+
+                delay = self._backoff(e, attempt)
+                attempt += 1
+                with self._condition:
+                    self._errors['retries'] += 1
+                print(f"[LLMGateway] ⚠ {type(e).__name__} on {model}, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            except Exception:
+                self._release(reservation, 0)
+                self.breaker.record(True, time.time() - start_time)
+                raise
+
+            self.breaker.record(True, time.time() - start_time)
+
+            if kwargs.get('stream'):
+                return self._stream(response, reservation, usage_kind)
+
+            usage = usage_to_dict(response.usage)
+            self._release(reservation, usage['prompt_tokens'] + usage['completion_tokens'])
+            self.usage_stats.record(usage_kind, usage)
+            return response
+
+    def _stream(self, stream, reservation: _Reservation, usage_kind: str) -> Iterator:
+        """Relaie les chunks; libère le créneau en fin de flux (usage lu dans le dernier chunk si demandé)"""
+        usage = None
+        try:
+            for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    usage = usage_to_dict(chunk.usage)
+                yield chunk
+        finally:
+            self._release(reservation, usage['prompt_tokens'] + usage['completion_tokens'] if usage else None)
+            if usage:
+                self.usage_stats.record(usage_kind, usage)
+
+    def get_metrics(self) -> Dict:
+        with self._condition:
+            now = time.time()
+            return {
+                'max_concurrent': self.max_concurrent,
+                'batch_max_concurrent': self.batch_max_concurrent,
+                'tpm_budget': self.tpm_budget,
+                'active': dict(self._active),
+                'queued': len(self._queue),
+                'cooldown_seconds': round(max(0.0, self._cooldown_until - now), 1),
+                'tokens_last_minute': {model: self._window_tokens(model, now) for model in list(self._windows)},
+                'priorities': {
+                    priority: {
+                        'calls': stats['calls'],
+                        'avg_wait_ms': round(stats['waited_seconds'] / stats['calls'] * 1000) if stats['calls'] else 0
+                    }
+                    for priority, stats in self._stats.items()
+                },
+                **self._errors
+            }
+
+
+_llm_gateway: Optional[LLMGateway] = None
+_llm_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Retourne la passerelle LLM partagée du process (créée au premier appel)"""
+    global _llm_gateway
+
+    if _llm_gateway is None:
+        with _llm_gateway_lock:
+            if _llm_gateway is None:
+                _llm_gateway = LLMGateway()
+
+    return _llm_gateway
@@ -0,0 +1,80 @@
+"""
+Token usage of the OpenAI calls, including the prompt-cache hit rate.
+
+OpenAI caches prompt prefixes automatically (prompts of 1024+ tokens, 128-token
+increments): the cached part of the prompt is billed at a discount and processed
+faster. The analysis prompt puts its static part (instructions + JSON schema)
+first so it can be served from the cache; usage.prompt_tokens_details.cached_tokens
+reports how much of each prompt actually was.
+"""
+
+import threading
+from typing import Dict
+
+
+def usage_to_dict(usage) -> Dict[str, int]:
+    """Champ usage d'une réponse OpenAI → {prompt_tokens, cached_tokens, completion_tokens}"""
+    if usage is None:
+        return {'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0}
+
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+        'prompt_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+        'cached_tokens': (getattr(details, 'cached_tokens', 0) or 0) if details else 0,
+        'completion_tokens': getattr(usage, 'completion_tokens', 0) or 0,
+    }
+
+
+def add_usage(total: Dict[str, int], usage: Dict[str, int]) -> Dict[str, int]:
+    for key, value in usage.items():
+        total[key] = total.get(key, 0) + value
+    return total
+
+
+def format_usage(usage: Dict[str, int]) -> str:
+    prompt_tokens = usage.get('prompt_tokens', 0)
+    cached_tokens = usage.get('cached_tokens', 0)
+    rate = cached_tokens / prompt_tokens * 100 if prompt_tokens else 0.0
+    return f"{prompt_tokens} prompt tokens ({cached_tokens} cached, {rate:.0f}%), {usage.get('completion_tokens', 0)} completion tokens"
+
+
+class LLMUsageStats:
+    """Cumul des tokens par type d'appel (analysis, analysis_group, linkedin_summary...) depuis le démarrage"""
+
+    def __init__(self):
+        self._calls: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, usage: Dict[str, int]):
+        with self._lock:
+            stats = self._calls.setdefault(kind, {'calls': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0})
+            stats['calls'] += 1
+            add_usage(stats, usage)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            calls = {kind: dict(stats) for kind, stats in self._calls.items()}
+
+        for stats in calls.values():
+            stats['cache_hit_rate'] = round(stats['cached_tokens'] / stats['prompt_tokens'], 3) if stats['prompt_tokens'] else 0.0
+
+        total = {'calls': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0}
+        for stats in calls.values():
+            for key in total:
+                total[key] += stats[key]
+        total['cache_hit_rate'] = round(total['cached_tokens'] / total['prompt_tokens'], 3) if total['prompt_tokens'] else 0.0
+
+        return {'total': total, 'by_call': calls}
+
+
+_usage_stats = None
+_usage_stats_lock = threading.Lock()
+
+
+def get_llm_usage_stats() -> LLMUsageStats:
+    global _usage_stats
+    if _usage_stats is None:
+        with _usage_stats_lock:
+            if _usage_stats is None:
+                _usage_stats = LLMUsageStats()
+    return _usage_stats
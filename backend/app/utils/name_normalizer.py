@@ -0,0 +1,112 @@
+"""
+Name normalization utilities for cache lookups.
+
+Canonicalizes person and company names so that near-duplicate queries
+("Société Générale" vs "Societe Generale", "SAS MSDEV" vs "MSDev") share
+the same cache entry:
+- NFKD accent folding + lowercase
+- Punctuation removal and whitespace collapsing
+- Legal-form stripping (SAS, SARL, SA...) for company names
+- SIREN/SIRET detection (company given as registration number)
+"""
+
+import re
+import unicodedata
+from typing import Optional
+
+# Formes juridiques françaises (et quelques équivalents étrangers courants)
+LEGAL_FORMS = {
+    'sa', 'sas', 'sasu', 'sarl', 'eurl', 'snc', 'sca', 'scs', 'sci', 'scop',
+    'scp', 'sem', 'gie', 'ei', 'eirl', 'selarl', 'selas', 'selafa',
+    'selca', 'sce', 'se', 'scic', 'sasp',
+    'ltd', 'llc', 'inc', 'gmbh', 'plc', 'bv', 'nv', 'ag', 'corp',
+}
+
+# Formes juridiques aussi placées en tête de la raison sociale ("SCI Les Pins", "SARL Dupont").
+# Les formes courtes ambiguës ("SE Groupe", "Ag Conseil") et étrangères ne sont retirées qu'en fin de nom
+PREFIX_LEGAL_FORMS = {
+    'sas', 'sasu', 'sarl', 'eurl', 'snc', 'sca', 'scs', 'sci', 'scop', 'scp',
+    'sem', 'gie', 'eirl', 'selarl', 'selas', 'selafa', 'selca', 'scic', 'sasp',
+}
+
+
+def fold_accents(text: str) -> str:
+    """
+    Supprime les accents via décomposition NFKD.
+
+    Example:
+        "Société Générale" → "Societe Generale"
+    """
+    if not text:
+        return ""
+
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _base_normalize(text: str) -> str:
+    """Accent folding + lowercase + suppression ponctuation + espaces compactés"""
+    text = fold_accents(text or "").lower()
+
+    # "S.A.S." → "sas" (points d'abréviation collés)
+    text = text.replace('.', '')
+
+    # Tirets, apostrophes, slashs... → espace
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = text.replace('_', ' ')
+
+    return ' '.join(text.split())
+
+
+def extract_siren(company: str) -> Optional[str]:
+    """
+    Détecte un SIREN (9 chiffres) ou SIRET (14 chiffres) saisi comme nom d'entreprise.
+
+    Returns:
+        SIREN à 9 chiffres, ou None si la valeur n'est pas un numéro d'immatriculation
+    """
+    digits = re.sub(r'[\s.\-]', '', company or "")
+
+    if digits.isdigit() and len(digits) in (9, 14):
+        return digits[:9]
+
+    return None
+
+
+def normalize_person_name(name: str) -> str:
+    """
+    Normalise un prénom ou nom de famille.
+
+    Example:
+        "  Jean-Pierre  " → "jean pierre"
+        "Hélène" → "helene"
+    """
+    return _base_normalize(name)
+
+
+def normalize_company_name(company: str) -> str:
+    """
+    Normalise un nom d'entreprise (accents, ponctuation, formes juridiques).
+
+    Example:
+        "SAS MSDEV" → "msdev"
+        "Société  Générale S.A." → "societe generale"
+        "SE Groupe" → "se groupe"
+        "884 571 142" → "884571142"
+
+    La forme juridique n'est retirée qu'en fin de nom (en tête pour PREFIX_LEGAL_FORMS),
+    et seulement si le nom ne se réduit pas à elle seule (ex: "SAS" reste "sas").
+    """
+    siren = extract_siren(company)
+    if siren:
+        return siren
+
+    normalized = _base_normalize(company)
+    tokens = normalized.split()
+
+    while len(tokens) > 1 and tokens[-1] in LEGAL_FORMS:
+        tokens = tokens[:-1]
+    while len(tokens) > 1 and tokens[0] in PREFIX_LEGAL_FORMS:
+        tokens = tokens[1:]
+
+    return ' '.join(tokens)
@@ -0,0 +1,90 @@
+"""
+Near-duplicate detection for scraped content (word shingles + MinHash + LSH).
+
+Syndicated press releases, societe.com / verif.com style mirrors and LinkedIn
+snippets repeated across pages reach the prompt several times. Each text is
+reduced to its set of word shingles, summarized by a MinHash signature whose
+agreement rate estimates the Jaccard similarity of two shingle sets, and
+candidate pairs are found with LSH banding instead of comparing every pair
+(a search yields a few hundred passages).
+"""
+
+import hashlib
+import struct
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.utils.passage_ranker import tokenize
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+# 16 bandes de 4 lignes: paires candidates à partir d'une similarité ≈ 0.5
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+# Une fonction de hachage par permutation: NUM_PERMUTATIONS entiers 32 bits tirés d'un seul digest SHAKE-128
+HASH_FORMAT = struct.Struct(f'<{NUM_PERMUTATIONS}I')
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[bytes]:
+    """Shingles de size mots (texte normalisé); texte plus court = un seul shingle"""
+    tokens = tokenize(text)
+    if not tokens:
+        return set()
+    if len(tokens) <= size:
+        return {' '.join(tokens).encode('utf-8')}
+    return {' '.join(tokens[i:i + size]).encode('utf-8') for i in range(len(tokens) - size + 1)}
+
+
+def minhash(shingle_set: Set[bytes]) -> Optional[Tuple[int, ...]]:
+    """Signature MinHash: minimum de chaque fonction de hachage sur l'ensemble des shingles"""
+    if not shingle_set:
+        return None
+    rows = [HASH_FORMAT.unpack(hashlib.shake_128(shingle).digest(HASH_FORMAT.size)) for shingle in shingle_set]
+    return tuple(map(min, zip(*rows)))
+
+
+def estimate_similarity(signature_a: Tuple[int, ...], signature_b: Tuple[int, ...]) -> float:
+    """Similarité de Jaccard estimée: part des permutations où les minima coïncident"""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / NUM_PERMUTATIONS
+
+
+def find_near_duplicates(texts: List[str], threshold: float) -> List[int]:
+    """
+    Regroupe les textes quasi identiques (Jaccard estimée >= threshold).
+    Les textes sont fournis par ordre de préférence: le premier de chaque groupe est conservé.
+
+    Returns:
+        Pour chaque texte, l'index du texte conservé de son groupe (lui-même s'il est unique)
+    """
+    signatures = [minhash(shingles(text)) for text in texts]
+
+    buckets: Dict[Tuple, List[int]] = defaultdict(list)
+    for index, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        for band in range(LSH_BANDS):
+            buckets[(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])].append(index)
+
+    # Union-find: le représentant d'un groupe est son plus petit index (texte préféré)
+    parent = list(range(len(texts)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    checked = set()
+    for members in buckets.values():
+        for position, first in enumerate(members):
+            for second in members[position + 1:]:
+                if (first, second) in checked:
+                    continue
+                checked.add((first, second))
+                if estimate_similarity(signatures[first], signatures[second]) >= threshold:
+                    root_first, root_second = find(first), find(second)
+                    if root_first != root_second:
+                        parent[max(root_first, root_second)] = min(root_first, root_second)
+
+    return [find(index) for index in range(len(texts))]
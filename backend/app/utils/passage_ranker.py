@@ -0,0 +1,188 @@
+"""
+Relevance-ranked passage selection for scraped pages.
+
+Press articles and directory pages often name the subject far down the page, so
+keeping the beginning of each page wastes the prompt budget on navigation
+leftovers and unrelated news. Cleaned markdown is split into passages (paragraphs
+merged or cut to ~LLM_PASSAGE_WORDS words) and each passage is scored with BM25
+over the person's name, the company and role terms, with the IDF computed over
+all passages of the search. Only the best passages of each page are sent to the
+LLM, under the global token budget (see TokenBudget.pack).
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+from app.utils.name_normalizer import fold_accents, normalize_company_name, LEGAL_FORMS
+
+WORD_PATTERN = re.compile(r'\w+')
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Paramètres BM25 standards
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Poids des termes de la requête: la personne prime, le rôle ne fait que départager
+NAME_WEIGHT = 1.0
+COMPANY_WEIGHT = 0.7
+ROLE_WEIGHT = 0.3
+# Bonus si prénom et nom apparaissent côte à côte ("Jean Dupont" / "Dupont Jean")
+FULL_NAME_BONUS = 2.0
+
+ROLE_TERMS = (
+    'ceo', 'pdg', 'fondateur', 'fondatrice', 'cofondateur', 'cofondatrice', 'founder',
+    'president', 'presidente', 'directeur', 'directrice', 'dirigeant', 'dirigeante',
+    'gerant', 'gerante', 'associe', 'associee', 'administrateur', 'administratrice',
+    'partner', 'manager', 'head', 'cto', 'cfo', 'coo', 'chairman',
+)
+
+
+class Passage(NamedTuple):
+    """Passage d'une page (position = ordre dans la page)"""
+    position: int
+    text: str
+    score: float = 0.0
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in WORD_PATTERN.findall(fold_accents(text).lower()) if len(word) > 1]
+
+
+def split_passages(text: str, max_words: Optional[int] = None) -> List[str]:
+    """
+    Découpe le markdown en passages: paragraphes (lignes vides) regroupés jusqu'à
+    max_words mots, paragraphes trop longs coupés entre deux phrases.
+    """
+    if max_words is None:
+        max_words = int(os.getenv('LLM_PASSAGE_WORDS', '120'))
+
+    units = []
+    for paragraph in re.split(r'\n\s*\n', text or ''):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph.split()) <= max_words:
+            units.append(paragraph)
+            continue
+
+        # Paragraphe long: phrases regroupées (une phrase sans ponctuation reste entière)
+        current = []
+        for sentence in SENTENCE_END.split(paragraph):
+            if current and len(' '.join(current + [sentence]).split()) > max_words:
+                units.append(' '.join(current))
+                current = []
+            current.append(sentence)
+        if current:
+            units.append(' '.join(current))
+
+    passages = []
+    current = []
+    for unit in units:
+        if current and len('\n\n'.join(current + [unit]).split()) > max_words:
+            passages.append('\n\n'.join(current))
+            current = []
+        current.append(unit)
+    if current:
+        passages.append('\n\n'.join(current))
+
+    return passages
+
+
+def build_query(first_name: str, last_name: str, company: Optional[str] = None) -> Dict[str, float]:
+    """Termes de la requête BM25 et leur poids"""
+    query = {term: ROLE_WEIGHT for term in ROLE_TERMS}
+
+    # Termes génériques de la raison sociale ("groupe", "france"...) gardés: l'IDF les pénalise
+    company_terms = [term for term in tokenize(normalize_company_name(company or '')) if term not in LEGAL_FORMS]
+    for term in company_terms:
+        query[term] = COMPANY_WEIGHT
+
+    for term in tokenize(f"{first_name} {last_name}"):
+        query[term] = NAME_WEIGHT
+
+    return query
+
+
+class PassageRanker:
+    """BM25 sur l'ensemble des passages d'une recherche (toutes pages confondues)"""
+
+    def __init__(self, first_name: str, last_name: str, company: Optional[str] = None):
+        self.query = build_query(first_name, last_name, company)
+        self.first_terms = tokenize(first_name)
+        self.last_terms = tokenize(last_name)
+        # Un passage n'est pertinent que s'il cite le nom ou l'entreprise (un prénom + "directeur" ne suffit pas)
+        self.anchor_terms = set(self.last_terms) | {term for term, weight in self.query.items() if weight == COMPANY_WEIGHT}
+
+    def _full_name_present(self, tokens: List[str]) -> bool:
+        if not self.first_terms or not self.last_terms:
+            return False
+
+        forward = self.first_terms + self.last_terms
+        backward = self.last_terms + self.first_terms
+        size = len(forward)
+        return any(tokens[i:i + size] in (forward, backward) for i in range(len(tokens) - size + 1))
+
+    def rank_pages(self, pages: List[str]) -> List[List[Passage]]:
+        """
+        Découpe et score les passages de chaque page.
+
+        Returns:
+            Par page, les passages dans l'ordre de la page avec leur score BM25
+        """
+        page_passages = [split_passages(page) for page in pages]
+        tokenized = [[tokenize(text) for text in passages] for passages in page_passages]
+
+        all_tokens = [tokens for page in tokenized for tokens in page]
+        if not all_tokens:
+            return [[] for _ in pages]
+
+        average_length = sum(len(tokens) for tokens in all_tokens) / len(all_tokens) or 1.0
+        document_frequency = Counter(term for tokens in all_tokens for term in set(tokens) if term in self.query)
+        count = len(all_tokens)
+        idf = {
+            term: math.log(1 + (count - document_frequency.get(term, 0) + 0.5) / (document_frequency.get(term, 0) + 0.5))
+            for term in self.query
+        }
+
+        ranked = []
+        for passages, page_tokens in zip(page_passages, tokenized):
+            page_ranked = []
+            for position, (text, tokens) in enumerate(zip(passages, page_tokens)):
+                frequencies = Counter(tokens)
+                if not any(frequencies[term] for term in self.anchor_terms):
+                    page_ranked.append(Passage(position, text))
+                    continue
+
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / average_length)
+                score = sum(
+                    weight * idf[term] * frequencies[term] * (BM25_K1 + 1) / (frequencies[term] + norm)
+                    for term, weight in self.query.items()
+                    if frequencies[term]
+                )
+                if self._full_name_present(tokens):
+                    score += FULL_NAME_BONUS
+                page_ranked.append(Passage(position, text, round(score, 3)))
+            ranked.append(page_ranked)
+
+        return ranked
+
+
+def select_passages(passages: List[Passage], max_passages: int) -> List[Passage]:
+    """Meilleurs passages (score > 0) d'une page, par score décroissant"""
+    relevant = [passage for passage in passages if passage.score > 0]
+    return sorted(relevant, key=lambda passage: (-passage.score, passage.position))[:max_passages]
+
+
+def join_passages(passages: List[Passage]) -> str:
+    """Passages retenus remis dans l'ordre de la page, '[...]' entre passages non contigus"""
+    parts = []
+    previous = None
+    for passage in sorted(passages, key=lambda passage: passage.position):
+        if previous is not None and passage.position != previous + 1:
+            parts.append('[...]')
+        parts.append(passage.text)
+        previous = passage.position
+    return '\n\n'.join(parts)
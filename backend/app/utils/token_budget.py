@@ -0,0 +1,153 @@
+"""
+Token budgeting for the analysis prompt.
+
+- Exact token counts with the model's tokenizer (tiktoken), falling back to the
+  len // 4 approximation if tiktoken is unavailable
+- Context window per model, minus a reserve for the generated profile
+- Priority packing: prompt blocks (Pappers, HATVP, DVF, LinkedIn posts, page
+  content) are admitted by priority until the budget is spent; the block that
+  crosses the limit is truncated at a token boundary, lower priorities are dropped
+- A per-section report of the tokens actually sent
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # Approximation len // 4 si tiktoken n'est pas installé
+    tiktoken = None
+
+# Fenêtre de contexte (tokens) par famille de modèle, le préfixe le plus long gagne
+MODEL_CONTEXT_WINDOWS = {
+    'gpt-4o': 128000,
+    'gpt-4o-mini': 128000,
+    'gpt-4.1': 1047576,
+    'gpt-4-turbo': 128000,
+    'gpt-4': 8192,
+    'gpt-3.5-turbo': 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 128000
+
+# Bloc tronqué seulement s'il reste assez de place pour un extrait utile
+MIN_TRUNCATED_TOKENS = 150
+TRUNCATION_MARKER = "\n... [tronqué]"
+
+
+class PromptBlock(NamedTuple):
+    """Bloc de données candidat au prompt (priorité basse = admis en premier)"""
+    section: str
+    text: str
+    priority: int
+    truncatable: bool = True
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """
+    Encodage du modèle, None pour l'approximation len // 4. tiktoken télécharge le
+    fichier BPE au premier usage: un échec (pas d'accès réseau) est mis en cache comme
+    None, sinon chaque comptage retenterait le téléchargement
+    """
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        print(f"[TokenBudget] ⚠ tiktoken encoding unavailable for {model} ({type(e).__name__}), using len // 4")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    if not text:
+        return 0
+
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """Tronque à max_tokens (marqueur inclus), sur une frontière de token"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    keep = max(0, max_tokens - count_tokens(TRUNCATION_MARKER, model))
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:keep * 4] + TRUNCATION_MARKER
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:keep]) + TRUNCATION_MARKER
+
+
+def split_at_tokens(text: str, head_tokens: int, model: str) -> Tuple[str, str]:
+    """Coupe le texte après head_tokens tokens: (début, reste)"""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:head_tokens * 4], text[head_tokens * 4:]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= head_tokens:
+        return text, ''
+
+    return encoding.decode(tokens[:head_tokens]), encoding.decode(tokens[head_tokens:])
+
+
+def get_context_window(model: str) -> int:
+    env_window = os.getenv('LLM_CONTEXT_WINDOW')
+    if env_window:
+        return int(env_window)
+
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+
+
+class TokenBudget:
+    def __init__(self, model: str):
+        self.model = model
+        self.context_window = get_context_window(model)
+        # Réserve pour le profil généré (JSON 21 sections)
+        self.output_reserve = int(os.getenv('LLM_OUTPUT_TOKEN_RESERVE', '16000'))
+        # Budget cible des données: plus de contexte n'améliore pas l'analyse mais coûte et ralentit
+        self.target = int(os.getenv('LLM_INPUT_TOKEN_BUDGET', '30000'))
+
+    def available(self, overhead_tokens: int) -> int:
+        """Tokens disponibles pour les données, une fois le template (overhead) compté"""
+        return max(0, min(self.target, self.context_window - self.output_reserve) - overhead_tokens)
+
+    def pack(self, blocks: List[PromptBlock], budget: int) -> Tuple[List[str], Dict[str, Dict]]:
+        """
+        Admet les blocs par priorité dans le budget.
+
+        Returns:
+            (texte retenu par bloc dans l'ordre d'origine, '' si écarté,
+             {section: {tokens, blocks, truncated, dropped}})
+        """
+        packed = [''] * len(blocks)
+        report: Dict[str, Dict] = {}
+        remaining = budget
+
+        for index in sorted(range(len(blocks)), key=lambda i: blocks[i].priority):
+            block = blocks[index]
+            stats = report.setdefault(block.section, {'tokens': 0, 'blocks': 0, 'truncated': 0, 'dropped': 0})
+            tokens = count_tokens(block.text, self.model)
+
+            if tokens <= remaining:
+                packed[index] = block.text
+            elif block.truncatable and remaining >= MIN_TRUNCATED_TOKENS:
+                packed[index] = truncate_to_tokens(block.text, remaining, self.model)
+                tokens = count_tokens(packed[index], self.model)
+                stats['truncated'] += 1
+            else:
+                stats['dropped'] += 1
+                continue
+
+            remaining -= tokens
+            stats['tokens'] += tokens
+            stats['blocks'] += 1
+
+        return packed, report
@@ -0,0 +1,136 @@
+"""
+URL canonicalization and deduplication.
+
+Serper returns the same resource under many forms (tracking parameters, AMP
+variants, fr./www. LinkedIn hosts, trailing slashes, http vs https). Every
+source canonicalizes its URLs here so that the validator and Firecrawl never
+handle the same resource twice:
+- canonicalize_url(): fetchable canonical form
+- url_dedup_key(): scheme- and www-insensitive key for set/hash-based dedup
+"""
+
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+# Paramètres de tracking (supprimés de la query)
+TRACKING_PARAMS = {
+    'gclid', 'fbclid', 'msclkid', 'dclid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_src', 'ref_url', 'referrer', 'cmpid', 'xtor',
+    'at_medium', 'at_campaign', 'at_platform', 'at_send_date', 'at_link', 'at_creation',
+    'trk', 'trkinfo', 'originalsubdomain', 'lipi', 'midtoken', 'midsig', 'trackingid',
+    'spm', 'amp',
+}
+TRACKING_PREFIXES = ('utm_', 'at_', 'pk_', 'mtm_', 'hsa_', '_hs')
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+# Sous-domaines LinkedIn par langue (fr.linkedin.com, de.linkedin.com...) → www.linkedin.com
+LINKEDIN_HOST_PATTERN = re.compile(r'^[a-z]{2}(-[a-z]{2})?\.linkedin\.com$')
+
+
+def _strip_amp(host: str, path: str):
+    """
+    AMP → page canonique:
+    - Cache Google AMP: www.google.com/amp/s/example.com/article → example.com/article
+    - amp.example.com/article → example.com/article
+    - /amp/article, /article/amp, /article.amp.html → /article(.html)
+    """
+    if (host == 'google.com' or host.endswith('.google.com')) and path.startswith('/amp/'):
+        target = path[len('/amp/'):]
+        if target.startswith('s/'):
+            target = target[2:]
+        target_host, _, target_path = target.partition('/')
+        host, path = target_host.lower(), '/' + target_path
+
+    if host.startswith('amp.'):
+        host = host[len('amp.'):]
+
+    path = re.sub(r'/amp(/|$)', '/', path)
+    path = re.sub(r'\.amp\.html$', '.html', path)
+
+    return host, path
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Forme canonique (récupérable) d'une URL web.
+
+    Example:
+        "HTTPS://fr.LinkedIn.com/in/jdupont/?trk=public" → "https://www.linkedin.com/in/jdupont"
+        "https://www.lesechos.fr/amp/article-123?utm_source=x#top" → "https://www.lesechos.fr/article-123"
+
+    Les URLs non HTTP (pappers://, dvf://...) sont retournées telles quelles.
+    """
+    if not url:
+        return url
+
+    url = url.strip()
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https'):
+        return url
+
+    host = (parts.hostname or '').lower().rstrip('.')
+    if not host:
+        return url
+
+    path = parts.path or '/'
+
+    host, path = _strip_amp(host, path)
+
+    if LINKEDIN_HOST_PATTERN.match(host):
+        host = 'www.linkedin.com'
+
+    netloc = host
+    if port is not None and str(port) != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+
+    # Chemin: doubles slashs compactés, slash final retiré (sauf racine)
+    path = re.sub(r'/{2,}', '/', path)
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    query_params = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name)
+    ]
+    query = urlencode(sorted(query_params))
+
+    # Fragment ignoré (même ressource)
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def url_dedup_key(url: str) -> str:
+    """
+    Clé de déduplication: URL canonique sans schéma ni "www.", chemin décodé.
+
+    Example:
+        "http://www.example.com/a%C3%A9/" et "https://example.com/aé" → "example.com/aé"
+    """
+    canonical = canonicalize_url(url)
+
+    parts = urlsplit(canonical)
+    if parts.scheme not in ('http', 'https'):
+        return canonical
+
+    host = parts.netloc
+    if host.startswith('www.'):
+        host = host[len('www.'):]
+
+    key = host + unquote(parts.path)
+    if parts.query:
+        key += '?' + parts.query
+
+    return key
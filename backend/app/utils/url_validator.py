@@ -1,9 +1,12 @@
 import requests
 import random
 import time
-from typing import List
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Dict, Optional, Callable
 from urllib.parse import urlparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.http_client import get_http_client
+from app.utils.host_limiter import get_host_limiter, round_robin_by_host
 
 # User-Agent pool réaliste (vrais navigateurs, maj récentes)
 USER_AGENTS = [
@@ -40,7 +43,11 @@ def get_realistic_headers() -> dict:
         'Cache-Control': 'max-age=0',
     }
 
-def is_url_accessible(url: str, timeout: int = 3, session: requests.Session = None) -> bool:
+# Statuts HEAD typiques d'un anti-bot (le GET/scraping peut quand même fonctionner)
+BLOCKED_STATUS_CODES = (401, 403, 405, 429, 503)
+
+
+def check_url(url: str, timeout: float = 3, session: requests.Session = None) -> Dict:
     """
     Vérifie si une URL est accessible ET appropriée pour le scraping
     Filtre les PDFs, fichiers binaires, et contenus trop lourds
@@ -49,31 +56,53 @@ def is_url_accessible(url: str, timeout: int = 3, session: requests.Session = No
     Args:
         url: URL à valider
         timeout: Timeout en secondes
-        session: Session requests réutilisable (pour connection pooling)
+        session: Session requests spécifique (par défaut: pool partagé 'validator' du client HTTP)
+
+    Returns:
+        {accessible, outcome, status, latency_ms}
+        outcome ∈ {'ok', 'blocked', 'timeout', 'error', 'rejected'} (alimente le DomainLedger)
     """
+    start_time = time.time()
+
+    def result(accessible: bool, outcome: str, status: int = None) -> Dict:
+        return {
+            'accessible': accessible,
+            'outcome': outcome,
+            'status': status,
+            'latency_ms': round((time.time() - start_time) * 1000)
+        }
+
     try:
         # Filtrer les extensions de fichiers non désirées
         unwanted_extensions = ['.pdf', '.zip', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.exe', '.dmg']
         if any(url.lower().endswith(ext) for ext in unwanted_extensions):
             print(f"[URL Validator] ✗ {url} - unwanted file type")
-            return False
+            return result(False, 'rejected')
 
         # Utiliser des headers réalistes
         headers = get_realistic_headers()
 
-        # Utiliser session si fournie (connection pooling), sinon requests direct
-        requester = session if session else requests
-
-        response = requester.head(
-            url,
-            timeout=timeout,
-            allow_redirects=True,
-            headers=headers
-        )
+        # Limite par host (concurrence + espacement), partagée avec le scraping
+        with get_host_limiter().slot(url):
+            # Latence mesurée hors attente du limiteur
+            start_time = time.time()
+
+            # Utiliser session si fournie, sinon le pool keep-alive partagé du process
+            if session:
+                response = session.head(url, timeout=timeout, allow_redirects=True, headers=headers)
+            else:
+                response = get_http_client().head(
+                    url,
+                    provider='validator',
+                    timeout=timeout,
+                    allow_redirects=True,
+                    headers=headers
+                )
 
         if not (200 <= response.status_code < 400):
             print(f"[URL Validator] ✗ {url} returned {response.status_code}")
-            return False
+            outcome = 'blocked' if response.status_code in BLOCKED_STATUS_CODES else 'error'
+            return result(False, outcome, response.status_code)
 
         # Vérifier le Content-Type
         content_type = response.headers.get('Content-Type', '').lower()
@@ -83,90 +112,127 @@ def is_url_accessible(url: str, timeout: int = 3, session: requests.Session = No
                         'application/msword', 'application/vnd.ms-excel', 'application/vnd.openxmlformats']
         if any(blocked in content_type for blocked in blocked_types):
             print(f"[URL Validator] ✗ {url} - blocked content type: {content_type}")
-            return False
+            return result(False, 'rejected', response.status_code)
 
         # Vérifier la taille du contenu (bloquer > 5MB)
         content_length = response.headers.get('Content-Length')
         if content_length and int(content_length) > 5_000_000:  # 5MB
             print(f"[URL Validator] ✗ {url} - too large: {int(content_length) / 1_000_000:.1f}MB")
-            return False
+            return result(False, 'rejected', response.status_code)
 
-        return True
+        return result(True, 'ok', response.status_code)
 
     except requests.exceptions.Timeout:
         print(f"[URL Validator] ✗ {url} timeout after {timeout}s")
-        return False
+        return result(False, 'timeout')
 
     except requests.exceptions.ConnectionError:
         print(f"[URL Validator] ✗ {url} connection failed")
-        return False
+        return result(False, 'error')
 
     except Exception as e:
         print(f"[URL Validator] ✗ {url} error: {str(e)[:50]}")
-        return False
+        return result(False, 'error')
 
 
-def filter_accessible_urls(urls: List[str], timeout: int = 3, max_concurrent: int = 5) -> List[str]:
-    """
-    v3.1: Parallélisé pour -80% de temps (10s → 2s)
-    Valide toutes les URLs en parallèle avec ThreadPoolExecutor
-    Utilise connection pooling pour optimiser les performances
+# Page supprimée: le contenu en cache n'est plus réutilisable
+GONE_STATUS_CODES = (404, 410)
 
-    Args:
-        urls: Liste des URLs à valider
-        timeout: Timeout par requête HTTP (secondes)
-        max_concurrent: Nombre max d'URLs à retourner (limite de résultats)
+
+def _http_date_to_timestamp(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def revalidate_url(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                   scraped_at: Optional[float] = None, timeout: float = 3) -> Dict:
+    """
+    HEAD conditionnel (If-None-Match / If-Modified-Since) sur une page déjà scrapée.
 
     Returns:
-        Liste des URLs accessibles (limitée à max_concurrent)
+        {changed, gone, etag, last_modified}
+        changed: False (304, ETag identique, Last-Modified antérieur au scraping),
+                 True (validateurs différents), None (indéterminé: pas de validateur,
+                 HEAD refusé ou en erreur)
+        gone: True si la page a été supprimée (404 / 410), à retirer du profil
+    """
+    headers = get_realistic_headers()
+    headers.pop('Cache-Control', None)
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified or scraped_at:
+        headers['If-Modified-Since'] = last_modified or formatdate(scraped_at, usegmt=True)
+
+    try:
+        with get_host_limiter().slot(url):
+            response = get_http_client().head(url, provider='validator', timeout=timeout, allow_redirects=True, headers=headers)
+    except Exception as e:
+        print(f"[URL Validator] ⚠ Revalidation failed for {url}: {type(e).__name__}")
+        return {'changed': None, 'gone': False, 'etag': etag, 'last_modified': last_modified}
+
+    if response.status_code == 304:
+        return {'changed': False, 'gone': False, 'etag': etag, 'last_modified': last_modified}
+    if response.status_code in GONE_STATUS_CODES:
+        return {'changed': False, 'gone': True, 'etag': None, 'last_modified': None}
+    if not (200 <= response.status_code < 300):
+        return {'changed': None, 'gone': False, 'etag': etag, 'last_modified': last_modified}
+
+    new_etag = response.headers.get('ETag')
+    new_last_modified = response.headers.get('Last-Modified')
+    changed = None
+
+    if etag and new_etag:
+        changed = new_etag != etag
+    else:
+        reference = _http_date_to_timestamp(last_modified) or scraped_at
+        modified = _http_date_to_timestamp(new_last_modified)
+        if reference and modified:
+            changed = modified > reference
+
+    return {'changed': changed, 'gone': False, 'etag': new_etag or etag, 'last_modified': new_last_modified or last_modified}
+
+
+def is_url_accessible(url: str, timeout: float = 3, session: requests.Session = None) -> bool:
+    return check_url(url, timeout, session)['accessible']
+
+
+def validate_urls(urls: List[str], timeout: float = 3, max_workers: int = 20,
+                  timeouts: Optional[Dict[str, float]] = None,
+                  on_result: Optional[Callable[[str, Dict], None]] = None) -> List[str]:
+    """
+    Valide un lot d'URLs en parallèle et retourne les accessibles dans l'ORDRE D'ENTRÉE
+    (préserve le classement des candidats).
+
+    Utilisé par la validation juste-à-temps: petits lots classés, validés juste avant scraping.
+
+    Args:
+        timeouts: Timeout spécifique par URL (ex: raccourci pour un domaine connu rapide)
+        on_result: Callback (url, résultat de check_url) appelé pour chaque URL
     """
     if not urls:
         return []
 
     start_time = time.time()
-    print(f"[URL Validator] 🚀 Testing {len(urls)} URLs en parallèle (50 workers)...")
+    timeouts = timeouts or {}
 
-    accessible = []
+    def check(url: str) -> Dict:
+        outcome = check_url(url, timeouts.get(url, timeout))
+        if on_result:
+            on_result(url, outcome)
+        return outcome
 
-    # Créer une session avec connection pooling pour de meilleures performances
-    session = requests.Session()
-    adapter = requests.adapters.HTTPAdapter(
-        pool_connections=50,  # Nombre de connexions à maintenir
-        pool_maxsize=50,      # Taille max du pool
-        max_retries=0         # Pas de retry (on veut échouer vite)
-    )
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
+    # Soumission entrelacée par host (limites par host), résultats remis dans l'ordre d'entrée
+    submission_order = round_robin_by_host(urls)
 
-    try:
-        # Valider TOUTES les URLs en parallèle avec 50 workers
-        with ThreadPoolExecutor(max_workers=50) as executor:
-            # Soumettre toutes les validations avec la session
-            future_to_url = {
-                executor.submit(is_url_accessible, url, timeout, session): url
-                for url in urls
-            }
-
-            # Collecter les résultats au fur et à mesure
-            for future in as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    if future.result():
-                        accessible.append(url)
-                        print(f"[URL Validator] ✓ {url} accessible")
-
-                        # Arrêter dès qu'on a max_concurrent URLs
-                        if len(accessible) >= max_concurrent:
-                            print(f"[URL Validator] ⚡ Limite atteinte ({max_concurrent} URLs), arrêt anticipé")
-                            break
-                except Exception as e:
-                    print(f"[URL Validator] ✗ {url} error: {str(e)[:50]}")
-    finally:
-        # Fermer proprement la session
-        session.close()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as executor:
+        results = dict(zip(submission_order, executor.map(check, submission_order)))
+
+    accessible = [url for url in urls if results[url]['accessible']]
 
     validation_time = time.time() - start_time
-    print(f"[URL Validator] ⚡ {len(accessible)}/{len(urls)} URLs accessible en {validation_time:.1f}s (parallèle)")
+    print(f"[URL Validator] ⚡ Batch: {len(accessible)}/{len(urls)} URLs accessible en {validation_time:.1f}s")
 
     return accessible
 
@@ -51,6 +51,10 @@ function App() {
         setError(errorMsg || 'Une erreur est survenue');
         setLoading(false);
         cancelRef.current = null;
+      },
+      // onSection: affichage progressif du profil pendant l'analyse IA
+      (name, data) => {
+        setProfile((current) => ({ ...(current || {}), [name]: data }));
       }
     );
   };
@@ -234,7 +238,7 @@ function App() {
                 </div>
               )}
 
-              {profile && !loading && (
+              {profile && (
                 <div className="animate-slideInRight">
                   {cacheInfo && (
                     <div className="mb-4">
@@ -43,7 +43,7 @@ export const healthCheck = async () => {
  * @param {function} onError - Callback (error)
  * @returns {function} cleanup function pour annuler la requête
  */
-export const searchPersonStream = (firstName, lastName, company, forceRefresh = false, onProgress, onComplete, onError) => {
+export const searchPersonStream = (firstName, lastName, company, forceRefresh = false, onProgress, onComplete, onError, onSection) => {
   let aborted = false;
 
   const executeStream = async () => {
@@ -84,6 +84,9 @@ export const searchPersonStream = (firstName, lastName, company, forceRefresh =
 
             if (data.type === 'progress') {
               onProgress?.(data.percent, data.message, data.step);
+            } else if (data.type === 'section') {
+              // Section du profil terminée par le LLM (avant la fin de l'analyse complète)
+              onSection?.(data.name, data.data);
             } else if (data.type === 'complete') {
               onComplete?.({
                 success: true,